@@ -0,0 +1,34 @@
+"""Add product scrape state for conditional re-scrapes
+
+Revision ID: 3f9a1c2b7d41
+Revises: ecb6c0d50473
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d41'
+down_revision = 'ecb6c0d50473'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_scrape_state',
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    sa.Column('etag', sa.String(length=255), nullable=True),
+    sa.Column('last_modified', sa.String(length=64), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_changed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('product_scrape_state')
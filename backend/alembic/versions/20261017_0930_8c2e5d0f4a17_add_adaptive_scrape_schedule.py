@@ -0,0 +1,28 @@
+"""Add adaptive scrape schedule columns
+
+Revision ID: 8c2e5d0f4a17
+Revises: 3f9a1c2b7d41
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e5d0f4a17'
+down_revision = '3f9a1c2b7d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('product_scrape_state', sa.Column('next_scrape_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('product_scrape_state', sa.Column('consecutive_failures', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_product_scrape_state_next_scrape_at'), 'product_scrape_state', ['next_scrape_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_scrape_state_next_scrape_at'), table_name='product_scrape_state')
+    op.drop_column('product_scrape_state', 'consecutive_failures')
+    op.drop_column('product_scrape_state', 'next_scrape_at')
@@ -0,0 +1,49 @@
+"""Add persistent product clusters
+
+Revision ID: 5b7e2a9c6d13
+Revises: 8c2e5d0f4a17
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2a9c6d13'
+down_revision = '8c2e5d0f4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_clusters',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('canonical_title', sa.String(length=500), nullable=False),
+    sa.Column('brand', sa.String(length=100), nullable=True),
+    sa.Column('attributes', sa.JSON(), nullable=True),
+    sa.Column('min_price', sa.Float(), nullable=True),
+    sa.Column('max_price', sa.Float(), nullable=True),
+    sa.Column('offer_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_clusters_brand'), 'product_clusters', ['brand'], unique=False)
+    op.create_table('product_cluster_members',
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    sa.Column('cluster_id', sa.String(length=36), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['cluster_id'], ['product_clusters.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_cluster_members_cluster_id'), 'product_cluster_members', ['cluster_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_cluster_members_cluster_id'), table_name='product_cluster_members')
+    op.drop_table('product_cluster_members')
+    op.drop_index(op.f('ix_product_clusters_brand'), table_name='product_clusters')
+    op.drop_table('product_clusters')
@@ -0,0 +1,34 @@
+"""Add FULLTEXT search index on products
+
+Revision ID: a4d8f1e6c2b9
+Revises: 5b7e2a9c6d13
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8f1e6c2b9'
+down_revision = '5b7e2a9c6d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # MySQL only: other databases keep the ILIKE search path
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index(
+        'ix_products_name_description_fulltext',
+        'products',
+        ['name', 'description'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ix_products_name_description_fulltext', table_name='products')
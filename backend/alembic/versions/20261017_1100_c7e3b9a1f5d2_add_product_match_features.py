@@ -0,0 +1,39 @@
+"""Add precomputed product match features
+
+Revision ID: c7e3b9a1f5d2
+Revises: a4d8f1e6c2b9
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e3b9a1f5d2'
+down_revision = 'a4d8f1e6c2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_match_features',
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    sa.Column('normalized_title', sa.String(length=500), nullable=False),
+    sa.Column('tokens', sa.JSON(), nullable=False),
+    sa.Column('brand', sa.String(length=100), nullable=True),
+    sa.Column('capacity_gb', sa.Integer(), nullable=True),
+    sa.Column('ram_gb', sa.Integer(), nullable=True),
+    sa.Column('screen_inches', sa.Float(), nullable=True),
+    sa.Column('color', sa.String(length=20), nullable=True),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_product_match_features_brand_capacity', 'product_match_features', ['brand', 'capacity_gb'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_match_features_brand_capacity', table_name='product_match_features')
+    op.drop_table('product_match_features')
@@ -0,0 +1,36 @@
+"""Add composite indexes for the hot price history, alert and tracking queries
+
+Revision ID: e1f4a7c3b8d6
+Revises: c7e3b9a1f5d2
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4a7c3b8d6'
+down_revision = 'c7e3b9a1f5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # History / previous price / per-product counts: product_id = ? ORDER BY scraped_at
+    op.create_index('idx_price_product_scraped', 'price_history', ['product_id', 'scraped_at'], unique=False)
+    # Catalog-wide windows (price drops): scraped_at >= ?
+    op.create_index('idx_price_scraped', 'price_history', ['scraped_at'], unique=False)
+    # Trackers per product, distinct tracked products
+    op.create_index('idx_tracked_product', 'tracked_products', ['product_id'], unique=False)
+    # Active alerts, optionally for a set of products
+    op.create_index('idx_alert_active_product', 'alerts', ['is_active', 'product_id'], unique=False)
+    # Product lookup by marketplace identifier
+    op.create_index('idx_product_marketplace_external', 'products', ['marketplace', 'external_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_product_marketplace_external', table_name='products')
+    op.drop_index('idx_alert_active_product', table_name='alerts')
+    op.drop_index('idx_tracked_product', table_name='tracked_products')
+    op.drop_index('idx_price_scraped', table_name='price_history')
+    op.drop_index('idx_price_product_scraped', table_name='price_history')
@@ -0,0 +1,38 @@
+"""Add daily price rollups
+
+Revision ID: f2b6d8e4a9c1
+Revises: e1f4a7c3b8d6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e4a9c1'
+down_revision = 'e1f4a7c3b8d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('price_daily_rollups',
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open_price', sa.Float(), nullable=False),
+    sa.Column('high_price', sa.Float(), nullable=False),
+    sa.Column('low_price', sa.Float(), nullable=False),
+    sa.Column('close_price', sa.Float(), nullable=False),
+    sa.Column('avg_price', sa.Float(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('opened_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('closed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('price_daily_rollups')
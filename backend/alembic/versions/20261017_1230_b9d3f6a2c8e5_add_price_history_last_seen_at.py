@@ -0,0 +1,25 @@
+"""Add price_history.last_seen_at for compacted change points
+
+Revision ID: b9d3f6a2c8e5
+Revises: f2b6d8e4a9c1
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d3f6a2c8e5'
+down_revision = 'f2b6d8e4a9c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Last scrape that saw the price of a compacted row (NULL: scraped_at)
+    op.add_column('price_history', sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('price_history', 'last_seen_at')
@@ -0,0 +1,72 @@
+"""Partition price_history by month
+
+Revision ID: d5a8c2f7e4b1
+Revises: b9d3f6a2c8e5
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c2f7e4b1'
+down_revision = 'b9d3f6a2c8e5'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # MySQL only: other databases keep an unpartitioned table
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+
+    # Partitioned InnoDB tables cannot have foreign keys, and every unique
+    # key must include the partitioning column
+    for fk in sa.inspect(bind).get_foreign_keys('price_history'):
+        op.drop_constraint(fk['name'], 'price_history', type_='foreignkey')
+    op.execute("UPDATE price_history SET scraped_at = NOW() WHERE scraped_at IS NULL")
+    op.alter_column('price_history', 'scraped_at',
+                    existing_type=sa.DateTime(timezone=True),
+                    existing_nullable=True,
+                    nullable=False)
+    op.execute("ALTER TABLE price_history DROP PRIMARY KEY, ADD PRIMARY KEY (id, scraped_at)")
+
+    # One partition per month from the oldest row to MONTHS_AHEAD months ahead
+    first = bind.execute(sa.text("SELECT MIN(scraped_at) FROM price_history")).scalar()
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    partitions = []
+    while month <= last:
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+    partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    op.execute(
+        f"ALTER TABLE price_history PARTITION BY RANGE COLUMNS(scraped_at) ({', '.join(partitions)})"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+    op.execute("ALTER TABLE price_history REMOVE PARTITIONING")
+    op.execute("ALTER TABLE price_history DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.alter_column('price_history', 'scraped_at',
+                    existing_type=sa.DateTime(timezone=True),
+                    existing_nullable=False,
+                    nullable=True)
+    op.create_foreign_key(None, 'price_history', 'products', ['product_id'], ['id'])
@@ -0,0 +1,48 @@
+"""Make (marketplace, external_id) unique on products
+
+Revision ID: a7c1e5b9d3f8
+Revises: d5a8c2f7e4b1
+Create Date: 2026-10-17 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c1e5b9d3f8'
+down_revision = 'd5a8c2f7e4b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Duplicates keep their external id on one product only; the others
+    # are then matched by url, like products scraped without an id
+    products = sa.table('products', sa.column('id'), sa.column('marketplace'), sa.column('external_id'))
+    bind = op.get_bind()
+    # Scrapers stored a missing identifier as ""
+    bind.execute(sa.update(products).where(products.c.external_id == '').values(external_id=None))
+    duplicates = bind.execute(
+        sa.select(products.c.marketplace, products.c.external_id, sa.func.min(products.c.id))
+        .where(products.c.external_id.isnot(None))
+        .group_by(products.c.marketplace, products.c.external_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for marketplace, external_id, keep_id in duplicates:
+        bind.execute(
+            sa.update(products)
+            .where(products.c.marketplace == marketplace)
+            .where(products.c.external_id == external_id)
+            .where(products.c.id != keep_id)
+            .values(external_id=None)
+        )
+
+    # Upsert key of the bulk scrape write path (replaces the plain lookup index)
+    op.create_index('uq_products_marketplace_external', 'products', ['marketplace', 'external_id'], unique=True)
+    op.drop_index('idx_product_marketplace_external', table_name='products')
+
+
+def downgrade() -> None:
+    op.create_index('idx_product_marketplace_external', 'products', ['marketplace', 'external_id'], unique=False)
+    op.drop_index('uq_products_marketplace_external', table_name='products')
@@ -13,6 +13,7 @@ from app.models.user import User
 from app.models.alert import Alert
 from app.models.product import Product
 from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse
+from app.services.alert_index import index_alert, unindex_alert
 
 router = APIRouter(tags=["Alerts"])
 
@@ -55,6 +56,7 @@ async def create_alert(
     db.add(alert)
     await db.commit()
     await db.refresh(alert)
+    await index_alert(alert)
     
     return alert
 
@@ -121,6 +123,7 @@ async def update_alert(
     
     await db.commit()
     await db.refresh(alert)
+    await index_alert(alert)
     
     return alert
 
@@ -152,6 +155,7 @@ async def delete_alert(
     
     await db.delete(alert)
     await db.commit()
+    await unindex_alert(alert)
     
     return None
 
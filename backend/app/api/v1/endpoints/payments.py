@@ -11,6 +11,7 @@ import hashlib
 import hmac
 
 from app.core.config import settings
+from app.core.http_client import http_request
 from app.core.security import get_current_user
 from app.database.session import get_db
 from app.models import Subscription, User
@@ -59,25 +60,24 @@ async def confirm_kkiapay_payment(
             "Accept": "application/json",
         }
         params = {"transactionId": payload.transaction_id}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers, params=params, timeout=10.0)
-            if resp.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Payment verification failed",
-                )
-            data = resp.json()
-            if data.get("status") != "SUCCESS":
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Payment not successful: {data.get('status', 'UNKNOWN')}",
-                )
-            # Optional: verify amount matches
-            if payload.amount_xof is not None and data.get("amount") != payload.amount_xof:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Amount mismatch",
-                )
+        resp = await http_request("GET", url, headers=headers, params=params, timeout=10.0)
+        if resp.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Payment verification failed",
+            )
+        data = resp.json()
+        if data.get("status") != "SUCCESS":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Payment not successful: {data.get('status', 'UNKNOWN')}",
+            )
+        # Optional: verify amount matches
+        if payload.amount_xof is not None and data.get("amount") != payload.amount_xof:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Amount mismatch",
+            )
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
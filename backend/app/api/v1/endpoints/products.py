@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
 from app.core.security import get_current_user
@@ -14,6 +14,7 @@ from app.models.user import User
 from app.models.product import Product, Marketplace
 from app.models.tracked_product import TrackedProduct
 from app.models.price import PriceHistory, PriceSource
+from app.models.product_features import ProductMatchFeatures
 from app.schemas.product import (
     ProductResponse,
     ProductWithPriceChange,
@@ -21,9 +22,17 @@ from app.schemas.product import (
     TrackedProductResponse,
     ScrapeProductRequest
 )
-from app.schemas.prediction import PriceHistoryResponse, PriceDropItem
+from app.schemas.prediction import PriceHistoryResponse, PriceDailyResponse, PriceDropItem, PriceHistoryStats
 from app.schemas.compare import AggregatedGroupResponse, AggregatedOfferResponse
 from app.services.aggregator import group_products
+from app.services.candidate_index import get_candidate_index, index_product
+from app.services.clustering import cluster_ids_for, load_cluster_groups, update_clusters
+from app.services.match_features import attribute_filter, load_match_features, upsert_match_features
+from app.services.matching import features_of
+from app.services.downsampling import downsample_indices
+from app.services.ingestion import ingest_scraped_products
+from app.services.rollups import daily_rollups, first_rollup_day, record_prices, rollup_stats
+from app.services.search import product_search
 from app.services.scraper.jumia_scraper import JumiaScraper, simple_scrape_jumia
 from app.services.scraper.amazon_scraper import AmazonScraper
 
@@ -46,25 +55,27 @@ async def list_products(
     - **limit**: Items per page (max: 100)
     - **category**: Filter by category
     - **marketplace**: Filter by marketplace (jumia, amazon, local_market)
-    - **search**: Search in product name
+    - **search**: Search in product name and description (ranked by relevance)
     """
     query = select(Product)
     
     # Apply filters
     filters = []
+    order_by = []
     if category:
         filters.append(Product.category == category)
     if marketplace:
         filters.append(Product.marketplace == marketplace)
     if search:
-        filters.append(Product.name.ilike(f"%{search}%"))
+        search_filter, order_by = product_search(search, db.bind.dialect.name)
+        filters.append(search_filter)
     
     if filters:
         query = query.where(and_(*filters))
     
     # Pagination
     offset = (page - 1) * limit
-    query = query.offset(offset).limit(limit).order_by(Product.created_at.desc())
+    query = query.offset(offset).limit(limit).order_by(*order_by, Product.created_at.desc())
     
     result = await db.execute(query)
     products = result.scalars().all()
@@ -72,12 +83,80 @@ async def list_products(
     return products
 
 
+def price_drops_query(since: datetime, min_drop_pct: float, min_z: float):
+    """
+    SELECT of the 50 largest price drops: latest price in the window vs
+    the mean / std of the earlier prices in the window
+    """
+    # Price rows in the window, newest first per product
+    ranked = (
+        select(
+            PriceHistory.product_id.label("product_id"),
+            PriceHistory.price.label("price"),
+            PriceHistory.currency.label("currency"),
+            PriceHistory.scraped_at.label("scraped_at"),
+            func.row_number().over(
+                partition_by=PriceHistory.product_id,
+                order_by=PriceHistory.scraped_at.desc(),
+            ).label("rn"),
+        )
+        .where(PriceHistory.scraped_at >= since)
+        .subquery()
+    )
+    latest = (
+        select(ranked.c.product_id, ranked.c.price, ranked.c.currency, ranked.c.scraped_at)
+        .where(ranked.c.rn == 1)
+        .where(ranked.c.price.isnot(None))
+        .subquery("latest")
+    )
+    # Mean / sample std of the earlier prices in the window
+    prior = (
+        select(
+            ranked.c.product_id,
+            func.avg(ranked.c.price).label("mean"),
+            func.stddev_samp(ranked.c.price).label("std"),
+        )
+        .where(ranked.c.rn > 1)
+        .where(ranked.c.price.isnot(None))
+        .group_by(ranked.c.product_id)
+        .subquery("prior")
+    )
+
+    drop_pct = ((prior.c.mean - latest.c.price) / prior.c.mean * 100.0).label("drop_pct")
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.marketplace,
+            Product.url,
+            Product.image_url,
+            latest.c.price,
+            latest.c.currency,
+            latest.c.scraped_at,
+            prior.c.mean,
+            prior.c.std,
+            drop_pct,
+        )
+        .join(latest, latest.c.product_id == Product.id)
+        .join(prior, prior.c.product_id == Product.id)
+        .where(prior.c.mean > 0)
+        .where(drop_pct >= min_drop_pct)
+        # Not significant drop by z-score (skipped when std is 0 / undefined)
+        .where(or_(
+            prior.c.std.is_(None),
+            prior.c.std <= 0,
+            (latest.c.price - prior.c.mean) / prior.c.std <= min_z,
+        ))
+        .order_by(drop_pct.desc())
+        .limit(50)
+    )
+
+
 @router.get("/products/price-drops", response_model=List[PriceDropItem])
 async def get_price_drops(
     window_days: int = Query(30, ge=7, le=180),
     min_drop_pct: float = Query(10.0, ge=1.0, le=90.0),
     min_z: float = Query(-1.0, ge=-5.0, le=0.0),
-    sample_limit: int = Query(500, ge=10, le=2000),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -85,90 +164,162 @@ async def get_price_drops(
     Conditions:
     - latest price below previous mean by at least `min_drop_pct` percent
     - optional z-score threshold (latest vs mean/std) <= min_z (negative)
+    
+    Evaluated for the whole catalog in one aggregated query.
     """
-    # Select a sample of recent products to limit workload
-    prod_res = await db.execute(
-        select(Product).order_by(Product.created_at.desc()).limit(sample_limit)
-    )
-    products = prod_res.scalars().all()
-
-    from datetime import datetime, timedelta
     since = datetime.utcnow() - timedelta(days=window_days)
-
-    drops: List[PriceDropItem] = []
-    for p in products:
-        hist_res = await db.execute(
-            select(PriceHistory)
-            .where(PriceHistory.product_id == p.id)
-            .where(PriceHistory.scraped_at >= since)
-            .order_by(PriceHistory.scraped_at.asc())
-        )
-        rows = hist_res.scalars().all()
-        if len(rows) < 2:
-            continue
-        # latest is last
-        latest = rows[-1]
-        prior = rows[:-1]
-        prior_prices = [r.price for r in prior if r.price is not None]
-        if len(prior_prices) < 1:
-            continue
-        avg = sum(prior_prices) / len(prior_prices)
-        # std
-        if len(prior_prices) > 1:
-            var = sum((x - avg) ** 2 for x in prior_prices) / (len(prior_prices) - 1)
-            std = var ** 0.5
-        else:
-            std = 0.0
-        if avg <= 0:
-            continue
-        drop_pct = (avg - latest.price) / avg * 100.0
-        if drop_pct < min_drop_pct:
-            continue
-        z = None
-        if std and std > 0:
-            z = (latest.price - avg) / std
-            if z > min_z:
-                # Not significant drop by z-score
-                continue
-        drops.append(
-            PriceDropItem(
-                product_id=p.id,
-                name=p.name,
-                marketplace=str(p.marketplace),
-                current_price=latest.price,
-                currency=latest.currency,
-                drop_pct=round(drop_pct, 2),
-                previous_mean=round(avg, 2),
-                previous_std=round(std, 2) if std else None,
-                last_change_at=latest.scraped_at,
-                url=p.url,
-                image_url=p.image_url,
-            )
+    result = await db.execute(price_drops_query(since, min_drop_pct, min_z))
+    return [
+        PriceDropItem(
+            product_id=row.id,
+            name=row.name,
+            marketplace=str(row.marketplace),
+            current_price=row.price,
+            currency=row.currency,
+            drop_pct=round(row.drop_pct, 2),
+            previous_mean=round(row.mean, 2),
+            previous_std=round(row.std, 2) if row.std else None,
+            last_change_at=row.scraped_at,
+            url=row.url,
+            image_url=row.image_url,
         )
+        for row in result.all()
+    ]
+
 
-    # Sort by drop percentage desc, take top N
-    drops.sort(key=lambda d: d.drop_pct, reverse=True)
-    return drops[:50]
+def history_samples_query(product_id: str, start: datetime, end: datetime):
+    """SELECT of a product's raw prices between start and end, oldest first"""
+    return (
+        select(PriceHistory.scraped_at, PriceHistory.price, PriceHistory.currency)
+        .where(PriceHistory.product_id == product_id)
+        .where(PriceHistory.scraped_at >= start)
+        .where(PriceHistory.scraped_at <= end)
+        .where(PriceHistory.price.isnot(None))
+        .order_by(PriceHistory.scraped_at.asc())
+    )
 
 
 @router.get("/products/{product_id}/history", response_model=List[PriceHistoryResponse])
 async def get_product_history(
     product_id: str,
-    limit: int = Query(365, ge=1, le=2000),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    max_points: int = Query(500, ge=10, le=5000),
+    limit: Optional[int] = Query(None, ge=1, le=2000, deprecated=True),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Return chronological price history for a product.
+    
+    - **from** / **to**: Time range (default: whole history, until now)
+    - **max_points**: Maximum number of points, downsampled with LTTB
+    (shape-preserving: peaks and drops are kept)
+    - **limit**: Deprecated alias of max_points
+    
+    Ranges wider than HISTORY_ROLLUP_MIN_DAYS are read from the daily
+    rollups (one close price per day) instead of the raw samples.
     """
-    result = await db.execute(
-        select(PriceHistory)
-        .where(PriceHistory.product_id == product_id)
-        .order_by(PriceHistory.scraped_at.asc())
-        .limit(limit)
-    )
-    rows = result.scalars().all()
+    max_points = limit or max_points
+    # Stored timestamps are naive UTC
+    to = to.astimezone(timezone.utc).replace(tzinfo=None) if to and to.tzinfo else (to or datetime.utcnow())
+    start = from_.astimezone(timezone.utc).replace(tzinfo=None) if from_ and from_.tzinfo else from_
+    if start is None:
+        # First day from the rollups: reading price_history unbounded would visit every partition
+        first_day = await first_rollup_day(db, product_id)
+        if first_day is not None:
+            start = datetime.combine(first_day, datetime.min.time())
+        else:
+            # No rollup yet (before the backfill): recent raw samples only
+            start = to - timedelta(days=settings.HISTORY_ROLLUP_MIN_DAYS)
+
+    if to - start > timedelta(days=settings.HISTORY_ROLLUP_MIN_DAYS):
+        currency = (await db.execute(select(Product.currency).where(Product.id == product_id))).scalar_one_or_none()
+        rollups = await daily_rollups(db, product_id, since=start.date(), until=to.date())
+        times = [datetime.combine(r.day, datetime.min.time()) for r in rollups]
+        prices = [r.close_price for r in rollups]
+        currencies = [currency or "XOF"] * len(rollups)
+    else:
+        result = await db.execute(history_samples_query(product_id, start, to))
+        rows = result.all()
+        times = [r.scraped_at for r in rows]
+        prices = [r.price for r in rows]
+        currencies = [r.currency for r in rows]
+
     # Map scraped_at -> date in response
-    return [PriceHistoryResponse(date=r.scraped_at, price=r.price, currency=r.currency) for r in rows]
+    return [
+        PriceHistoryResponse(date=times[i], price=prices[i], currency=currencies[i])
+        for i in downsample_indices(times, prices, max_points)
+    ]
+
+
+@router.get("/products/{product_id}/history/daily", response_model=List[PriceDailyResponse])
+async def get_product_daily_history(
+    product_id: str,
+    days: Optional[int] = Query(None, ge=1, le=3650),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Daily open / high / low / close / average prices for a product (charts),
+    over the last `days` days or the whole history
+    """
+    since = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+    rows = await daily_rollups(db, product_id, since=since)
+    return [
+        PriceDailyResponse(
+            date=r.day,
+            open=r.open_price,
+            high=r.high_price,
+            low=r.low_price,
+            close=r.close_price,
+            average=r.avg_price,
+            count=r.sample_count,
+        )
+        for r in rows
+    ]
+
+
+@router.get("/products/{product_id}/stats", response_model=PriceHistoryStats)
+async def get_product_stats(
+    product_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Average / lowest / highest price and 7 / 30 day price changes,
+    computed from the daily rollups
+    """
+    result = await db.execute(select(Product).where(Product.id == product_id))
+    product = result.scalar_one_or_none()
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
+
+    stats = await rollup_stats(db, product)
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aucun historique de prix pour ce produit")
+    return PriceHistoryStats(**stats)
+
+
+def _group_response(g) -> AggregatedGroupResponse:
+    return AggregatedGroupResponse(
+        canonical_title=g.canonical_title,
+        brand=g.brand,
+        attributes=g.attributes,
+        offers=[
+            AggregatedOfferResponse(
+                product_id=o.product_id,
+                title=o.title,
+                marketplace=o.marketplace,
+                price=o.price,
+                currency=o.currency,
+                is_available=o.is_available,
+                url=o.url,
+                image_url=o.image_url,
+            )
+            for o in g.offers
+        ],
+        best_price=g.best_price,
+        min_price=g.min_price,
+        max_price=g.max_price,
+    )
 
 
 @router.get("/products/{product_id}/compare", response_model=AggregatedGroupResponse)
@@ -186,46 +337,47 @@ async def compare_product(
     if not target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
 
-    # Build a simple candidate query using tokens from name and same category
-    tokens = [t for t in (target.name or "").split() if len(t) > 2]
-    filters = []
-    for t in tokens[:6]:
-        filters.append(Product.name.ilike(f"%{t}%"))
-    if target.category:
-        filters.append(Product.category == target.category)
-
-    cand_query = select(Product).where(or_(*filters)).limit(max_candidates)
-    cand_res = await db.execute(cand_query)
-    candidates = cand_res.scalars().all()
-
-    groups = group_products([target] + [p for p in candidates if p.id != target.id])
+    # Stored cluster: single lookup through the membership index
+    cluster_id = (await cluster_ids_for(db, [target.id])).get(target.id)
+    if cluster_id:
+        groups = await load_cluster_groups(db, [cluster_id])
+        if groups:
+            return _group_response(groups[0])
+
+    # Not clustered yet: group on the fly with the products sharing the
+    # rarest title tokens / attributes (inverted index)
+    index = await get_candidate_index()
+    if index is not None:
+        candidate_ids = index.candidates(target.name, max_candidates, exclude=[target.id])
+        cand_res = await db.execute(select(Product).where(Product.id.in_(candidate_ids)))
+        candidates = cand_res.scalars().all()
+    else:
+        # Index unavailable: token / category scan
+        tokens = [t for t in (target.name or "").split() if len(t) > 2]
+        filters = []
+        for t in tokens[:6]:
+            filters.append(Product.name.ilike(f"%{t}%"))
+        if target.category:
+            filters.append(Product.category == target.category)
+
+        cand_query = select(Product).where(or_(*filters))
+        # Same brand / compatible capacity, from the stored features
+        target_features = features_of(target)
+        attributes = attribute_filter(target_features.brand, target_features.capacity_gb)
+        if attributes is not None:
+            cand_query = cand_query.outerjoin(
+                ProductMatchFeatures, ProductMatchFeatures.product_id == Product.id
+            ).where(or_(attributes, ProductMatchFeatures.product_id.is_(None)))
+        cand_res = await db.execute(cand_query.limit(max_candidates))
+        candidates = cand_res.scalars().all()
+
+    products = [target] + [p for p in candidates if p.id != target.id]
+    groups = group_products(products, features=await load_match_features(db, products))
 
     # Find the group containing the target
-    from app.schemas.compare import AggregatedOfferResponse
     for g in groups:
-        contains = any(o.product_id == target.id for o in g.offers)
-        if contains:
-            return AggregatedGroupResponse(
-                canonical_title=g.canonical_title,
-                brand=g.brand,
-                attributes=g.attributes,
-                offers=[
-                    AggregatedOfferResponse(
-                        product_id=o.product_id,
-                        title=o.title,
-                        marketplace=o.marketplace,
-                        price=o.price,
-                        currency=o.currency,
-                        is_available=o.is_available,
-                        url=o.url,
-                        image_url=o.image_url,
-                    )
-                    for o in g.offers
-                ],
-                best_price=g.best_price,
-                min_price=g.min_price,
-                max_price=g.max_price,
-            )
+        if any(o.product_id == target.id for o in g.offers):
+            return _group_response(g)
 
     # Fallback: single-offer group
     return AggregatedGroupResponse(
@@ -260,42 +412,22 @@ async def compare_by_search(
     Aggregate comparable products across sources for a free-text search.
     Returns groups with best price and offers per source.
     """
-    query = select(Product).where(
-        or_(
-            Product.name.ilike(f"%{q}%"),
-            Product.description.ilike(f"%{q}%"),
-        )
-    ).limit(limit)
+    search_filter, order_by = product_search(q, db.bind.dialect.name)
+    query = select(Product).where(search_filter).order_by(*order_by).limit(limit)
 
     result = await db.execute(query)
     products = result.scalars().all()
 
-    groups = group_products(products)
-
-    def to_response(g):
-        return AggregatedGroupResponse(
-            canonical_title=g.canonical_title,
-            brand=g.brand,
-            attributes=g.attributes,
-            offers=[
-                AggregatedOfferResponse(
-                    product_id=o.product_id,
-                    title=o.title,
-                    marketplace=o.marketplace,
-                    price=o.price,
-                    currency=o.currency,
-                    is_available=o.is_available,
-                    url=o.url,
-                    image_url=o.image_url,
-                )
-                for o in g.offers
-            ],
-            best_price=g.best_price,
-            min_price=g.min_price,
-            max_price=g.max_price,
-        )
+    # Stored clusters of the matching products, grouped on the fly for
+    # products that are not clustered yet
+    clusters = await cluster_ids_for(db, [p.id for p in products])
+    groups = await load_cluster_groups(db, [clusters[p.id] for p in products if p.id in clusters])
+    unclustered = [p for p in products if p.id not in clusters]
+    if unclustered:
+        groups += group_products(unclustered, features=await load_match_features(db, unclustered))
+        groups.sort(key=lambda gr: (gr.best_price if gr.best_price is not None else 1e18, -len(gr.offers)))
 
-    return [to_response(g) for g in groups]
+    return [_group_response(g) for g in groups]
 
 
 @router.get("/products/search", response_model=List[ProductResponse])
@@ -304,14 +436,10 @@ async def search_products(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Search products by name or description
+    Search products by name or description, most relevant first
     """
-    query = select(Product).where(
-        or_(
-            Product.name.ilike(f"%{q}%"),
-            Product.description.ilike(f"%{q}%")
-        )
-    ).limit(50)
+    search_filter, order_by = product_search(q, db.bind.dialect.name)
+    query = select(Product).where(search_filter).order_by(*order_by).limit(50)
     
     result = await db.execute(query)
     products = result.scalars().all()
@@ -514,32 +642,35 @@ async def scrape_and_add_product(
                 detail="Impossible de scraper ce produit. Vérifiez que l'URL est valide et accessible."
             )
         
-        # Normalize payload for Product model (map price -> current_price)
-        payload = {
-            "name": product_data.get("name"),
-            "description": product_data.get("description"),
-            "category": product_data.get("category"),
-            "image_url": product_data.get("image_url"),
-            "marketplace": Marketplace(product_data.get("marketplace") or marketplace),
-            "url": product_data.get("url") or scrape_data.url,
-            "current_price": product_data.get("price") or product_data.get("current_price"),
-            "currency": product_data.get("currency") or "XOF",
-            "is_available": product_data.get("is_available", True),
-            "external_id": product_data.get("external_id"),
-            "last_scraped_at": datetime.utcnow(),
-        }
-
-        if not payload.get("current_price"):
+        price = product_data.get("price") or product_data.get("current_price")
+        if not price:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Prix non détecté sur la page produit"
             )
 
-        # Create product
-        product = Product(**payload)
-        db.add(product)
+        # Bulk write path: a product already known by its marketplace id
+        # (under another URL) is updated and returned instead of duplicated
+        now = datetime.utcnow()
+        ingested = await ingest_scraped_products(db, [{
+            **product_data,
+            "marketplace": product_data.get("marketplace") or marketplace,
+            "url": product_data.get("url") or scrape_data.url,
+            "scraped_at": now,
+        }], now)
+        result = await db.execute(
+            select(Product)
+            .where(Product.id == ingested.product_ids[0])
+            .execution_options(populate_existing=True)
+        )
+        product = result.scalar_one()
+        await record_prices(db, [(product.id, product.current_price, now)])
+        if ingested.price_changes:
+            await upsert_match_features(db, [product])
+            await update_clusters(db, [product])
         await db.commit()
         await db.refresh(product)
+        index_product(product.id, product.name)
         
         return product
         
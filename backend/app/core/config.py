@@ -59,8 +59,59 @@ class Settings(BaseSettings):
     
     # Scraping Configuration
     SCRAPING_USER_AGENT_POOL: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64), Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-    SCRAPING_RATE_LIMIT_SECONDS: int = 5
+    SCRAPING_RATE_LIMIT_SECONDS: int = 5  # Default spacing for domains not listed below
+    SCRAPING_DOMAIN_RATE_LIMITS: str = "jumia.com.bj=3,jumia.ci=3,amazon.com=6,aliexpress.com=4"  # domain=seconds between requests
+    SCRAPING_RATE_LIMIT_BURST: int = 2  # Requests allowed back-to-back per domain
+    SCRAPING_RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared across workers)
     SCRAPING_MAX_RETRIES: int = 3
+    SCRAPING_BROWSER_POOL_SIZE: int = 2  # Warm Chromium instances per worker process
+    SCRAPING_BROWSER_CONTEXTS_PER_BROWSER: int = 4  # Concurrent isolated contexts per browser
+    SCRAPING_BROWSER_MAX_PAGES: int = 200  # Recycle a browser after serving this many contexts
+    SCRAPING_BATCH_SIZE: int = 25  # Products per batch scraping task
+    SCRAPING_BATCH_CONCURRENCY: int = 4  # Concurrent scrapes inside a batch
+    
+    # Adaptive scrape scheduling
+    SCRAPE_BASE_INTERVAL_HOURS: float = 12.0  # Interval of a stable product with a single tracker
+    SCRAPE_MIN_INTERVAL_HOURS: float = 1.0
+    SCRAPE_MAX_INTERVAL_HOURS: float = 48.0
+    SCRAPE_VOLATILITY_WINDOW_DAYS: int = 14  # Window used to measure price change rate
+    SCRAPE_DISPATCH_MAX_PER_TICK: int = 500  # Scraping budget per scheduler tick
+    SCRAPE_DISPATCH_LEASE_MINUTES: int = 30  # Don't re-dispatch a queued product before this
+    
+    # Product title similarity (TF-IDF fitted on the catalog)
+    # Written by the Celery worker, read by the API: must be on storage shared by
+    # both (the ml_models volume in docker-compose); set an absolute local path
+    # when running without Docker
+    EMBEDDINGS_MODEL_PATH: str = "/app/models/tfidf_titles.joblib"
+    EMBEDDINGS_MAX_FEATURES: int = 50000
+    EMBEDDINGS_CACHE_SIZE: int = 50000  # Cached title vectors per process
+    
+    # Price history charts
+    HISTORY_ROLLUP_MIN_DAYS: int = 90  # Wider ranges are served from the daily rollups
+    
+    # Price history compaction
+    PRICE_HISTORY_RAW_RETENTION_DAYS: int = 365  # Older days with a rollup keep their closing price only
+    PRICE_HISTORY_COMPACTION_MIN_AGE_HOURS: int = 24  # Newer rows are never compacted
+    
+    # Price history monthly partitions (MySQL)
+    PRICE_HISTORY_PARTITION_MONTHS_AHEAD: int = 3  # Partitions created ahead of the current month
+    PRICE_HISTORY_PARTITION_RETENTION_MONTHS: int = 36  # Older months are detached (0 keeps them all)
+    PRICE_HISTORY_ARCHIVE_EXPIRED_PARTITIONS: bool = True  # Move expired months to archive tables instead of dropping them
+    
+    # Price history Parquet export (month=YYYY-MM/marketplace=<name>/data.parquet)
+    PRICE_EXPORT_DIR: str = "exports/price_history"
+    PRICE_EXPORT_COMPRESSION: str = "zstd"
+    
+    # Match candidate retrieval (in-process inverted index)
+    CANDIDATE_INDEX_REFRESH_SECONDS: int = 600  # Rebuild the index from the catalog this often
+    
+    # Outbound HTTP (shared keep-alive client)
+    HTTP_TIMEOUT_SECONDS: float = 20.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_DNS_CACHE_TTL_SECONDS: int = 300
     
     # Subscription Pricing (XOF - Franc CFA)
     PREMIUM_MONTHLY_PRICE_XOF: int = 1000  # ~1.5 EUR
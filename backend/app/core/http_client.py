@@ -0,0 +1,161 @@
+"""
+Shared outbound HTTP client
+
+One keep-alive httpx.AsyncClient per process (per event loop) for scrapers
+and third-party APIs, so repeated requests to the same host reuse pooled
+TLS connections instead of handshaking every time. HTTP/2 is negotiated
+when the optional `h2` package is installed (httpx[http2]).
+"""
+import asyncio
+import logging
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import getproxies
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+logger = logging.getLogger(__name__)
+
+
+class _CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that resolves each host once per TTL and connects to the
+    cached addresses. TLS still uses the original hostname for SNI and
+    certificate checks (httpcore passes it to start_tls separately).
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float):
+        self._backend = backend
+        self._ttl = ttl
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        now = time.monotonic()
+        cached = self._cache.get(host)
+        if cached and cached[0] > now:
+            return cached[1]
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[host] = (now + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await self._resolve(host, port)
+        except OSError:
+            # Let the underlying backend raise a proper httpcore.ConnectError
+            addresses = [host]
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout,
+                    local_address=local_address, socket_options=socket_options,
+                )
+            except httpcore.ConnectError as e:
+                last_error = e
+        # Every cached address failed: resolve again next time
+        self._cache.pop(host, None)
+        raise last_error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _PooledTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport whose connection pool uses the DNS-caching backend"""
+
+    def __init__(self, http2: bool, limits: httpx.Limits, dns_ttl: float):
+        super().__init__(http2=http2, limits=limits)
+        # httpx does not expose httpcore's network_backend, so rebuild the pool
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(http2=http2),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=_CachingDNSBackend(httpcore.AnyIOBackend(), dns_ttl),
+        )
+
+
+class _SharedClient:
+    """The process-wide client and its per-host concurrency limits"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        transport = None
+        if not getproxies():
+            # Passing a transport disables httpx's env proxy support, so only
+            # swap in the DNS-caching one when no proxy is configured
+            transport = _PooledTransport(_HAS_H2, limits, settings.HTTP_DNS_CACHE_TTL_SECONDS)
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            http2=_HAS_H2,
+            limits=limits,
+            timeout=settings.HTTP_TIMEOUT_SECONDS,
+            follow_redirects=True,
+        )
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ""
+        semaphore = self.host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+            self.host_limits[host] = semaphore
+        return semaphore
+
+
+_shared: Optional[_SharedClient] = None
+
+
+def _get_shared() -> _SharedClient:
+    global _shared
+    loop = asyncio.get_running_loop()
+    if _shared is None or _shared.loop is not loop or _shared.client.is_closed:
+        _shared = _SharedClient()
+        logger.info(f"🌐 Shared HTTP client ready (http2={'on' if _HAS_H2 else 'off'})")
+    return _shared
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client for the running event loop (created lazily)"""
+    return _get_shared().client
+
+
+async def http_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request through the shared client, with at most
+    HTTP_MAX_CONNECTIONS_PER_HOST requests in flight per host
+    """
+    shared = _get_shared()
+    async with shared.host_limit(url):
+        return await shared.client.request(method, url, **kwargs)
+
+
+async def close_http_client() -> None:
+    """Close the shared client (FastAPI shutdown / Celery worker exit)"""
+    global _shared
+    shared, _shared = _shared, None
+    if shared is not None and shared.loop is asyncio.get_running_loop():
+        await shared.client.aclose()
@@ -0,0 +1,33 @@
+"""
+Shared async Redis client
+"""
+import asyncio
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_client: Optional[aioredis.Redis] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Return the Redis client for the running event loop (created lazily).
+    redis.asyncio connections are bound to the loop that opened them.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        _client_loop = loop
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client"""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
@@ -10,5 +10,11 @@ from app.models.price import PriceHistory
 from app.models.tracked_product import TrackedProduct
 from app.models.alert import Alert
 from app.models.subscription import Subscription
+from app.models.scrape_state import ProductScrapeState
+from app.models.product_cluster import ProductCluster, ProductClusterMember
+from app.models.product_features import ProductMatchFeatures
+from app.models.price_rollup import PriceDailyRollup
 
-__all__ = ["Base", "User", "Product", "PriceHistory", "TrackedProduct", "Alert", "Subscription"]
+__all__ = ["Base", "User", "Product", "PriceHistory", "TrackedProduct", "Alert", "Subscription", "ProductScrapeState",
+           "ProductCluster", "ProductClusterMember", "ProductMatchFeatures",
+           "PriceDailyRollup"]
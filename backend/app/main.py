@@ -9,6 +9,10 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings, ALLOWED_ORIGINS
 from app.monitoring import setup_metrics  # Import metrics setup
+from app.core.http_client import get_http_client, close_http_client
+from app.core.redis import close_redis
+from app.services.scraper.base_scraper import shutdown_browser_pool
+from app.services.embeddings import embeddings
 
 # Import all models to register them with SQLAlchemy
 from app.models import (
@@ -31,11 +35,16 @@ async def lifespan(app: FastAPI):
     print(f"📊 Database: {settings.DATABASE_URL.split('@')[-1]}")  # Hide credentials
     print(f"🔴 Redis: {settings.REDIS_URL}")
     print(f"📈 Prometheus metrics enabled at /metrics")
+    get_http_client()  # Open the shared keep-alive HTTP client
+    embeddings.load()  # Load the persisted title TF-IDF model, if fitted
     
     yield
     
     # Shutdown
     print(f"👋 {settings.APP_NAME} is shutting down...")
+    await shutdown_browser_pool()
+    await close_http_client()
+    await close_redis()
 
 
 # Create FastAPI app
@@ -92,37 +101,3 @@ async def root():
         "health": "/health",
         "metrics": "/metrics"
     }
-    description="Application de suivi de prix intelligent pour le marché béninois",
-    lifespan=lifespan,
-)
-
-# CORS middleware for React frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-# Root endpoint
-@app.get("/")
-async def root():
-    return {
-        "app": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "status": "running",
-        "message": "API de suivi de prix pour le marché béninois 🇧🇯"
-    }
-
-
-# Health check
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
-
-
-# Include API routers
-from app.api.v1.router import api_router
-app.include_router(api_router, prefix="/api/v1")
@@ -0,0 +1,28 @@
+"""
+Daily price rollup model
+"""
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Integer, Float
+from sqlalchemy.sql import func
+
+from app.database.session import Base
+
+
+class PriceDailyRollup(Base):
+    """
+    Open / high / low / close / average of a product's price over one UTC
+    day, maintained incrementally as prices are written so charts, stats and
+    ML training read one row per day instead of every sample
+    """
+    __tablename__ = "price_daily_rollups"
+
+    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    open_price = Column(Float, nullable=False)
+    high_price = Column(Float, nullable=False)
+    low_price = Column(Float, nullable=False)
+    close_price = Column(Float, nullable=False)
+    avg_price = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0, server_default="0")
+    opened_at = Column(DateTime(timezone=True), nullable=False)  # Time of the open sample
+    closed_at = Column(DateTime(timezone=True), nullable=False)  # Time of the close sample
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,37 @@
+"""
+Cross-marketplace product cluster models
+"""
+import uuid
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, JSON
+from sqlalchemy.sql import func
+
+from app.database.session import Base
+
+
+class ProductCluster(Base):
+    """
+    Canonical product: a group of comparable offers across marketplaces,
+    with price stats kept up to date as member prices are written
+    """
+    __tablename__ = "product_clusters"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    canonical_title = Column(String(500), nullable=False)
+    brand = Column(String(100), nullable=True, index=True)
+    attributes = Column(JSON, nullable=True)
+    min_price = Column(Float, nullable=True)  # Best price
+    max_price = Column(Float, nullable=True)
+    offer_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ProductClusterMember(Base):
+    """Membership of a product in its cluster (at most one cluster per product)"""
+    __tablename__ = "product_cluster_members"
+
+    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    cluster_id = Column(String(36), ForeignKey("product_clusters.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, nullable=True)  # Match confidence when assigned incrementally
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
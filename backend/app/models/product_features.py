@@ -0,0 +1,30 @@
+"""
+Precomputed product matching features model
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, JSON, Index
+from sqlalchemy.sql import func
+
+from app.database.session import Base
+
+
+class ProductMatchFeatures(Base):
+    """
+    Matching features parsed from a product title, one row per product,
+    written when the product is scraped so matching and candidate filtering
+    read them instead of re-parsing titles
+    """
+    __tablename__ = "product_match_features"
+    __table_args__ = (
+        Index("ix_product_match_features_brand_capacity", "brand", "capacity_gb"),
+    )
+
+    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    normalized_title = Column(String(500), nullable=False)
+    tokens = Column(JSON, nullable=False)  # Normalized title tokens
+    brand = Column(String(100), nullable=True)
+    capacity_gb = Column(Integer, nullable=True)
+    ram_gb = Column(Integer, nullable=True)
+    screen_inches = Column(Float, nullable=True)
+    color = Column(String(20), nullable=True)
+    category = Column(String(100), nullable=True)  # Normalized category
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,26 @@
+"""
+Per-product scrape state model
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy.sql import func
+
+from app.database.session import Base
+
+
+class ProductScrapeState(Base):
+    """
+    Conditional re-scrape bookkeeping, one row per product:
+    HTTP validators of the last fetched page, a hash of the
+    price-relevant fields extracted from it and the next due time
+    """
+    __tablename__ = "product_scrape_state"
+
+    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)  # Heartbeat: last successful check
+    last_changed_at = Column(DateTime(timezone=True), nullable=True)  # Last time the hash changed
+    next_scrape_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Adaptive scheduler due time
+    consecutive_failures = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
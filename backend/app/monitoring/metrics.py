@@ -23,6 +23,12 @@ products_scraped_total = Counter(
     ['marketplace']
 )
 
+scraping_tier_total = Counter(
+    'scraping_tier_total',
+    'Product scrapes per tier; hit = all required fields extracted',
+    ['marketplace', 'tier', 'outcome']  # tier: http, browser; outcome: hit, miss, not_modified
+)
+
 price_alerts_sent_total = Counter(
     'price_alerts_sent_total',
     'Total number of price alerts sent',
@@ -34,6 +40,23 @@ active_products = Gauge(
     'Total number of active tracked products'
 )
 
+browser_pool_size = Gauge(
+    'scraper_browser_pool_size',
+    'Number of live Chromium browsers in the scraper pool',
+    ['state']  # idle, busy
+)
+
+browser_pool_wait_seconds = Histogram(
+    'scraper_browser_pool_wait_seconds',
+    'Time spent waiting for a browser context from the pool'
+)
+
+browser_pool_recycles_total = Counter(
+    'scraper_browser_pool_recycles_total',
+    'Total number of browsers recycled by the scraper pool',
+    ['reason']  # max_pages, crashed
+)
+
 celery_tasks_total = Counter(
     'celery_tasks_total',
     'Total number of Celery tasks',
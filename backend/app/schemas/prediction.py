@@ -3,7 +3,7 @@ Price and Prediction Pydantic schemas
 """
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 # Price History
@@ -16,6 +16,17 @@ class PriceHistoryResponse(BaseModel):
         from_attributes = True
 
 
+class PriceDailyResponse(BaseModel):
+    """One day of price history (daily rollup)"""
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    average: float
+    count: int
+
+
 class PriceDropItem(BaseModel):
     product_id: str
     name: str
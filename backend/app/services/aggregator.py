@@ -1,14 +1,20 @@
 """
 Aggregator: groups products (existing rows) into cross-source comparable clusters
 using lightweight matching. Additive, no DB schema change.
+
+Candidates are blocked by brand, capacity and title tokens, scored within
+blocks only and merged with union-find, instead of comparing every product
+with every group.
 """
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Iterable, List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
 
-from app.services.matching import score_pair
-from app.services.normalization import normalize_title, guess_brand, extract_attributes
+from app.services.matching import ProductFeatures, product_features, score_features
 
 
 @dataclass
@@ -47,63 +53,122 @@ class AggregatedGroup:
         return max(o.price for o in self.offers if o.price is not None)
 
 
-def group_products(products: Iterable[Any], score_threshold: float = 0.68) -> List[AggregatedGroup]:
+# Up to this many blocked products, all pairs are scored in a single batch
+DENSE_SCORING_LIMIT = 2000
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # keep the earliest product as root (it names the group)
+            if rj < ri:
+                ri, rj = rj, ri
+            self.parent[rj] = ri
+
+
+def _blocks(features: List[ProductFeatures], max_block_size: int) -> List[List[int]]:
+    """
+    Candidate blocks: products sharing brand + capacity, brand alone, or a
+    title token. Only pairs inside a block are scored; blocks larger than
+    max_block_size (common tokens, very frequent brands) are dropped, so
+    rare tokens carry the matching there.
+    """
+    blocks: Dict[Tuple, List[int]] = defaultdict(list)
+    for i, f in enumerate(features):
+        if f.brand:
+            blocks[("brand", f.brand, f.capacity_gb)].append(i)
+            if f.capacity_gb is not None:
+                blocks[("brand", f.brand, None)].append(i)
+        for token in f.tokens:
+            blocks[("token", token)].append(i)
+    return [
+        members for members in blocks.values()
+        if 1 < len(members) <= max_block_size
+    ]
+
+
+def _offer(p: Any, title: str, price: float) -> AggregatedOffer:
+    return AggregatedOffer(
+        product_id=getattr(p, "id", None),
+        title=title,
+        marketplace=str(getattr(p, "marketplace", "unknown")),
+        price=price,
+        currency=getattr(p, "currency", "XOF"),
+        is_available=bool(getattr(p, "is_available", True)),
+        url=getattr(p, "url", ""),
+        image_url=getattr(p, "image_url", None),
+    )
+
+
+def group_products(
+    products: Iterable[Any],
+    score_threshold: float = 0.68,
+    max_block_size: int = 64,
+    features: Optional[List[ProductFeatures]] = None,
+) -> List[AggregatedGroup]:
+    """
+    Cluster products into comparable groups: candidate pairs come from
+    blocks (brand, capacity, title tokens), are scored in batch with the
+    matching engine, and pairs scoring >= score_threshold are merged with
+    union-find. Each group is named after its first product.
+    `features` are the precomputed matching features of the products, in
+    order (e.g. load_match_features); parsed from the titles when omitted.
+    """
+    products = list(products)
+    titles = [getattr(p, "name", None) or getattr(p, "title", "") for p in products]
+    prices = [float(getattr(p, "current_price", 0.0) or 0.0) for p in products]
+    if features is None:
+        features = [
+            product_features(title, price, key=getattr(p, "id", None))
+            for p, title, price in zip(products, titles, prices)
+        ]
+
+    uf = _UnionFind(len(products))
+    blocks = _blocks(features, max_block_size)
+    involved = sorted({i for members in blocks for i in members})
+    dense = len(involved) <= DENSE_SCORING_LIMIT
+    if dense:
+        # Small inputs (e.g. a search page): score all blocked products in
+        # one batch, then read each block's pairs out of it
+        position = {i: k for k, i in enumerate(involved)}
+        subset = [features[i] for i in involved]
+        matched = score_features(subset, subset).confidence >= score_threshold
+
+    for members in blocks:
+        if dense:
+            idx = [position[i] for i in members]
+            block_matched = matched[np.ix_(idx, idx)]
+        else:
+            block = [features[i] for i in members]
+            block_matched = score_features(block, block).confidence >= score_threshold
+        rows, cols = np.nonzero(np.triu(block_matched, k=1))
+        for r, c in zip(rows, cols):
+            uf.union(members[r], members[c])
+
+    by_root: Dict[int, AggregatedGroup] = {}
     groups: List[AggregatedGroup] = []
-
-    for p in products:
-        title = getattr(p, "name", None) or getattr(p, "title", "")
-        price = float(getattr(p, "current_price", 0.0) or 0.0)
-        currency = getattr(p, "currency", "XOF")
-        marketplace = getattr(p, "marketplace", "unknown")
-        url = getattr(p, "url", "")
-        image_url = getattr(p, "image_url", None)
-        pid = getattr(p, "id", None)
-
-        placed = False
-        for g in groups:
-            if not g.offers:
-                continue
-            # compare to the first offer as representative
-            rep = g.offers[0]
-            s, _ = score_pair(title, price, rep.title, rep.price)
-            if s >= score_threshold:
-                g.offers.append(
-                    AggregatedOffer(
-                        product_id=pid,
-                        title=title,
-                        marketplace=str(marketplace),
-                        price=price,
-                        currency=currency,
-                        is_available=bool(getattr(p, "is_available", True)),
-                        url=url,
-                        image_url=image_url,
-                    )
-                )
-                placed = True
-                break
-        if placed:
-            continue
-
-        # new group
-        norm_title = normalize_title(title)
-        group = AggregatedGroup(
-            canonical_title=norm_title,
-            brand=guess_brand(title),
-            attributes=extract_attributes(title),
-            offers=[
-                AggregatedOffer(
-                    product_id=pid,
-                    title=title,
-                    marketplace=str(marketplace),
-                    price=price,
-                    currency=currency,
-                    is_available=bool(getattr(p, "is_available", True)),
-                    url=url,
-                    image_url=image_url,
-                )
-            ],
-        )
-        groups.append(group)
+    for i, (p, title, price) in enumerate(zip(products, titles, prices)):
+        root = uf.find(i)
+        group = by_root.get(root)
+        if group is None:
+            group = AggregatedGroup(
+                canonical_title=features[i].normalized,
+                brand=features[i].brand,
+                attributes=dict(features[i].attributes or {}),
+            )
+            by_root[root] = group
+            groups.append(group)
+        group.offers.append(_offer(p, title, price))
 
     # sort offers in each group by price asc
     for g in groups:
@@ -0,0 +1,220 @@
+"""
+Set-based price alert evaluation
+
+All active alerts are evaluated in a single query joining alerts, products
+and users; the previous price needed by PERCENTAGE_DROP alerts comes from a
+correlated lookup of the product's two latest price rows (on
+idx_price_product_scraped) instead of one query per alert.
+Triggered alerts are then stamped with bulk UPDATEs.
+
+Price writes call evaluate_price_changes, which checks only the alerts of
+the changed products through the Redis threshold index (alert_index); the
+hourly full evaluation stays as a safety net.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert import Alert, AlertType
+from app.models.price import PriceHistory
+from app.models.product import Product
+from app.models.user import User
+from app.services.alert_index import IndexedAlert, load_indexed_alerts
+
+# Alerts stamped per UPDATE ... WHERE id IN (...)
+UPDATE_CHUNK_SIZE = 1000
+
+
+@dataclass
+class TriggeredAlert:
+    alert_id: str
+    alert_type: AlertType
+    threshold_value: float
+    notification_channel: Optional[str]
+    user_id: str
+    user_email: Optional[str]
+    product_id: str
+    product_name: str
+    current_price: Optional[float]
+    previous_price: Optional[float] = None
+
+
+def _previous_price():
+    """
+    Second most recent price of the alert's product, as a correlated
+    subquery: price_history only gets a row when the price changes, so the
+    previous price can be arbitrarily old. Read through
+    idx_price_product_scraped backwards (two index entries per product)
+    instead of a window bounded by age.
+    """
+    return (
+        select(PriceHistory.price)
+        .where(PriceHistory.product_id == Alert.product_id)
+        .order_by(PriceHistory.scraped_at.desc())
+        .limit(1)
+        .offset(1)
+        .correlate(Alert)
+        .scalar_subquery()
+    )
+
+
+def triggered_alerts_query(product_ids: Optional[Iterable[str]] = None):
+    """SELECT of every active alert whose condition currently holds"""
+    ids = list(product_ids) if product_ids is not None else None
+    # Only PERCENTAGE_DROP alerts look up their previous price
+    previous = case(
+        (Alert.alert_type == AlertType.PERCENTAGE_DROP, _previous_price()),
+        else_=None,
+    )
+
+    drop_pct = (previous - Product.current_price) / previous * 100
+    condition = or_(
+        and_(
+            Alert.alert_type == AlertType.TARGET_PRICE,
+            Product.current_price <= Alert.threshold_value,
+        ),
+        and_(
+            Alert.alert_type == AlertType.PERCENTAGE_DROP,
+            previous > 0,
+            drop_pct >= Alert.threshold_value,
+        ),
+        and_(
+            Alert.alert_type == AlertType.AVAILABILITY,
+            Product.is_available == True,
+        ),
+    )
+
+    query = (
+        select(
+            Alert.id,
+            Alert.alert_type,
+            Alert.threshold_value,
+            Alert.notification_channel,
+            User.id,
+            User.email,
+            Product.id,
+            Product.name,
+            Product.current_price,
+            previous,
+        )
+        .join(Product, Product.id == Alert.product_id)
+        .join(User, User.id == Alert.user_id)
+        .where(Alert.is_active == True)
+        .where(condition)
+    )
+    if ids is not None:
+        query = query.where(Alert.product_id.in_(ids))
+    return query
+
+
+async def mark_triggered(db: AsyncSession, alert_ids: List[str], now: datetime) -> None:
+    """Stamp last_triggered_at on the given alerts in chunked bulk UPDATEs (no commit)"""
+    for i in range(0, len(alert_ids), UPDATE_CHUNK_SIZE):
+        await db.execute(
+            update(Alert)
+            .where(Alert.id.in_(alert_ids[i:i + UPDATE_CHUNK_SIZE]))
+            .values(last_triggered_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def evaluate_alerts(
+    db: AsyncSession, product_ids: Optional[Iterable[str]] = None
+) -> List[TriggeredAlert]:
+    """
+    Evaluate active alerts (optionally only those on the given products),
+    stamp the triggered ones and return them (no commit)
+    """
+    ids = list(product_ids) if product_ids is not None else None
+    if ids is not None and not ids:
+        return []
+
+    result = await db.execute(triggered_alerts_query(ids))
+    triggered = [
+        TriggeredAlert(
+            alert_id=row[0],
+            alert_type=row[1],
+            threshold_value=row[2],
+            notification_channel=row[3],
+            user_id=row[4],
+            user_email=row[5],
+            product_id=row[6],
+            product_name=row[7],
+            current_price=row[8],
+            previous_price=row[9],
+        )
+        for row in result.all()
+    ]
+    await mark_triggered(db, [t.alert_id for t in triggered], datetime.utcnow())
+    return triggered
+
+
+def alert_matches(
+    alert_type: AlertType,
+    threshold_value: float,
+    current_price: Optional[float],
+    previous_price: Optional[float],
+    is_available: bool,
+) -> bool:
+    """In-memory counterpart of the condition in triggered_alerts_query"""
+    if alert_type == AlertType.TARGET_PRICE:
+        return current_price is not None and current_price <= threshold_value
+    if alert_type == AlertType.PERCENTAGE_DROP:
+        if current_price is None or not previous_price or previous_price <= 0:
+            return False
+        return (previous_price - current_price) / previous_price * 100 >= threshold_value
+    if alert_type == AlertType.AVAILABILITY:
+        return bool(is_available)
+    return False
+
+
+async def evaluate_price_changes(
+    db: AsyncSession,
+    products: Iterable[Product],
+    previous_prices: Dict[str, Optional[float]],
+) -> List[TriggeredAlert]:
+    """
+    Evaluate only the alerts of products whose price was just written,
+    given each product's price before the write. Uses the Redis index and
+    falls back to SQL when it is unavailable (no commit).
+    """
+    products = list(products)
+    if not products:
+        return []
+
+    index = await load_indexed_alerts(p.id for p in products)
+    if index is None:
+        return await evaluate_alerts(db, [p.id for p in products])
+
+    triggered: List[TriggeredAlert] = []
+    for product in products:
+        previous_price = previous_prices.get(product.id)
+        for alert in index.get(product.id, []):
+            if alert_matches(
+                alert.alert_type, alert.threshold_value,
+                product.current_price, previous_price, product.is_available,
+            ):
+                triggered.append(_from_index(alert, product, previous_price))
+
+    await mark_triggered(db, [t.alert_id for t in triggered], datetime.utcnow())
+    return triggered
+
+
+def _from_index(alert: IndexedAlert, product: Product, previous_price: Optional[float]) -> TriggeredAlert:
+    return TriggeredAlert(
+        alert_id=alert.alert_id,
+        alert_type=alert.alert_type,
+        threshold_value=alert.threshold_value,
+        notification_channel=alert.notification_channel,
+        user_id=alert.user_id,
+        user_email=None,
+        product_id=product.id,
+        product_name=product.name,
+        current_price=product.current_price,
+        previous_price=previous_price,
+    )
@@ -0,0 +1,141 @@
+"""
+Redis threshold index of active alerts, keyed by product
+
+alerts:idx:{product_id} is a hash of alert_id -> JSON (type, threshold,
+user, channel), so a price write can check the alerts of that product
+without touching the database. The alert endpoints keep it in sync and the
+hourly safety-net scan rebuilds it from scratch; the ready marker is only
+set by a full rebuild, and readers fall back to SQL while it is missing.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import get_redis
+from app.models.alert import Alert, AlertType
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "alerts:idx:"
+READY_KEY = "alerts:idx-ready"
+
+# Alerts fetched per round-trip while rebuilding
+REBUILD_CHUNK_SIZE = 5000
+
+
+@dataclass
+class IndexedAlert:
+    alert_id: str
+    alert_type: AlertType
+    threshold_value: float
+    user_id: str
+    notification_channel: Optional[str]
+
+
+def _key(product_id: str) -> str:
+    return f"{KEY_PREFIX}{product_id}"
+
+
+def _encode(alert: Alert) -> str:
+    return json.dumps({
+        "type": AlertType(alert.alert_type).value,
+        "threshold": alert.threshold_value,
+        "user_id": alert.user_id,
+        "channel": alert.notification_channel,
+    })
+
+
+def _decode(alert_id: str, raw: str) -> IndexedAlert:
+    data = json.loads(raw)
+    return IndexedAlert(
+        alert_id=alert_id,
+        alert_type=AlertType(data["type"]),
+        threshold_value=data["threshold"],
+        user_id=data["user_id"],
+        notification_channel=data.get("channel"),
+    )
+
+
+async def index_alert(alert: Alert) -> None:
+    """
+    Add, refresh or drop (if inactive) one alert in the index.
+    Redis errors are logged, not raised: the hourly rebuild reconciles.
+    """
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            if alert.is_active:
+                pipe.hset(_key(alert.product_id), alert.id, _encode(alert))
+            else:
+                pipe.hdel(_key(alert.product_id), alert.id)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not update alert index for {alert.id}: {e}")
+
+
+async def unindex_alert(alert: Alert) -> None:
+    """Remove one alert from the index"""
+    try:
+        await get_redis().hdel(_key(alert.product_id), alert.id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not update alert index for {alert.id}: {e}")
+
+
+async def load_indexed_alerts(
+    product_ids: Iterable[str],
+) -> Optional[Dict[str, List[IndexedAlert]]]:
+    """
+    Indexed alerts of the given products, or None when the index is not
+    usable (never built, or Redis unreachable) and callers must use SQL
+    """
+    ids = list(product_ids)
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.exists(READY_KEY)
+            for product_id in ids:
+                pipe.hgetall(_key(product_id))
+            ready, *hashes = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Alert index unavailable, falling back to SQL: {e}")
+        return None
+    if not ready:
+        return None
+    return {
+        product_id: [_decode(alert_id, raw) for alert_id, raw in entries.items()]
+        for product_id, entries in zip(ids, hashes)
+    }
+
+
+async def rebuild_alert_index(db: AsyncSession) -> int:
+    """
+    Rebuild the whole index from the active alerts and mark it ready.
+    Stale keys are dropped and new ones written in one MULTI/EXEC so that
+    readers never observe a half-built index. Returns the number indexed.
+    """
+    redis = get_redis()
+    stale = [key async for key in redis.scan_iter(match=f"{KEY_PREFIX}*", count=1000)]
+
+    entries: Dict[str, Dict[str, str]] = {}
+    count = 0
+    result = await db.stream(
+        select(Alert).where(Alert.is_active == True).execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+    async for alert in result.scalars():
+        entries.setdefault(_key(alert.product_id), {})[alert.id] = _encode(alert)
+        count += 1
+
+    async with redis.pipeline(transaction=True) as pipe:
+        if stale:
+            pipe.delete(*stale)
+        for key, mapping in entries.items():
+            pipe.hset(key, mapping=mapping)
+        pipe.set(READY_KEY, "1")
+        await pipe.execute()
+    return count
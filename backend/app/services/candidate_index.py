@@ -0,0 +1,165 @@
+"""
+In-process inverted index for match candidate retrieval
+
+Maps normalized title tokens and attributes (brand, storage, RAM) to
+product ids. Candidates for a title are ranked by the summed IDF of the
+terms they share with it, so products sharing rare tokens (model numbers)
+come first instead of an arbitrary LIMIT slice of an ILIKE scan. The
+index is rebuilt from the catalog every CANDIDATE_INDEX_REFRESH_SECONDS
+and products created in this process are added as they come.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.product import Product
+from app.services.normalization import title_features
+
+logger = logging.getLogger(__name__)
+
+# Postings scanned per lookup (rarest terms first), bounds lookup time
+MAX_POSTINGS_SCANNED = 20000
+
+# Products streamed per round-trip while building
+BUILD_CHUNK_SIZE = 5000
+
+
+def title_terms(title: Optional[str]) -> FrozenSet[str]:
+    """Index terms of a title: normalized tokens plus attribute terms"""
+    if not title:
+        return frozenset()
+    parsed = title_features(title)
+    terms: Set[str] = set(parsed.tokens)
+    if parsed.brand:
+        terms.add(f"brand:{parsed.brand}")
+    attributes = parsed.attributes
+    if attributes.get("capacity_gb") is not None:
+        terms.add(f"capacity:{attributes['capacity_gb']}")
+    if attributes.get("ram_gb") is not None:
+        terms.add(f"ram:{attributes['ram_gb']}")
+    return frozenset(terms)
+
+
+class CandidateIndex:
+    """Term -> product ids postings with IDF-ranked lookups"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.doc_terms: Dict[str, FrozenSet[str]] = {}
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, product_id: str, title: Optional[str]) -> None:
+        """Index (or re-index) one product"""
+        self.remove(product_id)
+        terms = title_terms(title)
+        self.doc_terms[product_id] = terms
+        for term in terms:
+            self.postings[term].add(product_id)
+
+    def remove(self, product_id: str) -> None:
+        for term in self.doc_terms.pop(product_id, ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self.postings[term]
+
+    def candidates(
+        self, title: Optional[str], limit: int, exclude: Iterable[str] = ()
+    ) -> List[str]:
+        """
+        Up to `limit` product ids sharing terms with the title, best first
+        (summed IDF of the shared terms)
+        """
+        n_docs = max(len(self.doc_terms), 1)
+        terms = [t for t in title_terms(title) if t in self.postings]
+        # Rarest terms first, so the scan budget goes to the discriminative ones
+        terms.sort(key=lambda t: len(self.postings[t]))
+
+        scores: Dict[str, float] = defaultdict(float)
+        scanned = 0
+        for term in terms:
+            posting = self.postings[term]
+            if scanned and scanned + len(posting) > MAX_POSTINGS_SCANNED:
+                break
+            idf = math.log(1.0 + n_docs / len(posting))
+            for product_id in posting:
+                scores[product_id] += idf
+            scanned += len(posting)
+
+        for product_id in exclude:
+            scores.pop(product_id, None)
+        best: List[Tuple[str, float]] = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [product_id for product_id, _ in best]
+
+
+_index: Optional[CandidateIndex] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def build_candidate_index(db: AsyncSession) -> CandidateIndex:
+    """Build a fresh index over the whole catalog"""
+    index = CandidateIndex()
+    result = await db.stream(
+        select(Product.id, Product.name).execution_options(yield_per=BUILD_CHUNK_SIZE)
+    )
+    async for product_id, name in result:
+        index.add(product_id, name)
+    index.built_at = time.monotonic()
+    return index
+
+
+async def _refresh() -> None:
+    global _index
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            index = await build_candidate_index(db)
+    except Exception as e:
+        logger.error(f"❌ Error building candidate index: {e}")
+        return
+    _index = index
+    logger.info(
+        f"🗂️ Built candidate index: {len(index)} products, {len(index.postings)} terms "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+def _start_refresh() -> asyncio.Task:
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh())
+    return _refresh_task
+
+
+async def get_candidate_index() -> Optional[CandidateIndex]:
+    """
+    The process index. The first call waits for the initial build; later,
+    a stale index keeps serving while a rebuild runs in the background.
+    Returns None if the index could not be built.
+    """
+    if _index is None:
+        await _start_refresh()
+    elif time.monotonic() - _index.built_at >= settings.CANDIDATE_INDEX_REFRESH_SECONDS:
+        _start_refresh()
+    return _index
+
+
+def index_product(product_id: str, title: Optional[str]) -> None:
+    """Add a new or renamed product to the process index, if built"""
+    if _index is not None:
+        _index.add(product_id, title)
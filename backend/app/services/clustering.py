@@ -0,0 +1,250 @@
+"""
+Persistent cross-marketplace product clusters
+
+Products are assigned to a cluster when first seen (best match among the
+clustered products the candidate index returns for their title, through
+the batch matching engine) and the
+cluster price stats are refreshed whenever a member price is written. The
+compare endpoints read clusters instead of re-grouping on every request;
+rebuild_clusters re-clusters the whole catalog from scratch.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.models.product_cluster import ProductCluster, ProductClusterMember
+from app.models.product_features import ProductMatchFeatures
+from app.services.aggregator import AggregatedGroup, AggregatedOffer, group_products
+from app.services.candidate_index import get_candidate_index, index_product
+from app.services.match_features import attribute_filter, features_from_row
+from app.services.matching import ProductFeatures, features_of, score_many
+from app.services.normalization import normalize_title, guess_brand, extract_attributes
+
+# Products fetched as match candidates for a new product
+CANDIDATE_LIMIT = 200
+
+# Rows per INSERT while rebuilding
+INSERT_CHUNK_SIZE = 1000
+
+
+async def _candidate_filter(product: Product, features: ProductFeatures):
+    """
+    Where clause on the match candidates of a product: the products the
+    candidate index ranks best for its title (same brand / compatible
+    capacity when known), or, with the index unavailable, the products
+    whose stored features have that brand and capacity. None when there
+    is nothing to look up.
+    """
+    # Known brand: same brand, compatible capacity (both come from the
+    # title, so near-identical titles share them)
+    attributes = attribute_filter(features.brand, features.capacity_gb)
+    index = await get_candidate_index()
+    if index is None:
+        # Served by ix_product_match_features_brand_capacity
+        return attributes
+    candidate_ids = index.candidates(product.name, CANDIDATE_LIMIT, exclude=[product.id])
+    if not candidate_ids:
+        return None
+    candidates = Product.id.in_(candidate_ids)
+    if attributes is not None:
+        candidates = candidates & or_(attributes, ProductMatchFeatures.product_id.is_(None))
+    return candidates
+
+
+async def _best_cluster(
+    db: AsyncSession, product: Product, score_threshold: float
+) -> tuple[Optional[str], Optional[float]]:
+    features = features_of(product)
+    candidates = await _candidate_filter(product, features)
+    if candidates is None:
+        return None, None
+    result = await db.execute(
+        select(Product, ProductClusterMember.cluster_id, ProductMatchFeatures)
+        .join(ProductClusterMember, ProductClusterMember.product_id == Product.id)
+        .outerjoin(ProductMatchFeatures, ProductMatchFeatures.product_id == Product.id)
+        .where(candidates)
+        .where(Product.id != product.id)
+        .limit(CANDIDATE_LIMIT)
+    )
+    rows = result.all()
+    if not rows:
+        return None, None
+
+    # Stored features: no title parsing for the candidates
+    scores = score_many(features, [
+        features_from_row(candidate, row) if row is not None else features_of(candidate)
+        for candidate, _, row in rows
+    ])
+    best = max(range(len(rows)), key=lambda i: scores[i].confidence)
+    if scores[best].confidence < score_threshold:
+        return None, None
+    return rows[best][1], scores[best].confidence
+
+
+def _new_cluster(title: str) -> ProductCluster:
+    return ProductCluster(
+        id=str(uuid.uuid4()),
+        canonical_title=normalize_title(title)[:500],
+        brand=guess_brand(title),
+        attributes=extract_attributes(title),
+        offer_count=0,
+    )
+
+
+async def assign_products(
+    db: AsyncSession, products: Iterable[Product], score_threshold: float = 0.68
+) -> Dict[str, str]:
+    """
+    Put each product that has no cluster yet into its best-matching cluster,
+    or a new one (no commit). Returns product id -> cluster id for all given
+    products.
+    """
+    products = list(products)
+    if not products:
+        return {}
+    assigned = await cluster_ids_for(db, [p.id for p in products])
+
+    for product in products:
+        if product.id in assigned:
+            continue
+        cluster_id, score = await _best_cluster(db, product, score_threshold)
+        if cluster_id is None:
+            cluster = _new_cluster(product.name or "")
+            db.add(cluster)
+            cluster_id = cluster.id
+        db.add(ProductClusterMember(product_id=product.id, cluster_id=cluster_id, score=score))
+        # Make the membership visible to the next products of this batch
+        await db.flush()
+        index_product(product.id, product.name)
+        assigned[product.id] = cluster_id
+    return assigned
+
+
+async def refresh_cluster_stats(db: AsyncSession, cluster_ids: Iterable[str]) -> None:
+    """Recompute min/max price and offer count of the given clusters (no commit)"""
+    ids = list(set(cluster_ids))
+    if not ids:
+        return
+    priced = case((Product.current_price > 0, Product.current_price))
+    result = await db.execute(
+        select(
+            ProductClusterMember.cluster_id,
+            func.min(priced),
+            func.max(priced),
+            func.count(ProductClusterMember.product_id),
+        )
+        .join(Product, Product.id == ProductClusterMember.product_id)
+        .where(ProductClusterMember.cluster_id.in_(ids))
+        .group_by(ProductClusterMember.cluster_id)
+    )
+    stats = {
+        cluster_id: {"id": cluster_id, "min_price": low, "max_price": high, "offer_count": count}
+        for cluster_id, low, high, count in result.all()
+    }
+    rows = [
+        stats.get(cluster_id, {"id": cluster_id, "min_price": None, "max_price": None, "offer_count": 0})
+        for cluster_id in ids
+    ]
+    await db.execute(update(ProductCluster), rows)
+
+
+async def update_clusters(db: AsyncSession, products: Iterable[Product]) -> None:
+    """
+    Price-write hook: assign unclustered products and refresh the stats of
+    the clusters of all given products (no commit)
+    """
+    assigned = await assign_products(db, products)
+    await refresh_cluster_stats(db, assigned.values())
+
+
+async def load_cluster_groups(db: AsyncSession, cluster_ids: Iterable[str]) -> List[AggregatedGroup]:
+    """
+    Clusters with their member offers, as AggregatedGroups sorted like
+    group_products output (one query through the membership index)
+    """
+    ids = list(dict.fromkeys(cluster_ids))
+    if not ids:
+        return []
+    result = await db.execute(
+        select(ProductCluster, Product)
+        .join(ProductClusterMember, ProductClusterMember.cluster_id == ProductCluster.id)
+        .join(Product, Product.id == ProductClusterMember.product_id)
+        .where(ProductCluster.id.in_(ids))
+    )
+    groups: Dict[str, AggregatedGroup] = {}
+    for cluster, product in result.all():
+        group = groups.get(cluster.id)
+        if group is None:
+            group = AggregatedGroup(
+                canonical_title=cluster.canonical_title,
+                brand=cluster.brand,
+                attributes=cluster.attributes or {},
+            )
+            groups[cluster.id] = group
+        group.offers.append(AggregatedOffer(
+            product_id=product.id,
+            title=product.name,
+            marketplace=str(product.marketplace),
+            price=float(product.current_price or 0.0),
+            currency=product.currency,
+            is_available=bool(product.is_available),
+            url=product.url,
+            image_url=product.image_url,
+        ))
+
+    ordered = [groups[cluster_id] for cluster_id in ids if cluster_id in groups]
+    for g in ordered:
+        g.offers.sort(key=lambda o: (o.price if o.price is not None else 1e18))
+    ordered.sort(key=lambda gr: (gr.best_price if gr.best_price is not None else 1e18, -len(gr.offers)))
+    return ordered
+
+
+async def cluster_ids_for(db: AsyncSession, product_ids: Iterable[str]) -> Dict[str, str]:
+    """product id -> cluster id for the clustered ones among the given products"""
+    ids = list(product_ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(ProductClusterMember.product_id, ProductClusterMember.cluster_id)
+        .where(ProductClusterMember.product_id.in_(ids))
+    )
+    return dict(result.all())
+
+
+async def rebuild_clusters(db: AsyncSession) -> int:
+    """
+    Re-cluster the whole catalog with group_products and replace all
+    clusters (no commit). Returns the number of clusters.
+    """
+    result = await db.execute(select(Product))
+    groups = group_products(result.scalars().all())
+
+    await db.execute(delete(ProductClusterMember))
+    await db.execute(delete(ProductCluster))
+
+    clusters = []
+    members = []
+    for g in groups:
+        cluster_id = str(uuid.uuid4())
+        prices = [o.price for o in g.offers if o.price and o.price > 0]
+        clusters.append({
+            "id": cluster_id,
+            "canonical_title": g.canonical_title[:500],
+            "brand": g.brand,
+            "attributes": g.attributes,
+            "min_price": min(prices) if prices else None,
+            "max_price": max(prices) if prices else None,
+            "offer_count": len(g.offers),
+        })
+        members.extend({"product_id": o.product_id, "cluster_id": cluster_id} for o in g.offers)
+
+    for i in range(0, len(clusters), INSERT_CHUNK_SIZE):
+        await db.execute(insert(ProductCluster), clusters[i:i + INSERT_CHUNK_SIZE])
+    for i in range(0, len(members), INSERT_CHUNK_SIZE):
+        await db.execute(insert(ProductClusterMember), members[i:i + INSERT_CHUNK_SIZE])
+    return len(clusters)
@@ -0,0 +1,179 @@
+"""
+Price history compaction
+
+Raw price_history rows are reduced to change points: a run of identical
+consecutive prices keeps its first row (scraped_at = first seen) with
+last_seen_at extended to the last sample of the run. Beyond the retention
+horizon, days already summarized in price_daily_rollups are thinned to
+their last change point. Products are processed a few at a time and rows
+are deleted by primary key in bounded chunks, committed separately, so
+the table is never locked for long.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, column, delete, select, table, text, update, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.price_rollup import PriceDailyRollup
+
+# Rows per DELETE / UPDATE statement
+WRITE_CHUNK_SIZE = 1000
+
+# Fallback row size estimate (bytes, with indexes) when the database has no statistics
+DEFAULT_ROW_BYTES = 120
+
+# Core view of price_history (last_seen_at, written by compaction, is not on the ORM model)
+price_history_table = table(
+    "price_history",
+    column("id"),
+    column("product_id"),
+    column("price"),
+    column("currency"),
+    column("scraped_at", DateTime(timezone=True)),
+    column("last_seen_at", DateTime(timezone=True)),
+)
+
+
+@dataclass
+class CompactionReport:
+    """What a compaction pass did"""
+    products: int = 0
+    rows_scanned: int = 0
+    rows_removed: int = 0
+    rows_updated: int = 0
+    bytes_reclaimed: int = 0  # Estimated from the average row size
+
+    def add(self, other: "CompactionReport") -> None:
+        self.products += other.products
+        self.rows_scanned += other.rows_scanned
+        self.rows_removed += other.rows_removed
+        self.rows_updated += other.rows_updated
+        self.bytes_reclaimed += other.bytes_reclaimed
+
+
+def _naive(at: datetime) -> datetime:
+    return at.replace(tzinfo=None) if at.tzinfo else at
+
+
+def plan_compaction(
+    rows: Iterable[Tuple[str, float, Optional[str], datetime, Optional[datetime]]],
+    horizon: datetime,
+    rollup_days: Set[date],
+    cutoff: Optional[datetime] = None,
+) -> Tuple[List[str], Dict[str, datetime]]:
+    """
+    Compaction of one product's rows (id, price, currency, scraped_at,
+    last_seen_at), oldest first. Rows scraped at or after cutoff are left
+    untouched. Returns the ids to delete and the new last_seen_at of the
+    kept rows whose run grew.
+    """
+    kept: List[list] = []  # [id, price, currency, scraped_at, last_seen, stored last_seen]
+    deleted: List[str] = []
+    for row_id, price, currency, scraped_at, last_seen_at in rows:
+        scraped_at = _naive(scraped_at)
+        if cutoff is not None and scraped_at >= cutoff:
+            break
+        seen = _naive(last_seen_at) if last_seen_at else scraped_at
+        if kept:
+            last = kept[-1]
+            if last[1] == price and last[2] == currency:
+                # Same price as the previous change point: extend its run
+                last[4] = max(last[4], seen)
+                deleted.append(row_id)
+                continue
+            day = scraped_at.date()
+            if scraped_at < horizon and last[3].date() == day and day in rollup_days:
+                # Old day summarized by a rollup: keep its last change point only
+                deleted.append(last[0])
+                kept.pop()
+                if kept and kept[-1][1] == price and kept[-1][2] == currency:
+                    kept[-1][4] = max(kept[-1][4], seen)
+                    deleted.append(row_id)
+                    continue
+        kept.append([row_id, price, currency, scraped_at, seen, last_seen_at])
+
+    updates = {
+        k[0]: k[4] for k in kept
+        if k[4] != (_naive(k[5]) if k[5] else k[3])
+    }
+    return deleted, updates
+
+
+async def _row_bytes(db: AsyncSession) -> int:
+    """Average on-disk size of a price_history row (MySQL statistics)"""
+    if db.bind.dialect.name != "mysql":
+        return DEFAULT_ROW_BYTES
+    result = await db.execute(text(
+        "SELECT (DATA_LENGTH + INDEX_LENGTH) / NULLIF(TABLE_ROWS, 0) "
+        "FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'price_history'"
+    ))
+    size = result.scalar_one_or_none()
+    return int(size) if size else DEFAULT_ROW_BYTES
+
+
+async def compact_products(
+    db: AsyncSession, product_ids: List[str], now: Optional[datetime] = None
+) -> CompactionReport:
+    """
+    Compact the price history of the given products, committing after
+    each chunk of writes. Rows younger than
+    PRICE_HISTORY_COMPACTION_MIN_AGE_HOURS are left alone.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.PRICE_HISTORY_COMPACTION_MIN_AGE_HOURS)
+    horizon = now - timedelta(days=settings.PRICE_HISTORY_RAW_RETENTION_DAYS)
+    report = CompactionReport(products=len(product_ids))
+    if not product_ids:
+        return report
+
+    ph = price_history_table.c
+    result = await db.execute(
+        select(ph.product_id, ph.id, ph.price, ph.currency, ph.scraped_at, ph.last_seen_at)
+        .where(ph.product_id.in_(product_ids))
+        .where(ph.scraped_at < cutoff)
+        .order_by(ph.product_id, ph.scraped_at, ph.id)
+    )
+    rows_by_product: Dict[str, List[tuple]] = {}
+    for product_id, *row in result.all():
+        rows_by_product.setdefault(product_id, []).append(tuple(row))
+        report.rows_scanned += 1
+
+    rollups = await db.execute(
+        select(PriceDailyRollup.product_id, PriceDailyRollup.day)
+        .where(PriceDailyRollup.product_id.in_(product_ids))
+        .where(PriceDailyRollup.day < horizon.date())
+    )
+    rollup_days: Dict[str, Set[date]] = {}
+    for product_id, day in rollups.all():
+        rollup_days.setdefault(product_id, set()).add(day)
+
+    to_delete: List[str] = []
+    to_update: Dict[str, datetime] = {}
+    for product_id, rows in rows_by_product.items():
+        deleted, updates = plan_compaction(rows, horizon, rollup_days.get(product_id, set()), cutoff)
+        to_delete.extend(deleted)
+        to_update.update(updates)
+
+    updates = [{"row_id": row_id, "seen": seen} for row_id, seen in to_update.items()]
+    for i in range(0, len(updates), WRITE_CHUNK_SIZE):
+        await db.execute(
+            update(price_history_table)
+            .where(ph.id == bindparam("row_id"))
+            .values(last_seen_at=bindparam("seen")),
+            updates[i:i + WRITE_CHUNK_SIZE],
+        )
+        await db.commit()
+    for i in range(0, len(to_delete), WRITE_CHUNK_SIZE):
+        await db.execute(delete(price_history_table).where(ph.id.in_(to_delete[i:i + WRITE_CHUNK_SIZE])))
+        await db.commit()
+
+    report.rows_updated = len(updates)
+    report.rows_removed = len(to_delete)
+    report.bytes_reclaimed = report.rows_removed * await _row_bytes(db)
+    return report
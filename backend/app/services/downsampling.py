@@ -0,0 +1,71 @@
+"""
+Shape-preserving downsampling of price series for charts
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first and last
+points are kept and every bucket in between contributes the point forming
+the largest triangle with the previously kept point and the average of the
+next bucket, so peaks and drops survive. Bucket averages are computed for
+all buckets at once; the per-bucket pass (bounded by the number of output
+points) only does NumPy array operations.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the n_out points LTTB keeps out of (x, y), x sorted
+    ascending. All indices when there are no more than n_out points.
+    """
+    n = len(x)
+    if n <= n_out or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 1)]
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average point of the bucket after each bucket (the last point for the last bucket)
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    avg_x = (cum_x[ends] - cum_x[starts]) / sizes
+    avg_y = (cum_y[ends] - cum_y[starts]) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = starts[b], ends[b]
+        # Twice the triangle areas (previous kept point, candidate, next average)
+        areas = np.abs(
+            (x[a] - next_x[b]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[b] - y[a])
+        )
+        a = lo + int(np.argmax(areas))
+        selected[b + 1] = a
+    return selected
+
+
+def downsample_indices(
+    times: Sequence[datetime], values: Sequence[float], max_points: int
+) -> Sequence[int]:
+    """Indices of the points of a (time, value) series kept by LTTB for max_points"""
+    n = len(times)
+    if n <= max_points:
+        return range(n)
+    x = np.fromiter((t.timestamp() for t in times), dtype=np.float64, count=n)
+    y = np.fromiter(values, dtype=np.float64, count=n)
+    return lttb_indices(x, y, max_points)
@@ -1,25 +1,32 @@
 """
-Optional text embedding service using sentence-transformers.
-If the dependency is not installed, the service gracefully degrades to no-op.
+Text similarity service backed by a TF-IDF model fitted on the product catalog.
+
+The vectorizer is fitted once on all product titles (refresh_embeddings_model
+task), persisted with joblib and loaded at startup; processes pick up a newer
+file on disk by themselves. Title vectors are L2-normalized and cached (by
+product id when given), so a similarity is a sparse dot product.
+Until a model has been fitted, similarity() returns None and callers fall
+back to their non-semantic scoring.
 """
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Optional
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, Iterable, Optional, Tuple
+
+import joblib
+from sklearn.feature_extraction.text import TfidfVectorizer
 
-try:
-    from sentence_transformers import SentenceTransformer
-    import numpy as np
-    _HAS_ST = True
-except Exception:  # ImportError or other runtime failures
-    SentenceTransformer = None  # type: ignore
-    np = None  # type: ignore
-    _HAS_ST = False
+from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+# How often (seconds) to check the model file for a newer version
+RELOAD_CHECK_SECONDS = 60.0
 
 
 class EmbeddingsService:
@@ -27,31 +34,134 @@ class EmbeddingsService:
     Lightweight text similarity using TF-IDF
     (Alternative to sentence-transformers to avoid CUDA dependencies)
     """
-    
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
+
+    def __init__(self, model_path: Optional[str] = None, cache_size: Optional[int] = None):
+        self.model_path = Path(model_path or settings.EMBEDDINGS_MODEL_PATH)
+        self.cache_size = cache_size or settings.EMBEDDINGS_CACHE_SIZE
+        self._lock = threading.Lock()
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._model_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._missing_logged = False
+        # key -> (text, vector); keys are product ids or the text itself
+        self._cache: "OrderedDict[Hashable, Tuple[str, object]]" = OrderedDict()
+
+    @staticmethod
+    def _new_vectorizer() -> TfidfVectorizer:
+        return TfidfVectorizer(
+            max_features=settings.EMBEDDINGS_MAX_FEATURES,
             ngram_range=(1, 2),
             stop_words='english'
         )
-        self._is_fitted = False
-    
-    def similarity(self, text_a: str, text_b: str) -> Optional[float]:
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._vectorizer is not None
+
+    def _swap(self, vectorizer: TfidfVectorizer, mtime: Optional[float]) -> None:
+        with self._lock:
+            self._vectorizer = vectorizer
+            self._model_mtime = mtime
+            self._cache.clear()
+
+    def fit(self, texts: Iterable[str]) -> int:
+        """
+        Fit a new model on the catalog titles, persist it atomically and
+        start using it. Returns the vocabulary size.
+        """
+        vectorizer = self._new_vectorizer()
+        vectorizer.fit(t for t in texts if t)
+
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.model_path.with_suffix(self.model_path.suffix + ".tmp")
+        joblib.dump(vectorizer, tmp_path)
+        os.replace(tmp_path, self.model_path)
+
+        self._swap(vectorizer, self.model_path.stat().st_mtime)
+        return len(vectorizer.vocabulary_)
+
+    def load(self) -> bool:
+        """Load the persisted model if present; returns True when a model is in use"""
+        self._checked_at = time.monotonic()
+        try:
+            mtime = self.model_path.stat().st_mtime
+        except FileNotFoundError:
+            if not self._missing_logged:
+                logger.warning(
+                    f"⚠️ No TF-IDF model at {self.model_path}: title similarity disabled until "
+                    f"refresh_embeddings_model writes it (check EMBEDDINGS_MODEL_PATH is shared)"
+                )
+                self._missing_logged = True
+            return self.is_fitted
+        self._missing_logged = False
+        if mtime == self._model_mtime:
+            return True
+        try:
+            self._swap(joblib.load(self.model_path), mtime)
+            logger.info(f"🧠 Loaded TF-IDF model ({len(self._vectorizer.vocabulary_)} terms)")
+        except Exception as e:
+            logger.error(f"❌ Error loading TF-IDF model from {self.model_path}: {e}")
+        return self.is_fitted
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at >= RELOAD_CHECK_SECONDS:
+            self.load()
+
+    def vector(self, text: str, key: Optional[Hashable] = None):
+        """
+        L2-normalized TF-IDF row vector of a text (1 x n_terms sparse matrix),
+        or None when no model is fitted. Cached under `key` (e.g. a product
+        id), re-computed if the text cached for that key changed.
+        """
+        self._maybe_reload()
+        vectorizer = self._vectorizer
+        if vectorizer is None:
+            return None
+        cache_key = key if key is not None else text
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None and cached[0] == text:
+                self._cache.move_to_end(cache_key)
+                return cached[1]
+
+        vec = vectorizer.transform([text])
+        with self._lock:
+            # Drop the result if the model was swapped meanwhile
+            if vectorizer is self._vectorizer:
+                self._cache[cache_key] = (text, vec)
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return vec
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget the cached vector of a product"""
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def similarity(
+        self,
+        text_a: str,
+        text_b: str,
+        key_a: Optional[Hashable] = None,
+        key_b: Optional[Hashable] = None,
+    ) -> Optional[float]:
         """
         Calculate cosine similarity between two texts using TF-IDF
-        Returns: float between 0 and 1, or None if error
+        Returns: float between 0 and 1, or None if no model is fitted or a
+        text has no known term
         """
         if not text_a or not text_b:
             return None
-        
+
         try:
-            # Fit and transform both texts
-            vectors = self.vectorizer.fit_transform([text_a, text_b])
-            
-            # Calculate cosine similarity
-            similarity_matrix = cosine_similarity(vectors[0:1], vectors[1:2])
-            
-            return float(similarity_matrix[0][0])
+            va = self.vector(text_a, key_a)
+            vb = self.vector(text_b, key_b)
+            if va is None or vb is None or not va.nnz or not vb.nnz:
+                return None
+            # Rows are L2-normalized: the dot product is the cosine
+            return float((va @ vb.T)[0, 0])
         except Exception:
             return None
 
@@ -0,0 +1,261 @@
+"""
+Bulk write path for scraped products
+
+ingest_scraped_products writes a batch of scraper result dicts with a
+fixed number of statements, in the caller's transaction:
+- the matching products are read (and locked) once, by id, by
+  (marketplace, external_id) or by url, for their previous price,
+- all products are upserted with one INSERT ... ON DUPLICATE KEY UPDATE
+  executemany (new rows get their id here; existing rows collide on the
+  primary key or on uq_products_marketplace_external),
+- one price_history row per changed price is inserted with one executemany.
+The returned changes tell the alert / rollup / matching stages which
+products to process. Other databases update and insert separately.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, insert, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.price import PriceHistory, PriceSource
+from app.models.product import Marketplace, Product
+
+# Input rows per existing-product lookup
+LOOKUP_CHUNK_SIZE = 500
+
+# Product columns written on every scrape
+_SCRAPE_COLUMNS = ("current_price", "currency", "is_available", "last_scraped_at")
+
+# Product columns only filled in when still empty
+_DESCRIPTIVE_COLUMNS = ("name", "external_id", "image_url", "description", "category")
+
+
+@dataclass
+class ProductChange:
+    """A product whose price or availability changed with this batch"""
+    product_id: str
+    previous_price: Optional[float]
+    price: Optional[float]
+    price_changed: bool
+    availability_changed: bool
+    created: bool = False
+
+
+@dataclass
+class IngestResult:
+    product_ids: List[Optional[str]] = field(default_factory=list)  # Per input row (None: skipped)
+    changes: List[ProductChange] = field(default_factory=list)
+    prices_written: int = 0
+
+    @property
+    def price_changes(self) -> List[ProductChange]:
+        return [c for c in self.changes if c.price_changed]
+
+
+def _marketplace(value: Any) -> Optional[Marketplace]:
+    if value is None:
+        return None
+    return Marketplace(str(getattr(value, "value", value)).lower())
+
+
+def product_values(data: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Products row of a scraper result (an optional "product_id" targets a
+    known product), or None when it has no price or cannot be identified
+    """
+    price = data.get("price") or data.get("current_price")
+    marketplace = _marketplace(data.get("marketplace"))
+    # Scrapers report a missing identifier as ""
+    external_id = str(data.get("external_id") or "").strip() or None
+    if price is None or marketplace is None:
+        return None
+    if not (data.get("product_id") or external_id or data.get("url")):
+        return None
+    return {
+        "id": data.get("product_id"),
+        "marketplace": marketplace,
+        "url": data.get("url"),
+        "current_price": float(price),
+        "currency": data.get("currency") or "XOF",
+        "is_available": data.get("is_available", True),
+        "last_scraped_at": data.get("scraped_at") or now,
+        "name": data.get("name"),
+        "external_id": external_id,
+        "image_url": data.get("image_url"),
+        "description": data.get("description"),
+        "category": data.get("category"),
+    }
+
+
+async def _load_existing(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Any]:
+    """Current state of the products the rows refer to, locked until commit"""
+    found = []
+    for i in range(0, len(rows), LOOKUP_CHUNK_SIZE):
+        chunk = rows[i:i + LOOKUP_CHUNK_SIZE]
+        ids = [r["id"] for r in chunk if r["id"]]
+        urls = [r["url"] for r in chunk if not r["id"] and not r["external_id"] and r["url"]]
+        external: Dict[Marketplace, List[str]] = {}
+        for r in chunk:
+            if r["external_id"]:
+                external.setdefault(r["marketplace"], []).append(r["external_id"])
+
+        conditions = [Product.id.in_(ids)] if ids else []
+        if urls:
+            conditions.append(Product.url.in_(urls))
+        conditions.extend(
+            and_(Product.marketplace == marketplace, Product.external_id.in_(external_ids))
+            for marketplace, external_ids in external.items()
+        )
+        result = await db.execute(
+            select(
+                Product.id, Product.marketplace, Product.external_id, Product.url,
+                Product.current_price, Product.currency, Product.is_available,
+            )
+            .where(or_(*conditions))
+            .with_for_update()
+        )
+        found.extend(result.all())
+    return found
+
+
+def _claim_external_ids(rows: Iterable[Dict[str, Any]], existing: List[Any]) -> None:
+    """
+    Keep each (marketplace, external_id) on a single product: a row whose
+    identifier already belongs to another product (stored, or earlier in
+    the batch) is written without it, and a product that already has an
+    identifier keeps it. Otherwise the upsert would violate
+    uq_products_marketplace_external and fail the whole batch.
+    """
+    stored = {product.id: product.external_id for product in existing}
+    owners = {
+        (_marketplace(product.marketplace), product.external_id): product.id
+        for product in existing if product.external_id
+    }
+    for row in rows:
+        if stored.get(row["id"]):
+            row["external_id"] = stored[row["id"]]
+        if row["external_id"] is None:
+            continue
+        owner = owners.setdefault((row["marketplace"], row["external_id"]), row["id"])
+        if owner != row["id"]:
+            row["external_id"] = None
+
+
+def _key(row: Dict[str, Any]) -> Tuple:
+    if row["id"]:
+        return ("id", row["id"])
+    if row["external_id"]:
+        return ("external", row["marketplace"], row["external_id"])
+    return ("url", row["url"])
+
+
+async def _upsert_mysql(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    stmt = mysql_insert(Product)
+    assignments = {column: stmt.inserted[column] for column in _SCRAPE_COLUMNS}
+    assignments.update(
+        (column, func.coalesce(Product.__table__.c[column], stmt.inserted[column]))
+        for column in _DESCRIPTIVE_COLUMNS
+    )
+    await db.execute(stmt.on_duplicate_key_update(assignments), rows)
+
+
+async def _upsert_generic(db: AsyncSession, rows: List[Dict[str, Any]], existing_ids: set) -> None:
+    table = Product.__table__
+    updates = [
+        {f"b_{column}": value for column, value in row.items()}
+        for row in rows if row["id"] in existing_ids
+    ]
+    if updates:
+        values = {column: bindparam(f"b_{column}") for column in _SCRAPE_COLUMNS}
+        values.update(
+            (column, func.coalesce(table.c[column], bindparam(f"b_{column}")))
+            for column in _DESCRIPTIVE_COLUMNS
+        )
+        await db.execute(update(table).where(table.c.id == bindparam("b_id")).values(values), updates)
+    created = [row for row in rows if row["id"] not in existing_ids]
+    if created:
+        await db.execute(insert(Product), created)
+
+
+async def ingest_scraped_products(
+    db: AsyncSession, results: Iterable[Dict[str, Any]], now: Optional[datetime] = None
+) -> IngestResult:
+    """
+    Upsert the products of a batch of scraper results and write a price
+    row for each product whose price changed (no commit). The last
+    result wins when a product appears more than once.
+    """
+    now = now or datetime.utcnow()
+    values = [product_values(data, now) for data in results]
+    report = IngestResult()
+    rows = [row for row in values if row is not None]
+    if not rows:
+        report.product_ids = [None] * len(values)
+        return report
+
+    existing = await _load_existing(db, rows)
+    by_key: Dict[Tuple, Any] = {}
+    for product in existing:
+        by_key[("id", product.id)] = product
+        if product.external_id:
+            by_key[("external", _marketplace(product.marketplace), product.external_id)] = product
+        if product.url:
+            by_key[("url", product.url)] = product
+
+    # Resolve every row to a product id, existing or new
+    new_ids: Dict[Tuple, str] = {}
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        key = _key(row)
+        match = by_key.get(key)
+        if match is not None:
+            row["id"] = match.id
+        elif row["id"] is None:
+            row["id"] = new_ids.setdefault(key, str(uuid.uuid4()))
+        by_id[row["id"]] = row
+    report.product_ids = [row["id"] if row is not None else None for row in values]
+    previous = {product.id: product for product in existing}
+
+    rows = list(by_id.values())
+    _claim_external_ids(rows, existing)
+    if db.bind.dialect.name == "mysql":
+        await _upsert_mysql(db, rows)
+    else:
+        await _upsert_generic(db, rows, set(previous))
+
+    prices = []
+    for row in rows:
+        before = previous.get(row["id"])
+        if before is None:
+            change = ProductChange(row["id"], None, row["current_price"], True, True, created=True)
+        else:
+            change = ProductChange(
+                product_id=row["id"],
+                previous_price=before.current_price,
+                price=row["current_price"],
+                price_changed=(before.current_price != row["current_price"]
+                               or (before.currency or "XOF") != row["currency"]),
+                availability_changed=bool(before.is_available) != bool(row["is_available"]),
+            )
+        if not (change.price_changed or change.availability_changed):
+            continue
+        report.changes.append(change)
+        if change.price_changed:
+            prices.append({
+                "product_id": row["id"],
+                "price": row["current_price"],
+                "currency": row["currency"],
+                "source": PriceSource.SCRAPING,
+                "scraped_at": row["last_scraped_at"],
+            })
+
+    if prices:
+        await db.execute(insert(PriceHistory), prices)
+    report.prices_written = len(prices)
+    return report
@@ -0,0 +1,135 @@
+"""
+Precomputed per-product matching features
+
+Titles are parsed once when a product is scraped (upsert_match_features)
+and the result is stored in product_match_features. Matching reads the
+stored features (load_match_features) instead of re-parsing candidate
+titles, and candidate queries filter on brand / capacity in SQL
+(attribute_filter). Products without a stored row yet are parsed on the fly.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.models.product_features import ProductMatchFeatures
+from app.services.matching import ProductFeatures, features_of
+from app.services.normalization import normalize_category, title_features
+
+# Product ids per IN (...) lookup
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def match_feature_row(product: Product) -> Dict[str, Any]:
+    """Column values of the product_match_features row of a product"""
+    parsed = title_features(product.name)
+    attributes = parsed.attributes
+    return {
+        "product_id": product.id,
+        "normalized_title": parsed.normalized[:500],
+        "tokens": sorted(parsed.tokens),
+        "brand": parsed.brand,
+        "capacity_gb": attributes.get("capacity_gb"),
+        "ram_gb": attributes.get("ram_gb"),
+        "screen_inches": attributes.get("screen_inches"),
+        "color": attributes.get("color"),
+        "category": normalize_category(product.category),
+    }
+
+
+def stored_attributes(row: ProductMatchFeatures) -> Dict[str, Any]:
+    """Attributes dict of a stored row, as extract_attributes returns it"""
+    values = {
+        "capacity_gb": row.capacity_gb,
+        "ram_gb": row.ram_gb,
+        "screen_inches": row.screen_inches,
+        "color": row.color,
+    }
+    return {k: v for k, v in values.items() if v is not None}
+
+
+async def _load_rows(db: AsyncSession, product_ids: List[str]) -> Dict[str, ProductMatchFeatures]:
+    rows: Dict[str, ProductMatchFeatures] = {}
+    for i in range(0, len(product_ids), LOOKUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(ProductMatchFeatures)
+            .where(ProductMatchFeatures.product_id.in_(product_ids[i:i + LOOKUP_CHUNK_SIZE]))
+        )
+        rows.update((row.product_id, row) for row in result.scalars().all())
+    return rows
+
+
+async def upsert_match_features(db: AsyncSession, products: Iterable[Product]) -> int:
+    """
+    Parse the titles of the given products and write their features rows
+    (no commit). Unchanged rows are left alone. Returns the number of
+    products whose row was written.
+    """
+    products = list(products)
+    if not products:
+        return 0
+    existing = await _load_rows(db, [p.id for p in products])
+
+    written = 0
+    for product in products:
+        values = match_feature_row(product)
+        row = existing.get(product.id)
+        if row is None:
+            db.add(ProductMatchFeatures(**values))
+            written += 1
+            continue
+        changed = False
+        for column, value in values.items():
+            if getattr(row, column) != value:
+                setattr(row, column, value)
+                changed = True
+        written += changed
+    return written
+
+
+def features_from_row(product: Any, row: ProductMatchFeatures) -> ProductFeatures:
+    """Batch matching features of a product from its stored row"""
+    price = getattr(product, "current_price", None)
+    return ProductFeatures(
+        title=product.name,
+        price=float(price) if price is not None else None,
+        tokens=frozenset(row.tokens or ()),
+        brand=row.brand,
+        capacity_gb=row.capacity_gb,
+        key=product.id,
+        normalized=row.normalized_title,
+        attributes=stored_attributes(row),
+    )
+
+
+async def load_match_features(db: AsyncSession, products: Iterable[Product]) -> List[ProductFeatures]:
+    """
+    Matching features of the given products, in order: stored rows where
+    present, parsed from the title otherwise
+    """
+    products = list(products)
+    rows = await _load_rows(db, [p.id for p in products])
+    return [
+        features_from_row(p, rows[p.id]) if p.id in rows else features_of(p)
+        for p in products
+    ]
+
+
+def attribute_filter(brand: Optional[str], capacity_gb: Optional[int]):
+    """
+    SQL filter on product_match_features for candidates that can match a
+    product of this brand / capacity (same brand, same or unknown
+    capacity), or None when the brand is unknown
+    """
+    if not brand:
+        return None
+    clause = ProductMatchFeatures.brand == brand
+    if capacity_gb is not None:
+        clause = clause & or_(
+            ProductMatchFeatures.capacity_gb == capacity_gb,
+            ProductMatchFeatures.capacity_gb.is_(None),
+        )
+    return clause
@@ -3,14 +3,20 @@ Enhanced product matching with multi-stage algorithm:
 1. Exact identifier matching (SKU, EAN, UPC)
 2. Fuzzy text matching
 3. ML-based semantic matching
+
+score_pair scores a single pair; score_many / score_matrix compute the same
+results for many pairs at once from per-product features extracted once.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from enum import Enum
 
-from .normalization import normalize_title, extract_attributes, guess_brand
+import numpy as np
+from scipy import sparse
+
+from .normalization import title_features
 from .embeddings import embeddings
 
 
@@ -88,11 +94,14 @@ def score_pair(
     sku_a: Optional[str] = None,
     sku_b: Optional[str] = None,
     ean_a: Optional[str] = None,
-    ean_b: Optional[str] = None
+    ean_b: Optional[str] = None,
+    id_a: Optional[str] = None,
+    id_b: Optional[str] = None
 ) -> MatchResult:
     """
     Score a pair of products for matching
     Returns MatchResult with confidence and match type
+    (id_a / id_b, when given, key the cached title vectors)
     """
     
     # Stage 1: Exact identifier matching
@@ -104,27 +113,25 @@ def score_pair(
         )
     
     # Stage 2: Fuzzy text matching
-    tna = normalize_title(title_a)
-    tnb = normalize_title(title_b)
-    tokens_a = set(tna.split())
-    tokens_b = set(tnb.split())
-    title_score = jaccard(tokens_a, tokens_b)
-
-    attrs_a = extract_attributes(title_a)
-    attrs_b = extract_attributes(title_b)
+    features_a = title_features(title_a)
+    features_b = title_features(title_b)
+    title_score = jaccard(features_a.tokens, features_b.tokens)
+
+    attrs_a = features_a.attributes
+    attrs_b = features_b.attributes
     capacity_match = (
         attrs_a.get("capacity_gb") is not None 
         and attrs_a.get("capacity_gb") == attrs_b.get("capacity_gb")
     )
 
-    brand_a = guess_brand(title_a)
-    brand_b = guess_brand(title_b)
+    brand_a = features_a.brand
+    brand_b = features_b.brand
     brand_match = (brand_a is not None and brand_a == brand_b)
 
     price_score = price_affinity(price_a, price_b)
 
     # Stage 3: Semantic matching with embeddings
-    emb_sim = embeddings.similarity(title_a, title_b)
+    emb_sim = embeddings.similarity(title_a, title_b, id_a, id_b)
 
     if emb_sim is not None:
         # Rebalanced weights when embeddings available
@@ -172,3 +179,231 @@ def score_pair(
         brand_match=brand_match,
         capacity_match=capacity_match
     )
+
+
+@dataclass
+class ProductFeatures:
+    """Matching features of one product, extracted once for batch scoring"""
+    title: Optional[str]
+    price: Optional[float]
+    tokens: frozenset
+    brand: Optional[str]
+    capacity_gb: Optional[int]
+    sku: Optional[str] = None
+    ean: Optional[str] = None
+    key: Optional[str] = None  # product id, keys the cached TF-IDF vector
+    normalized: str = ""  # Normalized title
+    attributes: Optional[Dict[str, Any]] = None  # extract_attributes() output, read-only
+
+
+def product_features(
+    title: Optional[str],
+    price: Optional[float] = None,
+    sku: Optional[str] = None,
+    ean: Optional[str] = None,
+    key: Optional[str] = None,
+) -> ProductFeatures:
+    """Extract the features score_pair derives from one side of a pair"""
+    parsed = title_features(title)
+    return ProductFeatures(
+        title=title,
+        price=price,
+        tokens=parsed.tokens,
+        brand=parsed.brand,
+        capacity_gb=parsed.attributes.get("capacity_gb"),
+        sku=sku,
+        ean=ean,
+        key=key,
+        normalized=parsed.normalized,
+        attributes=parsed.attributes,
+    )
+
+
+def features_of(product: Any) -> ProductFeatures:
+    """Features of a product row (or any object with name/title and current_price)"""
+    if isinstance(product, ProductFeatures):
+        return product
+    price = getattr(product, "current_price", None)
+    return product_features(
+        getattr(product, "name", None) or getattr(product, "title", ""),
+        float(price) if price is not None else None,
+        sku=getattr(product, "sku", None),
+        ean=getattr(product, "ean", None),
+        key=getattr(product, "id", None),
+    )
+
+
+def _codes(values_a: Sequence[Any], values_b: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes of two value lists over a shared vocabulary; missing values
+    get -1 on side a and -2 on side b so they never compare equal
+    """
+    vocab: Dict[Any, int] = {}
+    code_a = np.array([-1 if v is None else vocab.setdefault(v, len(vocab)) for v in values_a], dtype=np.int64)
+    code_b = np.array([-2 if v is None else vocab.setdefault(v, len(vocab)) for v in values_b], dtype=np.int64)
+    return code_a, code_b
+
+
+def _identifier_matches(fa: Sequence[ProductFeatures], fb: Sequence[ProductFeatures]) -> np.ndarray:
+    """Vectorized exact_identifier_match on SKU and EAN"""
+    sku_a, sku_b = _codes(
+        [f.sku.strip().lower() if f.sku else None for f in fa],
+        [f.sku.strip().lower() if f.sku else None for f in fb],
+    )
+    ean_a, ean_b = _codes(
+        [f.ean.strip() if f.ean else None for f in fa],
+        [f.ean.strip() if f.ean else None for f in fb],
+    )
+    return (sku_a[:, None] == sku_b[None, :]) | (ean_a[:, None] == ean_b[None, :])
+
+
+def _jaccard_matrix(fa: Sequence[ProductFeatures], fb: Sequence[ProductFeatures]) -> np.ndarray:
+    """Token-set Jaccard of every pair, from sparse incidence matrices"""
+    vocab: Dict[str, int] = {}
+    rows_a = [[vocab.setdefault(t, len(vocab)) for t in f.tokens] for f in fa]
+    rows_b = [[vocab.setdefault(t, len(vocab)) for t in f.tokens] for f in fb]
+
+    def incidence(rows: List[List[int]]) -> sparse.csr_matrix:
+        indptr = np.cumsum([0] + [len(r) for r in rows])
+        indices = [i for r in rows for i in r]
+        data = np.ones(len(indices), dtype=np.int64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), max(len(vocab), 1)))
+
+    ma = incidence(rows_a)
+    mb = incidence(rows_b)
+    inter = (ma @ mb.T).toarray()
+    size_a = np.diff(ma.indptr)
+    size_b = np.diff(mb.indptr)
+    union = size_a[:, None] + size_b[None, :] - inter
+    return np.where(inter > 0, inter / np.maximum(union, 1), 0.0)
+
+
+def _price_matrix(fa: Sequence[ProductFeatures], fb: Sequence[ProductFeatures]) -> np.ndarray:
+    """Vectorized price_affinity"""
+    pa = np.array([f.price if f.price else np.nan for f in fa], dtype=np.float64)[:, None]
+    pb = np.array([f.price if f.price else np.nan for f in fb], dtype=np.float64)[None, :]
+    with np.errstate(invalid="ignore"):
+        valid = (pa > 0) & (pb > 0)
+        ratio = np.abs(pa - pb) / np.maximum(pa, pb)
+        score = np.maximum(0.0, 1.0 - np.minimum(ratio, 1.0))
+    return np.where(valid, score, 0.0)
+
+
+def _embedding_matrix(
+    fa: Sequence[ProductFeatures], fb: Sequence[ProductFeatures]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TF-IDF cosine of every pair and the mask of pairs for which
+    embeddings.similarity would not return None
+    """
+    def stack(features: Sequence[ProductFeatures]):
+        rows = []
+        for f in features:
+            vec = embeddings.vector(f.title, f.key) if f.title else None
+            rows.append(vec if vec is not None and vec.nnz else None)
+        return rows
+
+    rows_a = stack(fa)
+    rows_b = stack(fb)
+    has_a = np.array([r is not None for r in rows_a], dtype=bool)
+    has_b = np.array([r is not None for r in rows_b], dtype=bool)
+    valid = has_a[:, None] & has_b[None, :]
+    if not has_a.any() or not has_b.any():
+        return np.zeros(valid.shape), valid
+
+    width = next(r for r in rows_a if r is not None).shape[1]
+    empty = sparse.csr_matrix((1, width))
+    va = sparse.vstack([r if r is not None else empty for r in rows_a], format="csr")
+    vb = sparse.vstack([r if r is not None else empty for r in rows_b], format="csr")
+    return (va @ vb.T).toarray(), valid
+
+
+@dataclass
+class PairScores:
+    """Scores of every (a, b) pair of two product lists, as (len(a), len(b)) arrays"""
+    confidence: np.ndarray
+    is_match: np.ndarray
+    match_type: np.ndarray  # object array of MatchType
+    title_score: np.ndarray
+    price_score: np.ndarray
+    brand_match: np.ndarray
+    capacity_match: np.ndarray
+    exact: np.ndarray
+
+    def result(self, i: int, j: int) -> MatchResult:
+        """The MatchResult score_pair returns for pair (i, j)"""
+        if self.exact[i, j]:
+            return MatchResult(is_match=True, confidence=1.0, match_type=MatchType.EXACT_IDENTIFIER)
+        return MatchResult(
+            is_match=bool(self.is_match[i, j]),
+            confidence=float(self.confidence[i, j]),
+            match_type=self.match_type[i, j],
+            title_score=float(self.title_score[i, j]),
+            price_score=float(self.price_score[i, j]),
+            brand_match=bool(self.brand_match[i, j]),
+            capacity_match=bool(self.capacity_match[i, j]),
+        )
+
+
+def score_features(fa: Sequence[ProductFeatures], fb: Sequence[ProductFeatures]) -> PairScores:
+    """
+    Score every pair of two feature lists with the same arithmetic, in the
+    same order, as score_pair, so results are identical
+    """
+    exact = _identifier_matches(fa, fb)
+    title_score = _jaccard_matrix(fa, fb)
+
+    cap_a = np.array([np.nan if f.capacity_gb is None else f.capacity_gb for f in fa], dtype=np.float64)
+    cap_b = np.array([np.nan if f.capacity_gb is None else f.capacity_gb for f in fb], dtype=np.float64)
+    capacity_match = cap_a[:, None] == cap_b[None, :]
+
+    brand_a, brand_b = _codes([f.brand for f in fa], [f.brand for f in fb])
+    brand_match = brand_a[:, None] == brand_b[None, :]
+
+    price_score = _price_matrix(fa, fb)
+    emb_sim, has_emb = _embedding_matrix(fa, fb)
+
+    brand_bonus = np.where(brand_match, 0.12, 0.0)
+    capacity_bonus = np.where(capacity_match, 0.08, 0.0)
+    fuzzy = (title_score >= 0.85) & brand_match
+
+    score_emb = 0.40 * title_score + 0.20 * price_score + 0.20 * emb_sim + brand_bonus + capacity_bonus
+    score_plain = 0.55 * title_score + 0.25 * price_score + brand_bonus + capacity_bonus
+    confidence = np.where(has_emb, score_emb, score_plain)
+
+    semantic = has_emb & (score_emb >= 0.80)
+    is_match = semantic | fuzzy
+    match_type = np.empty(confidence.shape, dtype=object)
+    match_type.fill(MatchType.NO_MATCH)
+    match_type[fuzzy] = MatchType.FUZZY_TEXT
+    match_type[semantic] = MatchType.SEMANTIC
+    match_type[exact] = MatchType.EXACT_IDENTIFIER
+
+    return PairScores(
+        confidence=np.where(exact, 1.0, confidence),
+        is_match=is_match | exact,
+        match_type=match_type,
+        title_score=title_score,
+        price_score=price_score,
+        brand_match=brand_match,
+        capacity_match=capacity_match,
+        exact=exact,
+    )
+
+
+ProductLike = Union[ProductFeatures, Any]
+
+
+def score_many(query: ProductLike, candidates: Sequence[ProductLike]) -> List[MatchResult]:
+    """score_pair(query, candidate) for every candidate, in one vectorized pass"""
+    fc = [features_of(c) for c in candidates]
+    if not fc:
+        return []
+    scores = score_features([features_of(query)], fc)
+    return [scores.result(0, j) for j in range(len(fc))]
+
+
+def score_matrix(products: Sequence[ProductLike]) -> PairScores:
+    """All-pairs scores of a product list (entry (i, j) == score_pair(i, j))"""
+    features = [features_of(p) for p in products]
+    return score_features(features, features)
@@ -6,7 +6,8 @@ from __future__ import annotations
 
 import re
 import unicodedata
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
 
 # Common brands (extendable)
 COMMON_BRANDS = [
@@ -17,6 +18,7 @@ COMMON_BRANDS = [
 
 _PROMO_WORDS = {
     "promo", "offre", "réduction", "reduction", "soldes", "deal", "mega", "flash",
+}
 
 # Extended brand mapping for normalization
 BRAND_MAPPINGS = {
@@ -59,6 +61,82 @@ CATEGORY_MAPPINGS = {
 }
 
 
+# Compiled once: these run for every title of every match / grouping
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_SPACES_RE = re.compile(r'\s+')
+_FILLER_WORDS = ['original', 'authentic', 'new', 'brand', 'official', 'genuine']
+_FILLER_RE = re.compile(r'\b(?:' + '|'.join(_FILLER_WORDS) + r')\b')
+
+_TB_RE = re.compile(r'(\d+)\s*tb')  # 1TB, 2 TB
+_GB_RE = re.compile(r'(\d+)\s*gb(?!\s*ram)')  # 128GB, 256 GB (but not "8GB RAM")
+_RAM_RE = re.compile(r'(\d+)\s*gb\s*ram')
+_SCREEN_RE = re.compile(r'(\d+\.?\d*)\s*(?:inch|pouces|")')
+
+# Common colors, earlier ones win when a title has several
+COLORS = ['black', 'white', 'blue', 'red', 'green', 'gold', 'silver', 'gray', 'grey',
+          'pink', 'purple', 'yellow', 'orange', 'noir', 'blanc', 'bleu', 'rouge']
+_COLOR_RANK = {color: rank for rank, color in enumerate(COLORS)}
+_COLOR_RE = re.compile(r'\b(?:' + '|'.join(COLORS) + r')\b')
+
+# Parsed titles kept per process
+TITLE_FEATURES_CACHE_SIZE = 50000
+
+
+class _BrandTrie:
+    """
+    Matcher for the BRAND_MAPPINGS variants. The variants are compiled into
+    one trie-shaped regex scanned once over the title: at each position it
+    matches the longest variant, whose precomputed rank is the best rank of
+    all variants matching there (they are all its prefixes). The smallest
+    rank found is the brand the mapping order would pick.
+    """
+
+    def __init__(self, mappings: Dict[str, List[str]]):
+        self.brands: List[str] = list(mappings)
+        ranks: Dict[str, int] = {}
+        for rank, variants in enumerate(mappings.values()):
+            for variant in variants:
+                ranks.setdefault(variant, rank)
+
+        trie: Dict = {}
+        for variant in ranks:
+            node = trie
+            for char in variant:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self._pattern = re.compile('(?=(' + self._regex(trie) + '))')
+
+        # Longest match -> best rank among the variants it starts with
+        self._match_rank = {
+            variant: min(r for v, r in ranks.items() if variant.startswith(v))
+            for variant in ranks
+        }
+
+    @classmethod
+    def _regex(cls, node: Dict) -> str:
+        branches = [re.escape(char) + cls._regex(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Greedy: longer variants are tried before stopping here
+            return '(?:' + body + ')?'
+        return body
+
+    def find(self, text: str) -> Optional[str]:
+        best: Optional[int] = None
+        for match in self._pattern.finditer(text):
+            rank = self._match_rank[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return self.brands[best] if best is not None else None
+
+
+_BRANDS = _BrandTrie(BRAND_MAPPINGS)
+
+
 def normalize_title(title: str) -> str:
     """Normalize product title for matching"""
     if not title:
@@ -68,15 +146,13 @@ def normalize_title(title: str) -> str:
     normalized = title.lower().strip()
     
     # Remove special characters but keep spaces and alphanumeric
-    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    normalized = _NON_WORD_RE.sub(' ', normalized)
     
     # Remove extra whitespace
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = _SPACES_RE.sub(' ', normalized)
     
     # Remove common filler words
-    filler_words = ['original', 'authentic', 'new', 'brand', 'official', 'genuine']
-    for word in filler_words:
-        normalized = re.sub(rf'\b{word}\b', '', normalized)
+    normalized = _FILLER_RE.sub('', normalized)
     
     return normalized.strip()
 
@@ -86,15 +162,8 @@ def guess_brand(title: str) -> Optional[str]:
     if not title:
         return None
     
-    title_lower = title.lower()
-    
-    # Check against brand mappings
-    for canonical_brand, variants in BRAND_MAPPINGS.items():
-        for variant in variants:
-            if variant in title_lower:
-                return canonical_brand
-    
-    return None
+    # First brand of BRAND_MAPPINGS with a variant in the title
+    return _BRANDS.find(title.lower())
 
 
 def extract_attributes(title: str) -> Dict[str, any]:
@@ -109,42 +178,53 @@ def extract_attributes(title: str) -> Dict[str, any]:
     
     title_lower = title.lower()
     
-    # Extract storage capacity (GB, TB)
-    storage_patterns = [
-        r'(\d+)\s*tb',  # 1TB, 2 TB
-        r'(\d+)\s*gb(?!\s*ram)',  # 128GB, 256 GB (but not "8GB RAM")
-    ]
-    
-    for pattern in storage_patterns:
-        match = re.search(pattern, title_lower)
+    # Extract storage capacity (TB first, then GB)
+    match = _TB_RE.search(title_lower)
+    if match:
+        attributes['capacity_gb'] = int(match.group(1)) * 1024  # Convert TB to GB
+    else:
+        match = _GB_RE.search(title_lower)
         if match:
-            capacity = int(match.group(1))
-            if 'tb' in match.group(0):
-                capacity *= 1024  # Convert TB to GB
-            attributes['capacity_gb'] = capacity
-            break
+            attributes['capacity_gb'] = int(match.group(1))
     
     # Extract RAM
-    ram_match = re.search(r'(\d+)\s*gb\s*ram', title_lower)
+    ram_match = _RAM_RE.search(title_lower)
     if ram_match:
         attributes['ram_gb'] = int(ram_match.group(1))
     
     # Extract screen size
-    screen_match = re.search(r'(\d+\.?\d*)\s*(?:inch|pouces|")', title_lower)
+    screen_match = _SCREEN_RE.search(title_lower)
     if screen_match:
         attributes['screen_inches'] = float(screen_match.group(1))
     
     # Extract color (common colors)
-    colors = ['black', 'white', 'blue', 'red', 'green', 'gold', 'silver', 'gray', 'grey', 
-              'pink', 'purple', 'yellow', 'orange', 'noir', 'blanc', 'bleu', 'rouge']
-    for color in colors:
-        if re.search(rf'\b{color}\b', title_lower):
-            attributes['color'] = color
-            break
+    colors = _COLOR_RE.findall(title_lower)
+    if colors:
+        attributes['color'] = min(colors, key=_COLOR_RANK.__getitem__)
     
     return attributes
 
 
+class TitleFeatures(NamedTuple):
+    """Everything the matching code derives from a title"""
+    normalized: str
+    tokens: frozenset
+    brand: Optional[str]
+    attributes: Dict[str, any]  # shared by all callers: copy before mutating
+
+
+@lru_cache(maxsize=TITLE_FEATURES_CACHE_SIZE)
+def title_features(title: Optional[str]) -> TitleFeatures:
+    """Normalized title, tokens, brand and attributes of a title (LRU cached)"""
+    normalized = normalize_title(title)
+    return TitleFeatures(
+        normalized=normalized,
+        tokens=frozenset(normalized.split()),
+        brand=guess_brand(title),
+        attributes=extract_attributes(title),
+    )
+
+
 def normalize_category(category: Optional[str]) -> Optional[str]:
     """Normalize category to unified taxonomy"""
     if not category:
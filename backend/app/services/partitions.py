@@ -0,0 +1,142 @@
+"""
+Monthly partitions of price_history (MySQL)
+
+price_history is RANGE COLUMNS partitioned on scraped_at, one partition
+per month (p202611 holds November 2026) plus a p_future catch-all.
+Partitions are split off p_future ahead of time (ensure_future_partitions);
+months past the retention period are detached as a whole
+(expire_partitions): exchanged into an archive table, or dropped.
+Both are metadata operations, unlike row deletes.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARTITIONED_TABLE = "price_history"
+FUTURE_PARTITION = "p_future"
+ARCHIVE_TABLE_PREFIX = "price_history_archive_"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month held by a monthly partition, None for p_future"""
+    if len(name) != 7 or not name.startswith("p") or not name[1:].isdigit():
+        return None
+    return date(int(name[1:5]), int(name[5:7]), 1)
+
+
+def partition_definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+
+def future_partition_definition() -> str:
+    return f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)"
+
+
+def is_supported(db: AsyncSession) -> bool:
+    return db.bind.dialect.name == "mysql"
+
+
+async def monthly_partitions(db: AsyncSession) -> List[Tuple[str, date]]:
+    """(name, month) of the monthly partitions of price_history, oldest first"""
+    result = await db.execute(
+        text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": PARTITIONED_TABLE},
+    )
+    partitions = []
+    for (name,) in result.all():
+        month = partition_month(name)
+        if month is not None:
+            partitions.append((name, month))
+    return partitions
+
+
+async def ensure_future_partitions(db: AsyncSession, months_ahead: int, today: date) -> List[str]:
+    """
+    Split the months up to months_ahead after the current one off
+    p_future. Returns the names of the partitions created.
+    """
+    partitions = await monthly_partitions(db)
+    if not partitions:
+        return []
+    last = add_months(month_start(today), months_ahead)
+    months = []
+    month = add_months(partitions[-1][1], 1)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+
+    definitions = [partition_definition(m) for m in months] + [future_partition_definition()]
+    await db.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} "
+        f"INTO ({', '.join(definitions)})"
+    ))
+    return [partition_name(m) for m in months]
+
+
+async def expire_partitions(db: AsyncSession, retention_months: int, archive: bool, today: date) -> List[str]:
+    """
+    Detach the monthly partitions entirely older than retention_months
+    (the current month excluded). With archive, each one is first
+    exchanged into its own price_history_archive_pYYYYMM table. Returns the
+    names of the partitions removed.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(today), -retention_months)
+    expired = [name for name, month in await monthly_partitions(db) if add_months(month, 1) <= cutoff]
+
+    for name in expired:
+        if archive:
+            archive_table = f"{ARCHIVE_TABLE_PREFIX}{name}"
+            if await _table_exists(db, archive_table):
+                # Left by an interrupted run: the partition must already be empty
+                if await _has_rows(db, name):
+                    raise RuntimeError(f"{archive_table} exists and partition {name} is not empty")
+            else:
+                await db.execute(text(f"CREATE TABLE {archive_table} LIKE {PARTITIONED_TABLE}"))
+                await db.execute(text(f"ALTER TABLE {archive_table} REMOVE PARTITIONING"))
+                await db.execute(text(
+                    f"ALTER TABLE {PARTITIONED_TABLE} EXCHANGE PARTITION {name} WITH TABLE {archive_table}"
+                ))
+        await db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DROP PARTITION {name}"))
+    return expired
+
+
+async def _table_exists(db: AsyncSession, table: str) -> bool:
+    result = await db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ),
+        {"table": table},
+    )
+    return bool(result.scalar_one())
+
+
+async def _has_rows(db: AsyncSession, partition: str) -> bool:
+    result = await db.execute(text(f"SELECT 1 FROM {PARTITIONED_TABLE} PARTITION ({partition}) LIMIT 1"))
+    return result.first() is not None
@@ -0,0 +1,174 @@
+"""
+Columnar (Parquet) export of the price history
+
+export_month streams one month of price_history (a single partition on
+MySQL) through a server-side cursor into Parquet files laid out as
+<root>/month=YYYY-MM/marketplace=<name>/data.parquet. The loaders read
+them back memory-mapped, filtered on month / marketplace, so analyses,
+training and backtests get whole-catalog series without querying the
+OLTP database. Requires pyarrow.
+"""
+from __future__ import annotations
+
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.services.compaction import price_history_table
+from app.services.partitions import add_months, month_start
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only the export and the loaders need it
+    pa = None
+
+# Rows per server-side cursor fetch (and per Parquet row group at most)
+EXPORT_FETCH_SIZE = 50000
+
+COLUMNS = ("product_id", "price", "currency", "scraped_at", "last_seen_at")
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet price exports (pip install pyarrow)")
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema([
+        ("product_id", pa.string()),
+        ("price", pa.float64()),
+        ("currency", pa.string()),
+        ("scraped_at", pa.timestamp("us")),
+        ("last_seen_at", pa.timestamp("us")),
+    ])
+
+
+def month_dir(root: Path, month: date) -> Path:
+    return Path(root) / f"month={month:%Y-%m}"
+
+
+async def export_month(db: AsyncSession, root: Path, month: date, compression: str = "zstd") -> Dict[str, int]:
+    """
+    Write one month of price history, one file per marketplace, replacing
+    a previous export of that month. Returns the rows written per
+    marketplace.
+    """
+    _require_pyarrow()
+    month = month_start(month)
+    start = datetime.combine(month, datetime.min.time())
+    end = datetime.combine(add_months(month, 1), datetime.min.time())
+    target = month_dir(root, month)
+    # Leading underscore: ignored by the loaders while being written
+    staging = target.with_name(f"_{target.name}")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    ph = price_history_table.c
+    result = await db.stream(
+        select(ph.product_id, Product.marketplace, ph.price, ph.currency, ph.scraped_at, ph.last_seen_at)
+        .select_from(price_history_table.join(Product, Product.id == ph.product_id))
+        .where(ph.scraped_at >= start)
+        .where(ph.scraped_at < end)
+        .order_by(ph.product_id, ph.scraped_at)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+
+    schema = _schema()
+    writers: Dict[str, "pq.ParquetWriter"] = {}
+    counts: Dict[str, int] = {}
+    try:
+        async for rows in result.partitions():
+            columns_by_market: Dict[str, Dict[str, List]] = {}
+            for product_id, marketplace, price, currency, scraped_at, last_seen_at in rows:
+                market = getattr(marketplace, "value", marketplace) or "unknown"
+                columns = columns_by_market.setdefault(market, {name: [] for name in COLUMNS})
+                columns["product_id"].append(product_id)
+                columns["price"].append(price)
+                columns["currency"].append(currency)
+                columns["scraped_at"].append(scraped_at)
+                columns["last_seen_at"].append(last_seen_at)
+
+            for market, columns in columns_by_market.items():
+                writer = writers.get(market)
+                if writer is None:
+                    path = staging / f"marketplace={market}" / "data.parquet"
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = writers[market] = pq.ParquetWriter(path, schema, compression=compression)
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                counts[market] = counts.get(market, 0) + len(columns["product_id"])
+    finally:
+        for writer in writers.values():
+            writer.close()
+        await result.close()
+
+    shutil.rmtree(target, ignore_errors=True)
+    if counts:
+        staging.rename(target)
+    return counts
+
+
+def _read_table(
+    root: Path,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    marketplaces: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> "pa.Table":
+    _require_pyarrow()
+    if not Path(root).exists():
+        empty = _schema().empty_table()
+        return empty.select(columns) if columns else empty
+    dataset = ds.dataset(
+        str(root),
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("month", pa.string()), ("marketplace", pa.string())]), flavor="hive"),
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    # Month / marketplace filters prune whole files before anything is read
+    condition = None
+    for clause in (
+        ds.field("month") >= f"{since:%Y-%m}" if since else None,
+        ds.field("month") <= f"{until:%Y-%m}" if until else None,
+        ds.field("marketplace").isin(marketplaces) if marketplaces else None,
+    ):
+        if clause is not None:
+            condition = clause if condition is None else condition & clause
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def load_price_history(
+    root: Path,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    marketplaces: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+):
+    """
+    Exported price history as a pandas DataFrame (one row per price
+    change point), for the months from `since` to `until` included
+    """
+    table = _read_table(root, since, until, marketplaces, columns)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_price_arrays(
+    root: Path,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    marketplaces: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Exported price history as one NumPy array per column (strings as
+    object arrays, timestamps as datetime64)
+    """
+    table = _read_table(root, since, until, marketplaces, columns).combine_chunks()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
@@ -0,0 +1,226 @@
+"""
+Daily price rollups
+
+One open / high / low / close / average row per product and UTC day
+(price_daily_rollups). Price writes fold their samples into the day's row
+(record_prices); rebuild_rollups recomputes rows from the raw price
+history (backfill). Charts, stats and ML training read the rollups, so
+their cost grows with the number of days, not of samples.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.price import PriceHistory
+from app.models.price_rollup import PriceDailyRollup
+from app.models.product import Product
+
+# (product id, price, sampled at)
+PriceSample = Tuple[str, float, datetime]
+
+# Products whose price history is read per query while rebuilding
+REBUILD_READ_PRODUCTS = 20
+
+# Rows per INSERT while rebuilding
+INSERT_CHUNK_SIZE = 1000
+
+_ROLLUP_FIELDS = (
+    "open_price", "high_price", "low_price", "close_price", "avg_price",
+    "sample_count", "opened_at", "closed_at",
+)
+
+
+def _new_row(product_id: str, price: float, at: datetime) -> Dict:
+    return {
+        "product_id": product_id,
+        "day": at.date(),
+        "open_price": price,
+        "high_price": price,
+        "low_price": price,
+        "close_price": price,
+        "avg_price": price,
+        "sample_count": 1,
+        "opened_at": at,
+        "closed_at": at,
+    }
+
+
+def _fold(row: Dict, price: float, at: datetime) -> None:
+    """Add one sample to a rollup"""
+    row["avg_price"] = (row["avg_price"] * row["sample_count"] + price) / (row["sample_count"] + 1)
+    row["sample_count"] += 1
+    row["high_price"] = max(row["high_price"], price)
+    row["low_price"] = min(row["low_price"], price)
+    if at < _naive(row["opened_at"]):
+        row["open_price"], row["opened_at"] = price, at
+    if at >= _naive(row["closed_at"]):
+        row["close_price"], row["closed_at"] = price, at
+
+
+def _naive(at: datetime) -> datetime:
+    """Timestamps are stored as UTC; compare them without tzinfo"""
+    return at.replace(tzinfo=None) if at.tzinfo else at
+
+
+async def record_prices(db: AsyncSession, samples: Iterable[PriceSample]) -> None:
+    """Fold freshly written prices into their daily rollups (no commit)"""
+    samples = sorted((s for s in samples if s[1] is not None), key=lambda s: s[2])
+    if not samples:
+        return
+    result = await db.execute(
+        select(PriceDailyRollup)
+        .where(PriceDailyRollup.product_id.in_(list({s[0] for s in samples})))
+        .where(PriceDailyRollup.day.in_(list({_naive(s[2]).date() for s in samples})))
+    )
+    rows: Dict[Tuple[str, date], PriceDailyRollup] = {
+        (row.product_id, row.day): row for row in result.scalars().all()
+    }
+    for product_id, price, at in samples:
+        at = _naive(at)
+        row = rows.get((product_id, at.date()))
+        if row is None:
+            row = PriceDailyRollup(**_new_row(product_id, float(price), at))
+            db.add(row)
+            rows[(product_id, at.date())] = row
+        else:
+            values = {key: getattr(row, key) for key in _ROLLUP_FIELDS}
+            _fold(values, float(price), at)
+            for key, value in values.items():
+                setattr(row, key, value)
+
+
+async def rebuild_rollups(db: AsyncSession, product_ids: List[str]) -> int:
+    """
+    Recompute the rollups of the given products from their raw price
+    history (no commit). Returns the number of rollup rows written.
+    History is read REBUILD_READ_PRODUCTS products at a time with
+    buffered queries: the inserts go through the same connection, which
+    cannot interleave them with an open server-side cursor.
+    """
+    if not product_ids:
+        return 0
+    await db.execute(delete(PriceDailyRollup).where(PriceDailyRollup.product_id.in_(product_ids)))
+
+    written = 0
+    for i in range(0, len(product_ids), REBUILD_READ_PRODUCTS):
+        result = await db.execute(
+            select(PriceHistory.product_id, PriceHistory.price, PriceHistory.scraped_at)
+            .where(PriceHistory.product_id.in_(product_ids[i:i + REBUILD_READ_PRODUCTS]))
+            .where(PriceHistory.price.isnot(None))
+            .order_by(PriceHistory.product_id, PriceHistory.scraped_at)
+        )
+        rows: List[Dict] = []
+        current: Optional[Dict] = None
+        for product_id, price, scraped_at in result.all():
+            at = _naive(scraped_at)
+            if current is None or current["product_id"] != product_id or current["day"] != at.date():
+                current = _new_row(product_id, float(price), at)
+                rows.append(current)
+            else:
+                _fold(current, float(price), at)
+        for j in range(0, len(rows), INSERT_CHUNK_SIZE):
+            await db.execute(insert(PriceDailyRollup), rows[j:j + INSERT_CHUNK_SIZE])
+        written += len(rows)
+    return written
+
+
+def daily_rollups_query(product_id: str, since: Optional[date] = None, until: Optional[date] = None):
+    """SELECT of a product's rollups, oldest day first"""
+    query = select(PriceDailyRollup).where(PriceDailyRollup.product_id == product_id)
+    if since is not None:
+        query = query.where(PriceDailyRollup.day >= since)
+    if until is not None:
+        query = query.where(PriceDailyRollup.day <= until)
+    return query.order_by(PriceDailyRollup.day.asc())
+
+
+def first_rollup_day_query(product_id: str):
+    """SELECT of the oldest day with a price for a product"""
+    return select(func.min(PriceDailyRollup.day)).where(PriceDailyRollup.product_id == product_id)
+
+
+def rollup_day_count_query(product_id: str):
+    """SELECT of the number of days with a price for a product"""
+    return (
+        select(func.count())
+        .select_from(PriceDailyRollup)
+        .where(PriceDailyRollup.product_id == product_id)
+    )
+
+
+def products_with_rollup_days_query(min_days: int):
+    """SELECT of (product id, days with a price) for products with at least min_days"""
+    return (
+        select(PriceDailyRollup.product_id, func.count().label('count'))
+        .group_by(PriceDailyRollup.product_id)
+        .having(func.count() >= min_days)
+    )
+
+
+async def daily_rollups(
+    db: AsyncSession,
+    product_id: str,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> List[PriceDailyRollup]:
+    """Rollups of a product, oldest day first"""
+    result = await db.execute(daily_rollups_query(product_id, since, until))
+    return list(result.scalars().all())
+
+
+async def first_rollup_day(db: AsyncSession, product_id: str) -> Optional[date]:
+    """Oldest day with a price for a product"""
+    result = await db.execute(first_rollup_day_query(product_id))
+    return result.scalar_one_or_none()
+
+
+async def _close_on_or_before(db: AsyncSession, product_id: str, day: date) -> Optional[float]:
+    result = await db.execute(
+        select(PriceDailyRollup.close_price)
+        .where(PriceDailyRollup.product_id == product_id)
+        .where(PriceDailyRollup.day <= day)
+        .order_by(PriceDailyRollup.day.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def _change_pct(current: Optional[float], past: Optional[float]) -> Optional[float]:
+    if current is None or not past:
+        return None
+    return round((current - past) / past * 100, 2)
+
+
+async def rollup_stats(db: AsyncSession, product: Product, today: Optional[date] = None) -> Optional[Dict]:
+    """
+    Lifetime average / low / high and 7 / 30 day price changes of a
+    product from its rollups (PriceHistoryStats fields), or None without
+    any rollup
+    """
+    today = today or datetime.utcnow().date()
+    result = await db.execute(
+        select(
+            func.sum(PriceDailyRollup.avg_price * PriceDailyRollup.sample_count),
+            func.sum(PriceDailyRollup.sample_count),
+            func.min(PriceDailyRollup.low_price),
+            func.max(PriceDailyRollup.high_price),
+        ).where(PriceDailyRollup.product_id == product.id)
+    )
+    total, count, lowest, highest = result.one()
+    if not count:
+        return None
+
+    current = product.current_price
+    return {
+        "current_price": current if current is not None else await _close_on_or_before(db, product.id, today),
+        "average_price": round(total / count, 2),
+        "lowest_price": lowest,
+        "highest_price": highest,
+        "price_change_7d": _change_pct(current, await _close_on_or_before(db, product.id, today - timedelta(days=7))),
+        "price_change_30d": _change_pct(current, await _close_on_or_before(db, product.id, today - timedelta(days=30))),
+        "currency": product.currency or "XOF",
+    }
@@ -0,0 +1,157 @@
+"""
+Adaptive scrape scheduling
+
+Each tracked product gets its own next due time: products whose price moves
+often, that many users track or that carry active alerts are scraped more
+often; stable, unpopular or failing products back off.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.alert import Alert
+from app.models.price import PriceHistory
+from app.models.scrape_state import ProductScrapeState
+from app.models.tracked_product import TrackedProduct
+
+# Cap on the failure backoff exponent (2**5 = 32x the computed interval)
+MAX_FAILURE_BACKOFF = 5
+
+
+def compute_interval(
+    changes_per_day: float,
+    trackers: int,
+    active_alerts: int,
+    failures: int = 0,
+) -> timedelta:
+    """
+    Scrape interval for a product
+
+    The base interval shrinks with the observed change rate and
+    (logarithmically) with demand, is clamped to the configured bounds,
+    then doubles for each consecutive failure.
+    """
+    volatility = 1.0 + 4.0 * changes_per_day
+    demand = 1.0 + math.log1p(max(trackers - 1, 0) + 2 * active_alerts)
+    hours = settings.SCRAPE_BASE_INTERVAL_HOURS / (volatility * demand)
+    hours = min(max(hours, settings.SCRAPE_MIN_INTERVAL_HOURS), settings.SCRAPE_MAX_INTERVAL_HOURS)
+    if failures:
+        hours = min(hours * 2 ** min(failures, MAX_FAILURE_BACKOFF), settings.SCRAPE_MAX_INTERVAL_HOURS)
+    return timedelta(hours=hours)
+
+
+def price_changes_query(product_ids: List[str], since: datetime):
+    """SELECT of (product id, price rows since `since`) for the given products"""
+    return (
+        select(PriceHistory.product_id, func.count(PriceHistory.id))
+        .where(PriceHistory.product_id.in_(product_ids))
+        .where(PriceHistory.scraped_at >= since)
+        .group_by(PriceHistory.product_id)
+    )
+
+
+def trackers_query(product_ids: List[str]):
+    """SELECT of (product id, trackers) for the given products"""
+    return (
+        select(TrackedProduct.product_id, func.count(TrackedProduct.id))
+        .where(TrackedProduct.product_id.in_(product_ids))
+        .group_by(TrackedProduct.product_id)
+    )
+
+
+def active_alerts_query(product_ids: List[str]):
+    """SELECT of (product id, active alerts) for the given products"""
+    return (
+        select(Alert.product_id, func.count(Alert.id))
+        .where(Alert.product_id.in_(product_ids))
+        .where(Alert.is_active == True)
+        .group_by(Alert.product_id)
+    )
+
+
+async def _counts(db: AsyncSession, query) -> Dict[str, int]:
+    result = await db.execute(query)
+    return {product_id: count for product_id, count in result.all()}
+
+
+async def load_priority_stats(
+    db: AsyncSession, product_ids: Iterable[str], now: datetime
+) -> Dict[str, Tuple[float, int, int]]:
+    """
+    (changes per day, trackers, active alerts) per product,
+    from three grouped queries
+    """
+    ids = list(product_ids)
+    if not ids:
+        return {}
+    window_days = settings.SCRAPE_VOLATILITY_WINDOW_DAYS
+    since = now - timedelta(days=window_days)
+
+    changes = await _counts(db, price_changes_query(ids, since))
+    trackers = await _counts(db, trackers_query(ids))
+    alerts = await _counts(db, active_alerts_query(ids))
+    return {
+        pid: (changes.get(pid, 0) / window_days, trackers.get(pid, 0), alerts.get(pid, 0))
+        for pid in ids
+    }
+
+
+async def reschedule(
+    db: AsyncSession, states: Dict[str, ProductScrapeState], now: datetime
+) -> None:
+    """Set next_scrape_at on the given scrape states (no commit)"""
+    stats = await load_priority_stats(db, states.keys(), now)
+    for product_id, state in states.items():
+        changes_per_day, trackers, alerts = stats.get(product_id, (0.0, 0, 0))
+        state.next_scrape_at = now + compute_interval(
+            changes_per_day, trackers, alerts, state.consecutive_failures or 0
+        )
+
+
+def due_products_query(now: datetime, limit: int):
+    """
+    SELECT of the tracked products whose next scrape is due, never-scheduled
+    first, then most overdue
+    """
+    tracked = select(TrackedProduct.product_id).distinct().subquery()
+    return (
+        select(tracked.c.product_id)
+        .outerjoin(ProductScrapeState, ProductScrapeState.product_id == tracked.c.product_id)
+        .where(
+            (ProductScrapeState.next_scrape_at == None)
+            | (ProductScrapeState.next_scrape_at <= now)
+        )
+        .order_by(ProductScrapeState.next_scrape_at.asc())
+        .limit(limit)
+    )
+
+
+async def claim_due_products(db: AsyncSession, now: datetime, limit: int) -> List[str]:
+    """
+    Tracked products whose next scrape is due (never-scheduled first, then
+    most overdue), leased for SCRAPE_DISPATCH_LEASE_MINUTES so the next tick
+    does not dispatch them again while they wait in the queue (no commit)
+    """
+    result = await db.execute(due_products_query(now, limit))
+    product_ids = [row[0] for row in result.all()]
+    if not product_ids:
+        return []
+
+    states = (await db.execute(
+        select(ProductScrapeState).where(ProductScrapeState.product_id.in_(product_ids))
+    )).scalars().all()
+    by_id = {state.product_id: state for state in states}
+    lease_until = now + timedelta(minutes=settings.SCRAPE_DISPATCH_LEASE_MINUTES)
+    for product_id in product_ids:
+        state = by_id.get(product_id)
+        if state is None:
+            state = ProductScrapeState(product_id=product_id, consecutive_failures=0)
+            db.add(state)
+        state.next_scrape_at = lease_until
+    return product_ids
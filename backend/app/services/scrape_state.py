@@ -0,0 +1,46 @@
+"""
+Conditional re-scrape helpers: HTTP validators and content hashing
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.scrape_state import ProductScrapeState
+
+# Fields whose change must produce a new price_history row
+PRICE_FIELDS = ("price", "currency", "is_available")
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """Stable hash of the price-relevant fields of scraped data"""
+    relevant = {field: data.get(field) for field in PRICE_FIELDS}
+    payload = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def validators_for(state: Optional[ProductScrapeState]) -> Optional[Dict[str, str]]:
+    """HTTP validators to send with a conditional request, if any"""
+    if state is None:
+        return None
+    validators = {}
+    if state.etag:
+        validators["etag"] = state.etag
+    if state.last_modified:
+        validators["last_modified"] = state.last_modified
+    return validators or None
+
+
+async def load_states(db: AsyncSession, product_ids: Iterable[str]) -> Dict[str, ProductScrapeState]:
+    """Scrape states of the given products, keyed by product id"""
+    ids = list(product_ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(ProductScrapeState).where(ProductScrapeState.product_id.in_(ids))
+    )
+    return {state.product_id: state for state in result.scalars().all()}
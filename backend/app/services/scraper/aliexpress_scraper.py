@@ -5,10 +5,10 @@ from typing import Optional, Dict, Any, List
 from playwright.async_api import Page
 import logging
 import re
-import json
 import asyncio
 
 from app.services.scraper.base_scraper import BaseScraper
+from app.services.scraper.structured_data import extract_run_params, parse_structured_price
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,7 @@ class AliExpressScraper(BaseScraper):
     """
     
     BASE_URL = "https://www.aliexpress.com"
+    MARKETPLACE = "aliexpress"
     
     @staticmethod
     def is_aliexpress_url(url: str) -> bool:
@@ -60,14 +61,22 @@ class AliExpressScraper(BaseScraper):
         try:
             # Get page content
             content = await page.content()
-            
+            return self._parse_run_params(content, page.url)
+        except Exception as e:
+            logger.warning(f"⚠️ JSON extraction failed: {e}")
+            return None
+    
+    def _parse_run_params(self, content: str, current_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Build product data from window.runParams found in the page HTML
+        (shared by the Playwright and HTTP tiers)
+        """
+        try:
             # Look for window.runParams
-            match = re.search(r'window\.runParams\s*=\s*({.+?});', content, re.DOTALL)
-            if not match:
+            data = extract_run_params(content)
+            if not data:
                 return None
             
-            data = json.loads(match.group(1))
-            
             # Extract product info from JSON structure
             product_data = data.get('data', {})
             
@@ -86,7 +95,7 @@ class AliExpressScraper(BaseScraper):
             else:
                 price_str = '0'
             
-            price = self.clean_price(str(price_str))
+            price = parse_structured_price(price_str)
             
             # Currency
             currency = price_module.get('minActivityAmount', {}).get('currency', 'USD')
@@ -108,7 +117,6 @@ class AliExpressScraper(BaseScraper):
                 category = page_module['categoryPath'][-1].get('name', '')
             
             # External ID from URL
-            current_url = page.url
             external_id = ''
             match = re.search(r'/(\d+)\.html', current_url)
             if match:
@@ -242,12 +250,31 @@ class AliExpressScraper(BaseScraper):
         logger.info(f"✅ Scraped AliExpress product (HTML): {name} - {price} USD")
         return data
     
-    async def scrape_product(self, url: str) -> Optional[Dict[str, Any]]:
+    def parse_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        HTTP tier: window.runParams first, then JSON-LD / meta tags
+        """
+        json_data = self._parse_run_params(html, url)
+        if json_data:
+            return json_data
+        
+        data = super().parse_html(html, url)
+        data["currency"] = data["currency"] or "USD"  # Default for AliExpress
+        external_id = ""
+        match = re.search(r'/(\d+)\.html', url)
+        if match:
+            external_id = match.group(1)
+        data["external_id"] = external_id
+        return data
+    
+    async def scrape_product(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Scrape a single AliExpress product
+        Scrape a single AliExpress product (HTTP tier first, Playwright as fallback)
         """
         logger.info(f"🔍 Scraping AliExpress product: {url}")
-        return await self.safe_scrape(url)
+        return await self.scrape_with_fallback(url, validators)
     
     async def scrape_category(self, category_url: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -18,6 +18,11 @@ class AmazonScraper(BaseScraper):
     """
     
     BASE_URL = "https://www.amazon.com"
+    MARKETPLACE = "amazon"
+    
+    # Approximate rate: 1 USD = 600 XOF
+    # TODO: Use BCEAO API for real-time exchange rate
+    USD_TO_XOF = 600
     
     async def extract_data(self, page: Page) -> Dict[str, Any]:
         """
@@ -55,9 +60,8 @@ class AmazonScraper(BaseScraper):
                 price_str = f"{whole_text}.{fraction_text}".replace(',', '')
                 price_usd = float(price_str) if price_str else 0.0
                 
-                # Convert USD to XOF (approximate rate: 1 USD = 600 XOF)
-                # TODO: Use BCEAO API for real-time exchange rate
-                price = price_usd * 600
+                # Convert USD to XOF
+                price = price_usd * self.USD_TO_XOF
                 
             except:
                 logger.warning("⚠️ Could not extract Amazon price")
@@ -109,13 +113,44 @@ class AmazonScraper(BaseScraper):
             logger.error(f"❌ Failed to extract Amazon data: {e}")
             raise
     
-    async def scrape_product(self, url: str) -> Optional[Dict[str, Any]]:
+    def parse_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        HTTP tier: JSON-LD / meta tags, then #productTitle and the
+        screen-reader price (.a-offscreen). Prices are converted to XOF.
+        """
+        data = super().parse_html(html, url)
+        if not data["name"]:
+            m = re.search(r'id=["\']productTitle["\'][^>]*>(.*?)</span>', html, re.IGNORECASE | re.DOTALL)
+            if m:
+                data["name"] = re.sub('<[^<]+?>', '', m.group(1)).strip()
+        if not data["price"]:
+            m = re.search(r'class=["\']a-offscreen["\'][^>]*>\s*\$?([0-9][0-9,]*\.?[0-9]*)\s*<', html)
+            if m:
+                data["price"] = self.clean_price(m.group(1)) or 0.0
+                data["currency"] = "USD"
+        
+        price_usd = data["price"] if (data["currency"] or "USD") == "USD" else 0.0
+        if price_usd:
+            data["price_original_usd"] = price_usd
+            data["price"] = price_usd * self.USD_TO_XOF
+            data["currency"] = "XOF"
+        
+        external_id = ""
+        match = re.search(r'/dp/([A-Z0-9]{10})', url)
+        if match:
+            external_id = match.group(1)
+        data["external_id"] = external_id
+        return data
+    
+    async def scrape_product(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Scrape a single Amazon product
+        Scrape a single Amazon product (HTTP tier first, Playwright as fallback)
         """
         logger.info(f"🔍 Scraping Amazon product: {url}")
         logger.warning("⚠️ Consider using Amazon Product Advertising API for more reliable data")
-        return await self.safe_scrape(url)
+        return await self.scrape_with_fallback(url, validators)
     
     async def scrape_category(self, category_url: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
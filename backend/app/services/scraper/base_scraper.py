@@ -3,28 +3,269 @@ Base scraper class with common functionality
 """
 import asyncio
 import random
-from typing import Optional, Dict, Any, List
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator
 from abc import ABC, abstractmethod
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+import httpx
 import logging
 import re
 
 from app.core.config import settings
+from app.core.http_client import http_request
+from app.services.scraper.rate_limiter import get_rate_limiter
+from app.services.scraper.structured_data import extract_structured_product, parse_structured_price
+from app.monitoring.metrics import (
+    browser_pool_size,
+    browser_pool_wait_seconds,
+    browser_pool_recycles_total,
+    scraping_tier_total,
+)
 
 logger = logging.getLogger(__name__)
 
+BROWSER_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled'
+]
+
+
+# Headers for the HTTP tier (plain fetch, no browser)
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+    "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+
+async def fetch_page(url: str, headers: Dict[str, str]) -> Optional[httpx.Response]:
+    """GET a page through the shared keep-alive client; None on transport errors"""
+    try:
+        return await http_request("GET", url, headers=headers)
+    except httpx.HTTPError as e:
+        logger.warning(f" HTTP fetch failed for {url}: {e}")
+        return None
+
+
+class _PooledBrowser:
+    """A long-lived Chromium instance tracked by the pool"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0  # contexts currently handed out
+        self.served = 0  # contexts handed out since launch
+        self.crashed = False
+        browser.on("disconnected", self._on_disconnected)
+
+    def _on_disconnected(self, _browser: Browser) -> None:
+        self.crashed = True
+
+    @property
+    def usable(self) -> bool:
+        return not self.crashed and self.browser.is_connected()
+
+
+class PoolLease:
+    """
+    An isolated browser context borrowed from the pool.
+    Must be released exactly once; release() is idempotent.
+    """
+
+    def __init__(self, pool: "BrowserPool", pooled: _PooledBrowser, context: BrowserContext):
+        self.pool = pool
+        self.context = context
+        self._pooled = pooled
+        self._released = False
+
+    async def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        try:
+            await self.context.close()
+        except Exception:
+            # The browser may have crashed underneath the context
+            pass
+        await self.pool._checkin(self._pooled)
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm Chromium browsers.
+
+    Keeps up to `size` browsers alive and hands out isolated contexts
+    (separate cookies/storage) on top of them. A browser is recycled after
+    serving `max_pages` contexts or as soon as it disconnects.
+    Asyncio primitives are bound to the event loop the pool was created on.
+    """
+
+    def __init__(self, size: int, contexts_per_browser: int, max_pages: int):
+        self.size = max(1, size)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_pages = max(1, max_pages)
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.size * self.contexts_per_browser)
+
+    async def _launch(self) -> _PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        try:
+            browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+        except Exception as e:
+            logger.error(f" Failed to initialize browser: {e}")
+            raise
+        logger.info(" Browser initialized successfully")
+        return _PooledBrowser(browser)
+
+    @staticmethod
+    async def _close_browser(pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    def _update_gauges(self) -> None:
+        busy = sum(1 for b in self._browsers if b.active)
+        browser_pool_size.labels(state="busy").set(busy)
+        browser_pool_size.labels(state="idle").set(len(self._browsers) - busy)
+
+    async def _checkout(self) -> _PooledBrowser:
+        async with self._lock:
+            for pooled in list(self._browsers):
+                if not pooled.usable:
+                    self._browsers.remove(pooled)
+                    browser_pool_recycles_total.labels(reason="crashed").inc()
+                    logger.warning(" Pooled browser crashed, replacing it")
+                    await self._close_browser(pooled)
+
+            candidates = [
+                b for b in self._browsers
+                if b.served < self.max_pages and b.active < self.contexts_per_browser
+            ]
+            pooled = min(candidates, key=lambda b: b.active) if candidates else None
+            # Prefer warming another browser over stacking contexts on a busy one
+            if pooled is None or (pooled.active and len(self._browsers) < self.size):
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+
+            pooled.active += 1
+            pooled.served += 1
+            self._update_gauges()
+            return pooled
+
+    async def _checkin(self, pooled: _PooledBrowser) -> None:
+        pooled.active -= 1
+        if pooled in self._browsers and pooled.active == 0:
+            if not pooled.usable:
+                self._browsers.remove(pooled)
+                browser_pool_recycles_total.labels(reason="crashed").inc()
+                await self._close_browser(pooled)
+            elif pooled.served >= self.max_pages:
+                self._browsers.remove(pooled)
+                browser_pool_recycles_total.labels(reason="max_pages").inc()
+                logger.info(f" Recycling browser after {pooled.served} pages")
+                await self._close_browser(pooled)
+        self._update_gauges()
+        self._slots.release()
+
+    async def acquire(self, **context_options) -> PoolLease:
+        """Borrow an isolated context; the caller must release() the lease"""
+        if self.closed:
+            raise RuntimeError("Browser pool is closed")
+        started = time.monotonic()
+        await self._slots.acquire()
+        browser_pool_wait_seconds.observe(time.monotonic() - started)
+        try:
+            pooled = await self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            context = await pooled.browser.new_context(**context_options)
+        except Exception:
+            await self._checkin(pooled)
+            raise
+        return PoolLease(self, pooled, context)
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """Borrow an isolated context for the duration of the block"""
+        lease = await self.acquire(**context_options)
+        try:
+            yield lease.context
+        finally:
+            await lease.release()
+
+    async def close(self) -> None:
+        """Close every browser and stop Playwright"""
+        self.closed = True
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+            for pooled in browsers:
+                await self._close_browser(pooled)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            self._update_gauges()
+        if browsers:
+            logger.info(f" Browser pool closed ({len(browsers)} browsers)")
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return the browser pool of the running event loop, creating it on first use
+    """
+    global _browser_pool
+    loop = asyncio.get_running_loop()
+    if _browser_pool is None or _browser_pool.closed or _browser_pool.loop is not loop:
+        if _browser_pool is not None and not _browser_pool.closed:
+            logger.warning(" Browser pool belongs to another event loop, starting a new one")
+        _browser_pool = BrowserPool(
+            size=settings.SCRAPING_BROWSER_POOL_SIZE,
+            contexts_per_browser=settings.SCRAPING_BROWSER_CONTEXTS_PER_BROWSER,
+            max_pages=settings.SCRAPING_BROWSER_MAX_PAGES,
+        )
+    return _browser_pool
+
+
+async def shutdown_browser_pool() -> None:
+    """Close the process-wide browser pool (FastAPI shutdown / Celery worker exit)"""
+    global _browser_pool
+    pool, _browser_pool = _browser_pool, None
+    if pool is None or pool.closed:
+        return
+    if pool.loop is not asyncio.get_running_loop():
+        logger.warning(" Cannot close browser pool from a different event loop")
+        return
+    await pool.close()
+
 
 class BaseScraper(ABC):
     """
     Abstract base class for scrapers
+    Pages are opened in isolated contexts borrowed from the shared BrowserPool,
+    so entering/exiting the scraper no longer launches or kills Chromium.
+
+    Products are scraped in two tiers: a plain HTTP fetch parsed with
+    parse_html(), then a Playwright page only if required fields are missing.
     """
     
+    MARKETPLACE = "unknown"
+    REQUIRED_FIELDS = ("name", "price")
+    
     def __init__(self):
         self.user_agents = settings.SCRAPING_USER_AGENT_POOL.split(', ')
-        self.rate_limit = settings.SCRAPING_RATE_LIMIT_SECONDS
         self.max_retries = settings.SCRAPING_MAX_RETRIES
-        self.browser: Optional[Browser] = None
-        self.playwright = None
+        self._leases: List[PoolLease] = []
     
     async def __aenter__(self):
         """Context manager entry"""
@@ -36,58 +277,54 @@ class BaseScraper(ABC):
         await self.close_browser()
     
     async def init_browser(self):
-        """Initialize Playwright browser"""
-        try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-blink-features=AutomationControlled'
-                ]
-            )
-            logger.info(" Browser initialized successfully")
-        except Exception as e:
-            logger.error(f" Failed to initialize browser: {e}")
-            raise
+        """Attach to the shared browser pool (browsers are launched lazily)"""
+        get_browser_pool()
     
     async def close_browser(self):
-        """Close browser"""
-        if self.browser:
-            await self.browser.close()
-            logger.info(" Browser closed")
-        if self.playwright:
-            await self.playwright.stop()
+        """Return contexts opened with create_page() to the pool"""
+        leases, self._leases = self._leases, []
+        for lease in leases:
+            await lease.release()
     
-    async def create_page(self) -> Page:
-        """Create a new page with random user agent"""
-        if not self.browser:
-            await self.init_browser()
-        
-        context = await self.browser.new_context(
-            user_agent=random.choice(self.user_agents),
-            viewport={'width': 1920, 'height': 1080}
-        )
-        page = await context.new_page()
-        
+    def _context_options(self) -> Dict[str, Any]:
+        return {
+            "user_agent": random.choice(self.user_agents),
+            "viewport": {'width': 1920, 'height': 1080},
+        }
+    
+    @staticmethod
+    async def _block_resources(page: Page) -> None:
         # Block unnecessary resources to speed up scraping
         await page.route("**/*.{png,jpg,jpeg,gif,svg,mp4,mp3,webp,woff,woff2}", lambda route: route.abort())
-        
+    
+    async def create_page(self) -> Page:
+        """
+        Create a new page with random user agent
+        The underlying context stays leased until close_browser()
+        """
+        lease = await get_browser_pool().acquire(**self._context_options())
+        self._leases.append(lease)
+        page = await lease.context.new_page()
+        await self._block_resources(page)
         return page
     
+    @asynccontextmanager
+    async def pooled_page(self) -> AsyncIterator[Page]:
+        """Open a page in a pooled context that is released on exit"""
+        async with get_browser_pool().context(**self._context_options()) as context:
+            page = await context.new_page()
+            await self._block_resources(page)
+            yield page
+    
     async def safe_scrape(self, url: str, retry_count: int = 0) -> Optional[Dict[str, Any]]:
         """
         Scrape with retry logic and error handling
         """
         try:
-            # Rate limiting
-            await asyncio.sleep(self.rate_limit)
+            # Per-domain rate limiting
+            await get_rate_limiter().acquire(url)
             
-            page = await self.create_page()
-            
-            try:
+            async with self.pooled_page() as page:
                 # Navigate with timeout
                 await page.goto(url, wait_until='domcontentloaded', timeout=30000)
                 
@@ -99,9 +336,6 @@ class BaseScraper(ABC):
                 
                 return data
                 
-            finally:
-                await page.close()
-                
         except Exception as e:
             logger.error(f" Scraping failed for {url}: {e}")
             
@@ -113,6 +347,91 @@ class BaseScraper(ABC):
             
             return None
     
+    def parse_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract product data from raw HTML for the HTTP tier
+        Default: JSON-LD and og/twitter meta tags. Subclasses add site-specific
+        sources and the marketplace fields (external_id, currency...).
+        """
+        found = extract_structured_product(html)
+        price = parse_structured_price(found.get('price'))
+        return {
+            "name": found.get('name'),
+            "price": price or 0.0,
+            "currency": found.get('currency'),
+            "image_url": found.get('image_url'),
+            "category": found.get('category'),
+            "is_available": found.get('is_available', True),
+            "url": url,
+            "marketplace": self.MARKETPLACE,
+        }
+    
+    def has_required_fields(self, data: Optional[Dict[str, Any]]) -> bool:
+        """True when the scraped data is complete enough to skip the browser tier"""
+        if not data:
+            return False
+        for field in self.REQUIRED_FIELDS:
+            value = data.get(field)
+            if not value or (field == "price" and value <= 0):
+                return False
+        return True
+    
+    async def http_scrape(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        HTTP tier: fetch the page without a browser and parse embedded data
+        With validators (etag / last_modified from a previous fetch) the request
+        is conditional; a 304 returns {"not_modified": True} without parsing.
+        The response validators are returned as "etag" / "last_modified".
+        """
+        headers = dict(HTTP_HEADERS)
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        
+        await get_rate_limiter().acquire(url)
+        response = await fetch_page(url, headers)
+        if response is None:
+            return None
+        if response.status_code == 304:
+            return {"url": url, "marketplace": self.MARKETPLACE, "not_modified": True}
+        if response.status_code != 200 or not response.text:
+            return None
+        
+        data = self.parse_html(response.text, url)
+        if data:
+            data["etag"] = response.headers.get("etag")
+            data["last_modified"] = response.headers.get("last-modified")
+        return data
+    
+    async def scrape_with_fallback(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Try the HTTP tier first and escalate to Playwright only when
+        required fields are missing
+        """
+        try:
+            data = await self.http_scrape(url, validators)
+        except Exception as e:
+            logger.warning(f" HTTP tier failed for {url}: {e}")
+            data = None
+        if data and data.get("not_modified"):
+            scraping_tier_total.labels(marketplace=self.MARKETPLACE, tier="http", outcome="not_modified").inc()
+            return data
+        if self.has_required_fields(data):
+            scraping_tier_total.labels(marketplace=self.MARKETPLACE, tier="http", outcome="hit").inc()
+            return data
+        scraping_tier_total.labels(marketplace=self.MARKETPLACE, tier="http", outcome="miss").inc()
+        
+        data = await self.safe_scrape(url)
+        outcome = "hit" if self.has_required_fields(data) else "miss"
+        scraping_tier_total.labels(marketplace=self.MARKETPLACE, tier="browser", outcome=outcome).inc()
+        return data
+    
     @abstractmethod
     async def extract_data(self, page: Page) -> Dict[str, Any]:
         """
@@ -121,9 +440,12 @@ class BaseScraper(ABC):
         pass
     
     @abstractmethod
-    async def scrape_product(self, url: str) -> Optional[Dict[str, Any]]:
+    async def scrape_product(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Scrape a single product (to be implemented by subclasses)
+        validators: HTTP validators of the previous fetch for a conditional request
         """
         pass
     
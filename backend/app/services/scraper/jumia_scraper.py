@@ -5,8 +5,6 @@ from typing import Optional, Dict, Any, List
 from playwright.async_api import Page
 import logging
 import re
-import asyncio
-import json
 
 from app.services.scraper.base_scraper import BaseScraper
 
@@ -18,6 +16,8 @@ class JumiaScraper(BaseScraper):
     Scraper for Jumia (supports all Jumia domains: jumia.ci, jumia.ma, jumia.com.bj, etc.)
     """
     
+    MARKETPLACE = "jumia"
+    
     # Support multiple Jumia regional domains
     SUPPORTED_DOMAINS = ['jumia.', 'www.jumia.']
     
@@ -178,12 +178,35 @@ class JumiaScraper(BaseScraper):
             logger.error(f"❌ Failed to extract Jumia data: {e}")
             raise
     
-    async def scrape_product(self, url: str) -> Optional[Dict[str, Any]]:
+    def parse_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
         """
-        Scrape a single Jumia product
+        HTTP tier: JSON-LD / og tags, with the .prc price block as fallback
+        """
+        data = super().parse_html(html, url)
+        if not data["price"]:
+            m = re.search(r'class=["\']prc[^"\']*["\'][^>]*>([^<]+)<', html, re.IGNORECASE)
+            if m:
+                data["price"] = self.clean_price(m.group(1)) or 0.0
+        
+        # Domain-based currency fallback
+        url_l = url.lower()
+        data["currency"] = data["currency"] or ("MAD" if "jumia.ma" in url_l else "XOF")
+        
+        external_id = ""
+        match = re.search(r'/([a-z0-9-]+)\.html', url_l)
+        if match:
+            external_id = match.group(1)
+        data["external_id"] = external_id
+        return data
+    
+    async def scrape_product(
+        self, url: str, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Scrape a single Jumia product (HTTP tier first, Playwright as fallback)
         """
         logger.info(f" Scraping Jumia product: {url}")
-        return await self.safe_scrape(url)
+        return await self.scrape_with_fallback(url, validators)
     
     async def scrape_category(self, category_url: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -233,122 +256,13 @@ class JumiaScraper(BaseScraper):
 # -----------------------------
 # Lightweight HTTP fallback (no Playwright)
 # -----------------------------
-async def _fetch_html(url: str, headers: Dict[str, str]) -> Optional[str]:
-    try:
-        import httpx  # type: ignore
-        async with httpx.AsyncClient(follow_redirects=True, timeout=20.0, headers=headers) as client:
-            r = await client.get(url)
-            if r.status_code == 200:
-                return r.text
-            return None
-    except Exception:
-        try:
-            import requests  # type: ignore
-            def _get():
-                resp = requests.get(url, headers=headers, timeout=20)
-                return resp.text if resp.status_code == 200 else None
-            return await asyncio.to_thread(_get)
-        except Exception:
-            try:
-                from urllib.request import Request, urlopen
-                def _uget():
-                    req = Request(url, headers=headers)
-                    with urlopen(req, timeout=20) as resp:  # nosec - controlled URL from user input validated elsewhere
-                        return resp.read().decode('utf-8', errors='ignore')
-                return await asyncio.to_thread(_uget)
-            except Exception:
-                return None
-
-
-def _extract_meta(content: str, name: str) -> Optional[str]:
-    # property or name attribute
-    m = re.search(rf'<meta[^>]+(?:property|name)=["\']{name}["\'][^>]+content=["\'"]([^"\']+)["\'][^>]*>', content, re.IGNORECASE)
-    return m.group(1).strip() if m else None
-
-
-def _extract_price_from_jsonld(content: str) -> tuple[Optional[str], Optional[str]]:
-    # Find JSON-LD blocks
-    for script in re.findall(r'<script[^>]+type=["\'"]application/ld\+json["\'][^>]*>(.*?)</script>', content, re.IGNORECASE | re.DOTALL):
-        try:
-            data = json.loads(script)
-            # data may be list or dict
-            candidates = data if isinstance(data, list) else [data]
-            for d in candidates:
-                offers = d.get('offers') if isinstance(d, dict) else None
-                if isinstance(offers, list):
-                    for o in offers:
-                        price = o.get('price')
-                        curr = o.get('priceCurrency')
-                        if price:
-                            return str(price), str(curr) if curr else None
-                elif isinstance(offers, dict):
-                    price = offers.get('price')
-                    curr = offers.get('priceCurrency')
-                    if price:
-                        return str(price), str(curr) if curr else None
-        except Exception:
-            continue
-    return None, None
-
-
 async def simple_scrape_jumia(url: str) -> Optional[Dict[str, Any]]:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
-    }
-    html = await _fetch_html(url, headers)
-    if not html:
-        return None
-
-    # Name via og:title or h1
-    name = _extract_meta(html, 'og:title') or _extract_meta(html, 'twitter:title')
-    if not name:
-        m = re.search(r'<h1[^>]*>(.*?)</h1>', html, re.IGNORECASE | re.DOTALL)
-        if m:
-            name = re.sub('<[^<]+?>', '', m.group(1)).strip()
-
-    # Image via og:image
-    image_url = _extract_meta(html, 'og:image')
-
-    # Price and currency via JSON-LD
-    price_str, curr = _extract_price_from_jsonld(html)
-    # Fallback: look for class="prc">...<
-    if not price_str:
-        m = re.search(r'class=["\'"]prc[^"\']*["\'][^>]*>([^<]+)<', html, re.IGNORECASE)
-        if m:
-            price_str = m.group(1)
-
-    # Domain-based currency fallback
-    url_l = url.lower()
-    currency = curr or ("MAD" if "jumia.ma" in url_l else "XOF")
-
-    # Clean price
-    from app.services.scraper.base_scraper import BaseScraper
-    # create a tiny helper subclass to access method
-    class _Tmp(BaseScraper):
-        async def extract_data(self, page): ...
-        async def scrape_product(self, url): ...
-        async def scrape_category(self, category_url: str, limit: int = 50): ...
-    parser = _Tmp()
-    price = parser.clean_price(price_str) if price_str else None
-
-    # External ID
-    external_id = ""
-    mm = re.search(r'/([a-z0-9-]+)\.html', url_l)
-    if mm:
-        external_id = mm.group(1)
-
-    if not price:
+    """
+    Scrape a Jumia product with the HTTP tier only
+    Returns None when no price could be found
+    """
+    data = await JumiaScraper().http_scrape(url)
+    if not data or not data.get("price"):
         return None
-
-    return {
-        "name": name or "Product",
-        "price": float(price),
-        "currency": currency,
-        "image_url": image_url,
-        "category": None,
-        "is_available": True,
-        "url": url,
-        "external_id": external_id,
-        "marketplace": "jumia",
-    }
+    data["name"] = data.get("name") or "Product"
+    return data
@@ -0,0 +1,147 @@
+"""
+Per-domain rate limiting for scrapers
+
+Token bucket implemented as GCRA (generic cell rate algorithm): each domain
+stores a single "theoretical arrival time", so a reservation is one atomic
+read-modify-write. Reservations are made without awaiting, which makes the
+in-memory backend safe across coroutines of one worker; the Redis backend
+runs the same algorithm in a Lua script to share the budget across workers.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local wait = tat - tolerance - now
+if wait < 0 then wait = 0 end
+redis.call('SET', KEYS[1], tat + interval, 'PX', tat + interval - now + 1000)
+return wait
+"""
+
+
+def parse_domain_intervals(raw: str) -> Dict[str, float]:
+    """
+    Parse "jumia.com.bj=3,amazon.com=5" into {domain: seconds between requests}
+    """
+    intervals: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        domain, seconds = item.split("=", 1)
+        try:
+            intervals[domain.strip().lower()] = float(seconds)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring invalid rate limit entry: {item!r}")
+    return intervals
+
+
+class DomainRateLimiter:
+    """
+    Politeness budget per marketplace host
+
+    - intervals: minimum seconds between requests, keyed by registered domain
+      (a key also covers its subdomains, e.g. "amazon.com" -> "www.amazon.com")
+    - default_interval: used for hosts without a configured entry
+    - burst: requests allowed back-to-back before spacing kicks in
+    - backend: "memory" (per worker) or "redis" (shared across workers)
+    """
+
+    def __init__(
+        self,
+        intervals: Dict[str, float],
+        default_interval: float,
+        burst: int = 1,
+        backend: str = "memory",
+    ):
+        self.intervals = intervals
+        self.default_interval = default_interval
+        self.burst = max(1, burst)
+        self.backend = backend
+        self._tat: Dict[str, float] = {}
+        self._script = None
+
+    def domain_for(self, url: str) -> str:
+        """Rate limit key for a URL: the longest configured domain matching its host"""
+        host = (urlparse(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        best = None
+        for domain in self.intervals:
+            if host == domain or host.endswith("." + domain):
+                if best is None or len(domain) > len(best):
+                    best = domain
+        return best or host
+
+    def _params(self, domain: str) -> Tuple[float, float]:
+        interval = self.intervals.get(domain, self.default_interval)
+        return interval, interval * (self.burst - 1)
+
+    def _reserve_local(self, domain: str, interval: float, tolerance: float) -> float:
+        now = time.monotonic()
+        tat = max(self._tat.get(domain, now), now)
+        self._tat[domain] = tat + interval
+        return max(0.0, tat - tolerance - now)
+
+    async def _reserve_redis(self, domain: str, interval: float, tolerance: float) -> float:
+        from app.core.redis import get_redis
+
+        client = get_redis()
+        if self._script is None:
+            self._script = client.register_script(_GCRA_SCRIPT)
+        wait_ms = await self._script(
+            keys=[f"ratelimit:scraping:{domain}"],
+            args=[int(interval * 1000), int(tolerance * 1000)],
+            client=client,
+        )
+        return int(wait_ms) / 1000.0
+
+    async def acquire(self, url: str) -> float:
+        """
+        Wait until the URL's domain has budget for one more request
+        Returns the number of seconds waited
+        """
+        domain = self.domain_for(url)
+        interval, tolerance = self._params(domain)
+        if interval <= 0:
+            return 0.0
+
+        wait: Optional[float] = None
+        if self.backend == "redis":
+            try:
+                wait = await self._reserve_redis(domain, interval, tolerance)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis rate limiter unavailable, using local budget: {e}")
+        if wait is None:
+            wait = self._reserve_local(domain, interval, tolerance)
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_rate_limiter: Optional[DomainRateLimiter] = None
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Return the process-wide scraping rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = DomainRateLimiter(
+            intervals=parse_domain_intervals(settings.SCRAPING_DOMAIN_RATE_LIMITS),
+            default_interval=settings.SCRAPING_RATE_LIMIT_SECONDS,
+            burst=settings.SCRAPING_RATE_LIMIT_BURST,
+            backend=settings.SCRAPING_RATE_LIMIT_BACKEND,
+        )
+    return _rate_limiter
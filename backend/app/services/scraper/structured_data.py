@@ -0,0 +1,173 @@
+"""
+Parsers for structured product data embedded in raw HTML
+(JSON-LD, Open Graph / Twitter meta tags, AliExpress window.runParams)
+
+Used by the HTTP tier of the scrapers, which tries to get a product from a
+plain HTTP response before falling back to a Playwright page.
+"""
+from typing import Optional, Dict, Any, List
+import json
+import re
+
+_META_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+_JSONLD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+_RUN_PARAMS_RE = re.compile(r'window\.runParams\s*=\s*({.+?});', re.DOTALL)
+_H1_RE = re.compile(r'<h1[^>]*>(.*?)</h1>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^<]+?>')
+
+
+def extract_meta(content: str, name: str) -> Optional[str]:
+    """Content of a <meta property|name="..."> tag"""
+    pattern = _META_PATTERNS.get(name)
+    if pattern is None:
+        pattern = re.compile(
+            rf'<meta[^>]+(?:property|name)=["\']{re.escape(name)}["\'][^>]+content=["\']([^"\']+)["\'][^>]*>',
+            re.IGNORECASE,
+        )
+        _META_PATTERNS[name] = pattern
+    m = pattern.search(content)
+    return m.group(1).strip() if m else None
+
+
+def extract_h1(content: str) -> Optional[str]:
+    """Text of the first <h1>"""
+    m = _H1_RE.search(content)
+    if not m:
+        return None
+    text = _TAG_RE.sub('', m.group(1)).strip()
+    return text or None
+
+
+def _jsonld_nodes(content: str) -> List[Dict[str, Any]]:
+    nodes: List[Dict[str, Any]] = []
+    for script in _JSONLD_RE.findall(content):
+        try:
+            data = json.loads(script)
+        except Exception:
+            continue
+        candidates = data if isinstance(data, list) else [data]
+        for d in candidates:
+            if not isinstance(d, dict):
+                continue
+            graph = d.get('@graph')
+            if isinstance(graph, list):
+                nodes.extend(n for n in graph if isinstance(n, dict))
+            nodes.append(d)
+    return nodes
+
+
+def _is_product(node: Dict[str, Any]) -> bool:
+    node_type = node.get('@type')
+    types = node_type if isinstance(node_type, list) else [node_type]
+    return 'Product' in types or 'offers' in node
+
+
+def _first_offer(offers: Any) -> Optional[Dict[str, Any]]:
+    candidates = offers if isinstance(offers, list) else [offers]
+    for o in candidates:
+        if isinstance(o, dict) and (o.get('price') or o.get('lowPrice')):
+            return o
+    return None
+
+
+def _image_url(image: Any) -> Optional[str]:
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get('url')
+    return str(image) if image else None
+
+
+def parse_structured_price(value: Any) -> Optional[float]:
+    """
+    Price of a JSON-LD offer or price:amount meta tag. schema.org prices
+    always use a dot decimal separator ("1299.00"), unlike display text,
+    so they are read as plain numbers instead of through clean_price().
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def extract_price_from_jsonld(content: str) -> tuple[Optional[str], Optional[str]]:
+    """(price, currency) of the first JSON-LD offer carrying a price"""
+    for node in _jsonld_nodes(content):
+        offer = _first_offer(node.get('offers'))
+        if offer:
+            price = offer.get('price') or offer.get('lowPrice')
+            curr = offer.get('priceCurrency')
+            return str(price), str(curr) if curr else None
+    return None, None
+
+
+def extract_jsonld_product(content: str) -> Dict[str, Any]:
+    """
+    Product fields from the first JSON-LD Product node
+    Keys: name, price (raw string), currency, image_url, category, is_available
+    Missing fields are omitted.
+    """
+    for node in _jsonld_nodes(content):
+        if not _is_product(node):
+            continue
+        data: Dict[str, Any] = {}
+        if node.get('name'):
+            data['name'] = str(node['name']).strip()
+        offer = _first_offer(node.get('offers'))
+        if offer:
+            data['price'] = str(offer.get('price') or offer.get('lowPrice'))
+            if offer.get('priceCurrency'):
+                data['currency'] = str(offer['priceCurrency'])
+            availability = str(offer.get('availability') or '')
+            if availability:
+                data['is_available'] = not re.search(r'(OutOfStock|SoldOut|Discontinued)$', availability)
+        image = _image_url(node.get('image'))
+        if image:
+            data['image_url'] = image
+        category = node.get('category')
+        if isinstance(category, str) and category:
+            data['category'] = category.split('>')[-1].strip()
+        if data:
+            return data
+    return {}
+
+
+def extract_structured_product(content: str) -> Dict[str, Any]:
+    """
+    Generic product extraction: JSON-LD first, completed with og/twitter meta tags
+    and the page <h1>. Price is returned as a raw string for parse_structured_price().
+    """
+    data = extract_jsonld_product(content)
+    if not data.get('name'):
+        name = extract_meta(content, 'og:title') or extract_meta(content, 'twitter:title') or extract_h1(content)
+        if name:
+            data['name'] = name
+    if not data.get('image_url'):
+        image = extract_meta(content, 'og:image')
+        if image:
+            data['image_url'] = image
+    if not data.get('price'):
+        price = extract_meta(content, 'product:price:amount') or extract_meta(content, 'og:price:amount')
+        if price:
+            data['price'] = price
+            currency = extract_meta(content, 'product:price:currency') or extract_meta(content, 'og:price:currency')
+            if currency:
+                data['currency'] = currency
+    return data
+
+
+def extract_run_params(content: str) -> Optional[Dict[str, Any]]:
+    """AliExpress embedded window.runParams JSON, if present"""
+    match = _RUN_PARAMS_RE.search(content)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except Exception:
+        return None
@@ -0,0 +1,70 @@
+"""
+Product full-text search
+
+On MySQL, searches go through the FULLTEXT index on products(name,
+description) in boolean mode: every query word is required and matched as a
+prefix ("sams" finds "Samsung"), results are ranked by relevance. Accents
+are folded on the query side; the index side is folded by the column
+collation (accent-insensitive utf8mb4). Other databases, and queries made
+only of words the index cannot match, fall back to ILIKE.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.dialects.mysql import match
+
+from app.models.product import Product
+
+# innodb_ft_min_token_size (default): shorter words are not indexed
+MIN_TOKEN_LENGTH = 3
+
+# InnoDB default stopwords, never indexed
+_STOPWORDS = frozenset({
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for",
+    "from", "how", "i", "in", "is", "it", "la", "of", "on", "or", "that", "the",
+    "this", "to", "was", "what", "when", "where", "who", "will", "with", "und", "www",
+})
+
+# Query words; boolean-mode operators (+ - * " ( ) < > ~ @) are dropped
+_WORD_RE = re.compile(r"\w+")
+
+# Words in a boolean query, bounds the query cost
+MAX_QUERY_TERMS = 8
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip diacritics ("Écran" -> "ecran")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def fulltext_query(q: str) -> Optional[str]:
+    """
+    Boolean-mode expression requiring every indexable word of the query as
+    a prefix ("+ecran* +samsung*"), or None if no word is indexable
+    """
+    terms = [
+        t for t in dict.fromkeys(_WORD_RE.findall(fold_accents(q)))
+        if len(t) >= MIN_TOKEN_LENGTH and t not in _STOPWORDS
+    ]
+    if not terms:
+        return None
+    return " ".join(f"+{t}*" for t in terms[:MAX_QUERY_TERMS])
+
+
+def product_search(q: str, dialect: str) -> Tuple[object, List[object]]:
+    """
+    (where clause, order by clauses) searching products by name and
+    description for `dialect` (the session's dialect name)
+    """
+    expression = fulltext_query(q) if dialect == "mysql" else None
+    if expression is None:
+        clause = or_(Product.name.ilike(f"%{q}%"), Product.description.ilike(f"%{q}%"))
+        return clause, []
+
+    relevance = match(Product.name, Product.description, against=expression).in_boolean_mode()
+    return relevance, [relevance.desc()]
@@ -1,8 +1,12 @@
 """
 Celery application configuration
 """
+import asyncio
+import logging
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 
 from app.core.config import settings
 
@@ -14,6 +18,7 @@ celery_app = Celery(
     include=[
         "app.tasks.scraping_tasks",
         "app.tasks.ml_tasks",
+        "app.tasks.maintenance_tasks",
     ]
 )
 
@@ -33,28 +38,137 @@ celery_app.conf.update(
 celery_app.conf.task_routes = {
     "app.tasks.scraping_tasks.*": {"queue": "scraping"},
     "app.tasks.ml_tasks.*": {"queue": "ml"},
+    "app.tasks.maintenance_tasks.*": {"queue": "maintenance"},
 }
 
 # Scheduled tasks (Celery Beat)
 celery_app.conf.beat_schedule = {
-    # Scrape all tracked products every 12 hours
-    "scrape-tracked-products": {
-        "task": "app.tasks.scraping_tasks.scrape_all_tracked_products",
-        "schedule": crontab(hour="*/12", minute=0),  # Every 12 hours
+    # Scrape tracked products when their adaptive schedule is due
+    # (scrape_all_tracked_products remains available for a manual full pass)
+    "dispatch-due-products": {
+        "task": "app.tasks.scraping_tasks.dispatch_due_products",
+        "schedule": crontab(minute="*/15"),  # Every 15 minutes
     },
     
-    # Check price alerts every hour
+    # Safety-net alert scan and alert index rebuild every hour
+    # (price writes evaluate their product's alerts immediately)
     "check-price-alerts": {
         "task": "app.tasks.scraping_tasks.check_price_alerts",
         "schedule": crontab(minute=0),  # Every hour
     },
     
+    # Refit the product title TF-IDF model daily at 1 AM
+    "refresh-embeddings-model": {
+        "task": "app.tasks.ml_tasks.refresh_embeddings_model",
+        "schedule": crontab(hour=1, minute=0),  # Daily at 1 AM
+    },
+    
+    # Recompute stored match features weekly (Sunday 2:30 AM), before
+    # the cluster rebuild; scraped products are updated as they come
+    "refresh-match-features": {
+        "task": "app.tasks.ml_tasks.refresh_match_features",
+        "schedule": crontab(hour=2, minute=30, day_of_week=0),  # Weekly
+    },
+    
+    # Re-cluster the catalog weekly (Sunday 3 AM); new products are
+    # assigned incrementally when their price is written
+    "rebuild-product-clusters": {
+        "task": "app.tasks.ml_tasks.rebuild_product_clusters",
+        "schedule": crontab(hour=3, minute=0, day_of_week=0),  # Weekly
+    },
+    
     # Retrain ML models daily at 2 AM
     "retrain-ml-models": {
         "task": "app.tasks.ml_tasks.retrain_models_daily",
         "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    
+    # Compact the price history daily at 4 AM (after the ML jobs)
+    "compact-price-history": {
+        "task": "app.tasks.maintenance_tasks.compact_price_history",
+        "schedule": crontab(hour=4, minute=0),  # Daily at 4 AM
+    },
+    
+    # Create upcoming price_history partitions and detach expired ones
+    "manage-price-history-partitions": {
+        "task": "app.tasks.maintenance_tasks.manage_price_history_partitions",
+        "schedule": crontab(hour=4, minute=30, day_of_week=1),  # Weekly (Monday)
+    },
+    
+    # Refresh the Parquet export of the last two months daily at 5 AM
+    "export-price-history": {
+        "task": "app.tasks.maintenance_tasks.export_price_history",
+        "schedule": crontab(hour=5, minute=0),  # Daily at 5 AM
+    },
 }
 
+logger = logging.getLogger(__name__)
+
+# One long-lived event loop per worker process, so that resources bound to a
+# loop (browser pool, DB connection pool) survive from one task to the next.
+_worker_loop = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return this process' persistent event loop, creating it on first use"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine to completion on the worker's persistent loop
+    (use instead of asyncio.run inside tasks)
+    """
+    return get_worker_loop().run_until_complete(coro)
+
+
+async def _open_worker_resources():
+    from app.core.http_client import get_http_client
+    from app.services.embeddings import embeddings
+
+    get_http_client()
+    embeddings.load()
+
+
+async def _close_worker_resources():
+    from app.core.http_client import close_http_client
+    from app.core.redis import close_redis
+    from app.services.scraper.base_scraper import shutdown_browser_pool
+
+    await shutdown_browser_pool()
+    await close_http_client()
+    await close_redis()
+
+
+@worker_process_init.connect
+def open_worker_resources(**kwargs):
+    """Open the shared HTTP client on the worker's persistent loop and load the TF-IDF model"""
+    try:
+        run_async(_open_worker_resources())
+    except Exception as e:
+        logger.error(f"❌ Error opening worker resources: {e}")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_worker_resources(**kwargs):
+    """Shut down warm browsers and pooled connections when the worker process exits"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+
+    try:
+        _worker_loop.run_until_complete(_close_worker_resources())
+    except Exception as e:
+        logger.error(f"❌ Error closing worker resources: {e}")
+    finally:
+        _worker_loop.close()
+        _worker_loop = None
+
+
 if __name__ == "__main__":
     celery_app.start()
@@ -0,0 +1,177 @@
+"""
+Price history maintenance Celery tasks
+"""
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.tasks.celery_app import celery_app, run_async
+from app.core.config import settings
+from app.models.product import Product
+from app.services import partitions
+from app.services.compaction import CompactionReport, compact_products
+from app.services.price_export import export_month
+from app.services.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Products per backfill task, and per commit within a task
+ROLLUP_BACKFILL_TASK_SIZE = 2000
+ROLLUP_BACKFILL_CHUNK_SIZE = 200
+
+# Products per compaction task, and per batch (read + commits) within a task
+COMPACTION_TASK_SIZE = 2000
+COMPACTION_BATCH_SIZE = 50
+
+# Create async engine for Celery tasks
+engine = create_async_engine(settings.DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.backfill_price_rollups")
+def backfill_price_rollups(product_ids: Optional[List[str]] = None):
+    """
+    Rebuild the daily price rollups from the raw price history
+    Without product ids, queues one task per ROLLUP_BACKFILL_TASK_SIZE
+    products of the catalog (keeps each task under the time limit);
+    with ids, rebuilds them one chunk of products per commit.
+    """
+    async def _backfill():
+        async with AsyncSessionLocal() as db:
+            try:
+                if product_ids is None:
+                    result = await db.execute(select(Product.id))
+                    ids = list(result.scalars().all())
+                    for i in range(0, len(ids), ROLLUP_BACKFILL_TASK_SIZE):
+                        backfill_price_rollups.delay(ids[i:i + ROLLUP_BACKFILL_TASK_SIZE])
+                    logger.info(f"📦 Queued rollup backfill for {len(ids)} products")
+                    return
+                
+                written = 0
+                for i in range(0, len(product_ids), ROLLUP_BACKFILL_CHUNK_SIZE):
+                    written += await rebuild_rollups(db, product_ids[i:i + ROLLUP_BACKFILL_CHUNK_SIZE])
+                    await db.commit()
+                
+                logger.info(f"✅ Backfilled {written} daily rollups for {len(product_ids)} products")
+                
+            except Exception as e:
+                logger.error(f"❌ Error in backfill_price_rollups: {e}")
+                await db.rollback()
+    
+    run_async(_backfill())
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.compact_price_history")
+def compact_price_history(product_ids: Optional[List[str]] = None):
+    """
+    Collapse unchanged prices into change points and thin out raw history
+    older than PRICE_HISTORY_RAW_RETENTION_DAYS where rollups exist
+    Without product ids, queues one task per COMPACTION_TASK_SIZE products;
+    with ids, compacts them COMPACTION_BATCH_SIZE products at a time.
+    Returns the compaction report.
+    """
+    async def _compact():
+        async with AsyncSessionLocal() as db:
+            try:
+                if product_ids is None:
+                    result = await db.execute(select(Product.id))
+                    ids = list(result.scalars().all())
+                    for i in range(0, len(ids), COMPACTION_TASK_SIZE):
+                        compact_price_history.delay(ids[i:i + COMPACTION_TASK_SIZE])
+                    logger.info(f"📦 Queued price history compaction for {len(ids)} products")
+                    return None
+                
+                report = CompactionReport()
+                for i in range(0, len(product_ids), COMPACTION_BATCH_SIZE):
+                    report.add(await compact_products(db, product_ids[i:i + COMPACTION_BATCH_SIZE]))
+                
+                logger.info(
+                    f"🧹 Compacted price history of {report.products} products: "
+                    f"{report.rows_removed}/{report.rows_scanned} rows removed, "
+                    f"~{report.bytes_reclaimed / 1024 / 1024:.1f} MB reclaimed"
+                )
+                return asdict(report)
+                
+            except Exception as e:
+                logger.error(f"❌ Error in compact_price_history: {e}")
+                await db.rollback()
+                return None
+    
+    return run_async(_compact())
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.manage_price_history_partitions")
+def manage_price_history_partitions():
+    """
+    Create the monthly price_history partitions of the next
+    PRICE_HISTORY_PARTITION_MONTHS_AHEAD months and detach (archive or drop)
+    those older than PRICE_HISTORY_PARTITION_RETENTION_MONTHS (MySQL only)
+    """
+    async def _manage():
+        async with AsyncSessionLocal() as db:
+            try:
+                if not partitions.is_supported(db):
+                    logger.info("⏭️ price_history is not partitioned on this database")
+                    return
+                
+                today = datetime.utcnow().date()
+                created = await partitions.ensure_future_partitions(
+                    db, settings.PRICE_HISTORY_PARTITION_MONTHS_AHEAD, today
+                )
+                expired = await partitions.expire_partitions(
+                    db,
+                    settings.PRICE_HISTORY_PARTITION_RETENTION_MONTHS,
+                    settings.PRICE_HISTORY_ARCHIVE_EXPIRED_PARTITIONS,
+                    today,
+                )
+                await db.commit()
+                
+                action = "archived" if settings.PRICE_HISTORY_ARCHIVE_EXPIRED_PARTITIONS else "dropped"
+                logger.info(
+                    f"🗂️ price_history partitions: {len(created)} created {created}, "
+                    f"{len(expired)} {action} {expired}"
+                )
+                
+            except Exception as e:
+                logger.error(f"❌ Error in manage_price_history_partitions: {e}")
+                await db.rollback()
+    
+    run_async(_manage())
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.export_price_history")
+def export_price_history(months: Optional[List[str]] = None):
+    """
+    Export the price history of the given months ("YYYY-MM") to Parquet
+    under PRICE_EXPORT_DIR, replacing earlier exports of those months
+    Defaults to the previous and the current month; pass older months
+    explicitly to backfill the archive. Returns the rows written per month.
+    """
+    async def _export():
+        async with AsyncSessionLocal() as db:
+            try:
+                if months is None:
+                    current = partitions.month_start(datetime.utcnow().date())
+                    selected = [partitions.add_months(current, -1), current]
+                else:
+                    selected = [datetime.strptime(m, "%Y-%m").date() for m in months]
+                
+                written = {}
+                for month in selected:
+                    counts = await export_month(
+                        db, Path(settings.PRICE_EXPORT_DIR), month, settings.PRICE_EXPORT_COMPRESSION
+                    )
+                    written[f"{month:%Y-%m}"] = sum(counts.values())
+                    logger.info(f"📤 Exported {sum(counts.values())} prices of {month:%Y-%m} ({len(counts)} marketplaces)")
+                return written
+                
+            except Exception as e:
+                logger.error(f"❌ Error in export_price_history: {e}")
+                await db.rollback()
+                return None
+    
+    return run_async(_export())
@@ -6,13 +6,19 @@ from datetime import datetime, timedelta
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
 from app.core.config import settings
 from app.models.product import Product
-from app.models.price import PriceHistory
+from app.services.embeddings import embeddings
+from app.services.clustering import rebuild_clusters
+from app.services.match_features import upsert_match_features
+from app.services.rollups import daily_rollups_query, products_with_rollup_days_query, rollup_day_count_query
 
 logger = logging.getLogger(__name__)
 
+# Products per commit while refreshing match features
+MATCH_FEATURES_CHUNK_SIZE = 1000
+
 # Create async engine for Celery tasks
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -22,10 +28,8 @@ AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_co
 def train_model_for_product(product_id: str):
     """
     Train Prophet model for a specific product
-    Requires at least 30 historical price points
+    Requires at least 30 days of price history (daily rollups)
     """
-    import asyncio
-    
     async def _train():
         async with AsyncSessionLocal() as db:
             try:
@@ -37,23 +41,16 @@ def train_model_for_product(product_id: str):
                     logger.warning(f"Product {product_id} not found")
                     return
                 
-                # Get price history count
-                count_result = await db.execute(
-                    select(func.count(PriceHistory.id))
-                    .where(PriceHistory.product_id == product_id)
-                )
+                # Get number of days with prices
+                count_result = await db.execute(rollup_day_count_query(product_id))
                 count = count_result.scalar()
                 
                 if count < 30:
-                    logger.info(f"Product {product.name} has only {count} price points, need 30+")
+                    logger.info(f"Product {product.name} has only {count} days of prices, need 30+")
                     return
                 
-                # Get price history
-                history_result = await db.execute(
-                    select(PriceHistory)
-                    .where(PriceHistory.product_id == product_id)
-                    .order_by(PriceHistory.scraped_at.asc())
-                )
+                # Get daily price series
+                history_result = await db.execute(daily_rollups_query(product_id))
                 history = history_result.scalars().all()
                 
                 # TODO: Implement Prophet model training
@@ -61,12 +58,12 @@ def train_model_for_product(product_id: str):
                 # predictor = PricePredictor()
                 # predictor.train_model(product_id, history)
                 
-                logger.info(f"✅ Trained model for product {product.name} with {count} data points")
+                logger.info(f"✅ Trained model for product {product.name} with {count} days of prices")
                 
             except Exception as e:
                 logger.error(f"❌ Error training model for product {product_id}: {e}")
     
-    asyncio.run(_train())
+    run_async(_train())
 
 
 @celery_app.task(name="app.tasks.ml_tasks.retrain_models_daily")
@@ -75,17 +72,11 @@ def retrain_models_daily():
     Retrain models for all products with sufficient historical data
     Runs daily at 2 AM
     """
-    import asyncio
-    
     async def _retrain_all():
         async with AsyncSessionLocal() as db:
             try:
-                # Get products with >= 30 price history entries
-                result = await db.execute(
-                    select(PriceHistory.product_id, func.count(PriceHistory.id).label('count'))
-                    .group_by(PriceHistory.product_id)
-                    .having(func.count(PriceHistory.id) >= 30)
-                )
+                # Get products with >= 30 days of prices
+                result = await db.execute(products_with_rollup_days_query(30))
                 products_to_train = result.all()
                 
                 logger.info(f"🤖 Starting ML training for {len(products_to_train)} products")
@@ -99,4 +90,85 @@ def retrain_models_daily():
             except Exception as e:
                 logger.error(f"❌ Error in retrain_models_daily: {e}")
     
-    asyncio.run(_retrain_all())
+    run_async(_retrain_all())
+
+
+@celery_app.task(name="app.tasks.ml_tasks.refresh_embeddings_model")
+def refresh_embeddings_model():
+    """
+    Refit the title TF-IDF model on the whole product catalog and persist it
+    Other processes reload the new file on their next similarity lookup
+    """
+    async def _refresh():
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(select(Product.name).where(Product.name.isnot(None)))
+                titles = result.scalars().all()
+                
+                if not titles:
+                    logger.info("No products to fit the TF-IDF model on")
+                    return
+                
+                terms = embeddings.fit(titles)
+                logger.info(f"✅ Fitted TF-IDF model on {len(titles)} titles ({terms} terms)")
+                
+            except Exception as e:
+                logger.error(f"❌ Error in refresh_embeddings_model: {e}")
+    
+    run_async(_refresh())
+
+
+@celery_app.task(name="app.tasks.ml_tasks.rebuild_product_clusters")
+def rebuild_product_clusters():
+    """
+    Re-cluster the whole catalog from scratch
+    Corrects drift from incremental assignment (products are only matched
+    against clusters that existed when they were first seen)
+    """
+    async def _rebuild():
+        async with AsyncSessionLocal() as db:
+            try:
+                count = await rebuild_clusters(db)
+                await db.commit()
+                logger.info(f"✅ Rebuilt {count} product clusters")
+                
+            except Exception as e:
+                logger.error(f"❌ Error in rebuild_product_clusters: {e}")
+                await db.rollback()
+    
+    run_async(_rebuild())
+
+
+@celery_app.task(name="app.tasks.ml_tasks.refresh_match_features")
+def refresh_match_features():
+    """
+    Recompute the stored matching features of the whole catalog
+    Backfills products scraped before features were stored and picks up
+    changes to the normalization rules
+    """
+    async def _refresh():
+        async with AsyncSessionLocal() as db:
+            try:
+                written = 0
+                total = 0
+                last_id = None
+                # Keyset pages (no open cursor while writing and committing)
+                while True:
+                    query = select(Product).order_by(Product.id).limit(MATCH_FEATURES_CHUNK_SIZE)
+                    if last_id is not None:
+                        query = query.where(Product.id > last_id)
+                    chunk = (await db.execute(query)).scalars().all()
+                    if not chunk:
+                        break
+                    written += await upsert_match_features(db, chunk)
+                    total += len(chunk)
+                    last_id = chunk[-1].id
+                    await db.commit()
+                    db.expunge_all()  # Keep the identity map to one page
+                logger.info(f"✅ Refreshed match features: {written} written out of {total} products")
+                
+            except Exception as e:
+                logger.error(f"❌ Error in refresh_match_features: {e}")
+                await db.rollback()
+    
+    run_async(_refresh())
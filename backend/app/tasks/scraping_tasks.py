@@ -1,18 +1,26 @@
 """
 Scraping and alert checking Celery tasks
 """
+import asyncio
 import logging
 from datetime import datetime
-from sqlalchemy import select
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
 from app.core.config import settings
 from app.models.product import Product
 from app.models.tracked_product import TrackedProduct
-from app.models.price import PriceHistory, PriceSource
-from app.models.alert import Alert, AlertType
-from app.models.user import User
+from app.models.scrape_state import ProductScrapeState
+from app.services.scrape_state import content_hash, load_states, validators_for
+from app.services.scheduler import claim_due_products, reschedule
+from app.services.alert_engine import TriggeredAlert, evaluate_alerts, evaluate_price_changes
+from app.services.alert_index import rebuild_alert_index
+from app.services.clustering import update_clusters
+from app.services.ingestion import ingest_scraped_products
+from app.services.match_features import upsert_match_features
+from app.services.rollups import PriceSample, record_prices
 from app.services.scraper.jumia_scraper import JumiaScraper
 from app.services.scraper.amazon_scraper import AmazonScraper
 from app.services.scraper.aliexpress_scraper import AliExpressScraper
@@ -30,13 +38,164 @@ async def get_async_db():
         yield session
 
 
+# Scraper class per marketplace value
+SCRAPERS = {
+    "jumia": JumiaScraper,
+    "amazon": AmazonScraper,
+    "aliexpress": AliExpressScraper,
+}
+
+
+def _marketplace_key(product: Product) -> str:
+    """Marketplace of a product as a plain lowercase string"""
+    marketplace = product.marketplace
+    return str(getattr(marketplace, "value", marketplace)).lower()
+
+
+async def _scrape_product_data(
+    product: Product, state: Optional[ProductScrapeState] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Scrape a product page with the scraper matching its marketplace
+    (conditional request when validators from a previous fetch are known)
+    """
+    marketplace = _marketplace_key(product)
+    scraper_cls = SCRAPERS.get(marketplace)
+    if scraper_cls is None:
+        logger.warning(f"Unsupported marketplace: {product.marketplace}")
+        return None
+
+    url = product.url
+    if marketplace == "aliexpress":
+        url = getattr(product, "marketplace_url", None) or product.url
+
+    async with scraper_cls() as scraper:
+        return await scraper.scrape_product(url, validators=validators_for(state))
+
+
+async def _load_or_create_states(
+    db: AsyncSession, products: List[Product]
+) -> Dict[str, ProductScrapeState]:
+    """Scrape state of each product, adding a fresh row where missing"""
+    states = await load_states(db, [p.id for p in products])
+    for product in products:
+        if product.id not in states:
+            state = ProductScrapeState(product_id=product.id, consecutive_failures=0)
+            db.add(state)
+            states[product.id] = state
+    return states
+
+
+def _record_scrape(
+    product: Product,
+    data: Dict[str, Any],
+    state: ProductScrapeState,
+    now: datetime,
+) -> bool:
+    """
+    Update a product's scrape state from scraped data (no commit)
+    A page that was not modified (HTTP 304) or whose price-relevant fields
+    hash to the stored value is only a "seen at" heartbeat.
+    Returns True when the result must be written (ingest_scraped_products).
+    """
+    state.last_seen_at = now
+    state.consecutive_failures = 0
+
+    if data.get('not_modified'):
+        return False
+
+    state.etag = data.get('etag')
+    state.last_modified = data.get('last_modified')
+    digest = content_hash(data)
+    if digest == state.content_hash:
+        return False
+    state.content_hash = digest
+    state.last_changed_at = now
+    return True
+
+
+async def _write_scrape_results(
+    db: AsyncSession,
+    results: List[Tuple[Product, Dict[str, Any]]],
+    states: Dict[str, ProductScrapeState],
+    now: datetime,
+) -> Tuple[List[Product], List[TriggeredAlert]]:
+    """
+    Write successful scrape results in bulk (no commit): changed content
+    goes through the ingestion path, heartbeats only bump last_scraped_at.
+    Every result is a sample of the day's rollup; alerts, match features and
+    clusters then process the products whose price (or availability)
+    changed, returned with the triggered alerts.
+    """
+    samples = _price_samples(results, now)
+    rows = []
+    heartbeats = []
+    for product, data in results:
+        if _record_scrape(product, data, states[product.id], now):
+            rows.append({
+                **data,
+                "product_id": product.id,
+                "marketplace": product.marketplace,
+                "url": product.url,
+                "scraped_at": now,
+            })
+        else:
+            heartbeats.append(product.id)
+
+    ingested = await ingest_scraped_products(db, rows, now)
+    # Results without a usable price are heartbeats too
+    heartbeats.extend(row["product_id"] for row, pid in zip(rows, ingested.product_ids) if pid is None)
+    if heartbeats:
+        await db.execute(
+            update(Product).where(Product.id.in_(heartbeats)).values(last_scraped_at=now)
+        )
+    await record_prices(db, samples)
+    if not ingested.changes:
+        return [], []
+
+    # Reload the changed products (their ORM state predates the upsert)
+    changes = {change.product_id: change for change in ingested.changes}
+    result = await db.execute(
+        select(Product)
+        .where(Product.id.in_(list(changes)))
+        .execution_options(populate_existing=True)
+    )
+    changed_products = list(result.scalars().all())
+    triggered = await evaluate_price_changes(
+        db, changed_products, {pid: change.previous_price for pid, change in changes.items()}
+    )
+
+    repriced = [p for p in changed_products if changes[p.id].price_changed]
+    await upsert_match_features(db, repriced)
+    await update_clusters(db, repriced)
+    return changed_products, triggered
+
+
+def _price_samples(results: List[Tuple[Product, Dict[str, Any]]], now: datetime) -> List[PriceSample]:
+    """
+    Rollup samples of successful scrapes: the scraped price, or the
+    current one for heartbeats (not modified / same content)
+    """
+    return [
+        (product.id, data.get('price') or data.get('current_price') or product.current_price, now)
+        for product, data in results
+    ]
+
+
+def _log_triggered(triggered: List[TriggeredAlert]) -> None:
+    for alert in triggered:
+        # TODO: Send actual notification via Telegram/WhatsApp
+        logger.info(
+            f"🔔 Alert triggered for user {alert.user_email or alert.user_id}, "
+            f"product {alert.product_name}"
+        )
+
+
 @celery_app.task(name="app.tasks.scraping_tasks.scrape_product")
 def scrape_product_task(product_id: str):
     """
     Scrape a single product and update price
     """
-    import asyncio
-    
     async def _scrape():
         async with AsyncSessionLocal() as db:
             try:
@@ -48,47 +207,84 @@ def scrape_product_task(product_id: str):
                     logger.warning(f"Product {product_id} not found")
                     return
                 
-                # Select scraper
-                if product.marketplace == "jumia":
-                    async with JumiaScraper() as scraper:
-                        data = await scraper.scrape_product(product.url)
-                elif product.marketplace == "amazon":
-                    async with AmazonScraper() as scraper:
-                        data = await scraper.scrape_product(product.url)
-                elif product.marketplace == "aliexpress":
-                    async with AliExpressScraper() as scraper:
-                        data = await scraper.scrape_product(product.marketplace_url)
-                else:
-                    logger.warning(f"Unsupported marketplace: {product.marketplace}")
-                    return
-                
+                states = await _load_or_create_states(db, [product])
+                state = states[product.id]
+                data = await _scrape_product_data(product, state)
                 if not data:
                     logger.error(f"Failed to scrape product {product_id}")
+                    state.consecutive_failures = (state.consecutive_failures or 0) + 1
+                    await reschedule(db, states, datetime.utcnow())
+                    await db.commit()
                     return
                 
-                # Update product
-                product.current_price = data.get('price', product.current_price)
-                product.is_available = data.get('is_available', True)
-                product.last_scraped_at = datetime.utcnow()
-                
-                # Save price history
-                price_history = PriceHistory(
-                    product_id=product.id,
-                    price=data['price'],
-                    currency=data.get('currency', 'XOF'),
-                    source=PriceSource.SCRAPING
+                changed, triggered = await _write_scrape_results(
+                    db, [(product, data)], states, datetime.utcnow()
                 )
-                db.add(price_history)
-                
+                await reschedule(db, states, datetime.utcnow())
                 await db.commit()
+                _log_triggered(triggered)
                 
-                logger.info(f"✅ Scraped product {product.name}: {data['price']} XOF")
+                if changed:
+                    logger.info(f"✅ Scraped product {product.name}: {data['price']} XOF")
+                else:
+                    logger.info(f"✅ Product {product.name} unchanged")
                 
             except Exception as e:
                 logger.error(f"❌ Error scraping product {product_id}: {e}")
                 await db.rollback()
     
-    asyncio.run(_scrape())
+    run_async(_scrape())
+
+
+@celery_app.task(name="app.tasks.scraping_tasks.scrape_products_batch")
+def scrape_products_batch(product_ids: List[str]):
+    """
+    Scrape a chunk of products concurrently over the shared browser pool
+    and write all results in bulk, in a single commit
+    """
+    async def _scrape_batch():
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(select(Product).where(Product.id.in_(product_ids)))
+                products = result.scalars().all()
+                states = await _load_or_create_states(db, products)
+                
+                semaphore = asyncio.Semaphore(settings.SCRAPING_BATCH_CONCURRENCY)
+                
+                async def _scrape_one(product: Product):
+                    async with semaphore:
+                        try:
+                            return product, await _scrape_product_data(product, states.get(product.id))
+                        except Exception as e:
+                            logger.error(f"❌ Error scraping product {product.id}: {e}")
+                            return product, None
+                
+                results = await asyncio.gather(*(_scrape_one(p) for p in products))
+                
+                scraped = []
+                for product, data in results:
+                    if not data:
+                        logger.error(f"Failed to scrape product {product.id}")
+                        state = states[product.id]
+                        state.consecutive_failures = (state.consecutive_failures or 0) + 1
+                        continue
+                    scraped.append((product, data))
+                
+                changed, triggered = await _write_scrape_results(db, scraped, states, datetime.utcnow())
+                await reschedule(db, states, datetime.utcnow())
+                await db.commit()
+                _log_triggered(triggered)
+                
+                logger.info(
+                    f"✅ Scraped batch: {len(changed)} changed, {len(scraped) - len(changed)} unchanged "
+                    f"out of {len(product_ids)} products"
+                )
+                
+            except Exception as e:
+                logger.error(f"❌ Error scraping batch: {e}")
+                await db.rollback()
+    
+    run_async(_scrape_batch())
 
 
 @celery_app.task(name="app.tasks.scraping_tasks.scrape_all_tracked_products")
@@ -96,8 +292,6 @@ def scrape_all_tracked_products():
     """
     Scrape all unique products that are being tracked
     """
-    import asyncio
-    
     async def _scrape_all():
         async with AsyncSessionLocal() as db:
             try:
@@ -109,85 +303,72 @@ def scrape_all_tracked_products():
                 
                 logger.info(f"🔍 Starting to scrape {len(product_ids)} tracked products")
                 
-                # Scrape each product (this will spawn subtasks)
-                for product_id in product_ids:
-                    scrape_product_task.delay(product_id)
+                # Scrape in chunks (one batch task per chunk)
+                batch_size = settings.SCRAPING_BATCH_SIZE
+                for i in range(0, len(product_ids), batch_size):
+                    scrape_products_batch.delay(product_ids[i:i + batch_size])
                 
-                logger.info(f"✅ Queued {len(product_ids)} scraping tasks")
+                logger.info(f"✅ Queued {len(product_ids)} products in batches of {batch_size}")
                 
             except Exception as e:
                 logger.error(f"❌ Error in scrape_all_tracked_products: {e}")
     
-    asyncio.run(_scrape_all())
+    run_async(_scrape_all())
+
+
+@celery_app.task(name="app.tasks.scraping_tasks.dispatch_due_products")
+def dispatch_due_products():
+    """
+    Scheduler tick: queue batch scrapes for tracked products whose
+    adaptive next_scrape_at is due (bounded by SCRAPE_DISPATCH_MAX_PER_TICK)
+    """
+    async def _dispatch():
+        async with AsyncSessionLocal() as db:
+            try:
+                product_ids = await claim_due_products(
+                    db, datetime.utcnow(), settings.SCRAPE_DISPATCH_MAX_PER_TICK
+                )
+                await db.commit()
+                
+                batch_size = settings.SCRAPING_BATCH_SIZE
+                for i in range(0, len(product_ids), batch_size):
+                    scrape_products_batch.delay(product_ids[i:i + batch_size])
+                
+                if product_ids:
+                    logger.info(f"⏰ Dispatched {len(product_ids)} due products")
+                
+            except Exception as e:
+                logger.error(f"❌ Error in dispatch_due_products: {e}")
+                await db.rollback()
+    
+    run_async(_dispatch())
 
 
 @celery_app.task(name="app.tasks.scraping_tasks.check_price_alerts")
 def check_price_alerts():
     """
     Check all active alerts and send notifications if conditions are met
-    """
-    import asyncio
     
+    Safety net: alerts are normally evaluated as soon as a price is written
+    (evaluate_price_changes). This hourly pass also rebuilds the Redis
+    alert index those writes read from.
+    """
     async def _check_alerts():
         async with AsyncSessionLocal() as db:
             try:
-                # Get all active alerts
-                result = await db.execute(
-                    select(Alert).where(Alert.is_active == True)
-                )
-                alerts = result.scalars().all()
-                
-                logger.info(f"🔔 Checking {len(alerts)} active alerts")
-                
-                triggered_count = 0
-                
-                for alert in alerts:
-                    # Load relationships
-                    await db.refresh(alert, ["product", "user"])
-                    
-                    product = alert.product
-                    user = alert.user
-                    
-                    should_trigger = False
-                    
-                    # Check alert conditions
-                    if alert.alert_type == AlertType.TARGET_PRICE:
-                        if product.current_price <= alert.threshold_value:
-                            should_trigger = True
-                    
-                    elif alert.alert_type == AlertType.PERCENTAGE_DROP:
-                        # Get previous price
-                        prev_result = await db.execute(
-                            select(PriceHistory)
-                            .where(PriceHistory.product_id == product.id)
-                            .order_by(PriceHistory.scraped_at.desc())
-                            .offset(1)
-                            .limit(1)
-                        )
-                        prev_price = prev_result.scalar_one_or_none()
-                        
-                        if prev_price:
-                            drop_pct = ((prev_price.price - product.current_price) / prev_price.price) * 100
-                            if drop_pct >= alert.threshold_value:
-                                should_trigger = True
-                    
-                    elif alert.alert_type == AlertType.AVAILABILITY:
-                        if product.is_available:
-                            should_trigger = True
-                    
-                    # Send notification if triggered
-                    if should_trigger:
-                        # TODO: Send actual notification via Telegram/WhatsApp
-                        logger.info(f"🔔 Alert triggered for user {user.email}, product {product.name}")
-                        
-                        alert.last_triggered_at = datetime.utcnow()
-                        triggered_count += 1
-                
+                triggered = await evaluate_alerts(db)
                 await db.commit()
-                logger.info(f"✅ Triggered {triggered_count} alerts")
+                _log_triggered(triggered)
+                logger.info(f"✅ Triggered {len(triggered)} alerts")
+                
+                try:
+                    indexed = await rebuild_alert_index(db)
+                    logger.info(f"🗂️ Rebuilt alert index ({indexed} active alerts)")
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not rebuild alert index: {e}")
                 
             except Exception as e:
                 logger.error(f"❌ Error checking alerts: {e}")
                 await db.rollback()
     
-    asyncio.run(_check_alerts())
+    run_async(_check_alerts())
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark: title normalization, before / after compiled patterns and
+the title_features cache. Also checks both versions agree on every title.
+Run: python bench_normalization.py [n_titles]
+"""
+import random
+import re
+import sys
+import time
+
+from app.services.normalization import (
+    BRAND_MAPPINGS,
+    extract_attributes,
+    guess_brand,
+    normalize_title,
+    title_features,
+)
+
+WORDS = [
+    "Samsung", "Galaxy", "A54", "Apple", "iPhone", "13", "Pro", "Max", "Xiaomi",
+    "Redmi", "Note", "12", "Tecno", "Spark", "10", "Infinix", "Hot", "30", "HP",
+    "Laptop", "Core", "i5", "JBL", "Écouteurs", "128GB", "256 GB", "1TB", "8GB RAM",
+    "6.5\"", "6.7 pouces", "15 inch", "Noir", "Black", "Bleu", "Gold", "Original",
+    "New", "Officiel", "Dual", "SIM", "4G", "5G", "-", "/", "Smartphone", "Chargeur",
+]
+
+
+# Previous implementation (patterns built per call), for comparison
+
+def legacy_normalize_title(title):
+    if not title:
+        return ""
+    normalized = title.lower().strip()
+    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    normalized = re.sub(r'\s+', ' ', normalized)
+    for word in ['original', 'authentic', 'new', 'brand', 'official', 'genuine']:
+        normalized = re.sub(rf'\b{word}\b', '', normalized)
+    return normalized.strip()
+
+
+def legacy_guess_brand(title):
+    if not title:
+        return None
+    title_lower = title.lower()
+    for canonical_brand, variants in BRAND_MAPPINGS.items():
+        for variant in variants:
+            if variant in title_lower:
+                return canonical_brand
+    return None
+
+
+def legacy_extract_attributes(title):
+    attributes = {}
+    if not title:
+        return attributes
+    title_lower = title.lower()
+    for pattern in [r'(\d+)\s*tb', r'(\d+)\s*gb(?!\s*ram)']:
+        match = re.search(pattern, title_lower)
+        if match:
+            capacity = int(match.group(1))
+            if 'tb' in match.group(0):
+                capacity *= 1024
+            attributes['capacity_gb'] = capacity
+            break
+    ram_match = re.search(r'(\d+)\s*gb\s*ram', title_lower)
+    if ram_match:
+        attributes['ram_gb'] = int(ram_match.group(1))
+    screen_match = re.search(r'(\d+\.?\d*)\s*(?:inch|pouces|")', title_lower)
+    if screen_match:
+        attributes['screen_inches'] = float(screen_match.group(1))
+    colors = ['black', 'white', 'blue', 'red', 'green', 'gold', 'silver', 'gray', 'grey',
+              'pink', 'purple', 'yellow', 'orange', 'noir', 'blanc', 'bleu', 'rouge']
+    for color in colors:
+        if re.search(rf'\b{color}\b', title_lower):
+            attributes['color'] = color
+            break
+    return attributes
+
+
+def _titles(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 12))) for _ in range(n)]
+
+
+def _legacy(title):
+    return legacy_normalize_title(title), legacy_guess_brand(title), legacy_extract_attributes(title)
+
+
+def _compiled(title):
+    return normalize_title(title), guess_brand(title), extract_attributes(title)
+
+
+def _cached(title):
+    return title_features(title)
+
+
+def _bench(fn, titles, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for title in titles:
+            fn(title)
+    return (time.perf_counter() - started) / (repeat * len(titles)) * 1e6
+
+
+def main():
+    """Main benchmark function"""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    titles = _titles(n)
+
+    mismatches = [t for t in titles if _legacy(t) != _compiled(t)]
+    for t in mismatches[:5]:
+        print(f"❌ {t!r}: {_legacy(t)} != {_compiled(t)}")
+    if mismatches:
+        sys.exit(1)
+    print(f"✅ {n} titles: same output as the previous implementation")
+
+    # group_products / score_matrix parse every title of a batch, and the
+    # same titles come back on every request: measure repeated passes
+    repeat = 5
+    re.purge()  # don't let the re module cache hide the per-call compile cost
+    legacy = _bench(_legacy, titles, repeat)
+    compiled = _bench(_compiled, titles, repeat)
+    title_features.cache_clear()
+    cached = _bench(_cached, titles, repeat)
+
+    print(f"legacy:               {legacy:8.2f} µs/title")
+    print(f"compiled:             {compiled:8.2f} µs/title  ({legacy / compiled:.1f}x)")
+    print(f"title_features (LRU): {cached:8.2f} µs/title  ({legacy / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
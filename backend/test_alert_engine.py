@@ -0,0 +1,111 @@
+"""
+Alert evaluation test: percentage drops compare against the previous price
+change, however old it is
+Runs triggered_alerts_query on an in-memory SQLite database.
+Run: python test_alert_engine.py
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database.base import Base
+from app.models.alert import Alert, AlertType
+from app.models.price import PriceHistory, PriceSource
+from app.models.product import Marketplace, Product
+from app.models.user import User
+from app.services.alert_engine import triggered_alerts_query
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def _run(scenario):
+    """Run a scenario against a fresh database"""
+    async def _main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                await scenario(db)
+        finally:
+            await engine.dispose()
+    asyncio.run(_main())
+
+
+async def _drop_alert(db: AsyncSession, prices, threshold: float = 10.0):
+    """A product with the given (days ago, price) history and a PERCENTAGE_DROP alert on it"""
+    user = User(email="alerts@example.com", hashed_password="x", full_name="Alerts", is_active=True)
+    product = Product(
+        name="Casque Bluetooth", url="https://www.jumia.com.bj/casque.html",
+        marketplace=Marketplace("jumia"), current_price=prices[-1][1], currency="XOF",
+    )
+    db.add_all([user, product])
+    await db.flush()
+    db.add_all([
+        PriceHistory(
+            product_id=product.id, price=price, currency="XOF",
+            source=PriceSource.SCRAPING, scraped_at=NOW - timedelta(days=days_ago),
+        )
+        for days_ago, price in prices
+    ])
+    alert = Alert(
+        user_id=user.id, product_id=product.id, alert_type=AlertType.PERCENTAGE_DROP,
+        threshold_value=threshold, notification_channel="email", is_active=True,
+    )
+    db.add(alert)
+    await db.commit()
+    return product, alert
+
+
+async def _drop_after_stable_stretch(db: AsyncSession):
+    # Price held for 200 days (one change point), then dropped 20% today
+    product, alert = await _drop_alert(db, [(400, 120000.0), (200, 100000.0), (0, 80000.0)])
+    rows = (await db.execute(triggered_alerts_query([product.id]))).all()
+    assert [row[0] for row in rows] == [alert.id]
+    assert rows[0][9] == 100000.0
+
+
+async def _small_drop(db: AsyncSession):
+    product, _ = await _drop_alert(db, [(200, 100000.0), (0, 95000.0)])
+    rows = (await db.execute(triggered_alerts_query([product.id]))).all()
+    assert rows == []
+
+
+async def _single_price(db: AsyncSession):
+    product, _ = await _drop_alert(db, [(200, 100000.0)])
+    rows = (await db.execute(triggered_alerts_query())).all()
+    assert rows == []
+
+
+def test_drop_after_stable_stretch():
+    """A drop after a long stable price triggers its PERCENTAGE_DROP alert"""
+    _run(_drop_after_stable_stretch)
+
+
+def test_small_drop():
+    """A drop below the threshold does not trigger"""
+    _run(_small_drop)
+
+
+def test_single_price():
+    """Without a previous price nothing triggers"""
+    _run(_single_price)
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (test_drop_after_stable_stretch, test_small_drop, test_single_price):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
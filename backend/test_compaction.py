@@ -0,0 +1,136 @@
+"""
+Price history compaction test: plan_compaction on hand-built histories
+Checks which rows are deleted and which last_seen_at are extended, without
+a database.
+Run: python test_compaction.py
+"""
+import sys
+from datetime import datetime, timedelta
+
+from app.services.compaction import plan_compaction
+
+NOW = datetime(2026, 10, 17, 12, 0)
+HORIZON = NOW - timedelta(days=365)
+CUTOFF = NOW - timedelta(hours=24)
+
+
+def _row(row_id, price, scraped_at, last_seen_at=None, currency="XOF"):
+    return (row_id, price, currency, scraped_at, last_seen_at)
+
+
+def test_identical_runs_collapse():
+    """Consecutive identical prices keep their first row, extended to the last sample"""
+    start = NOW - timedelta(days=10)
+    rows = [
+        _row("a", 100.0, start),
+        _row("b", 100.0, start + timedelta(hours=6)),
+        _row("c", 100.0, start + timedelta(hours=12)),
+        _row("d", 120.0, start + timedelta(hours=18)),
+        _row("e", 120.0, start + timedelta(hours=24)),
+        _row("f", 100.0, start + timedelta(hours=30)),
+        _row("g", 100.0, start + timedelta(hours=30), currency="EUR"),
+    ]
+    deleted, updates = plan_compaction(rows, HORIZON, set(), CUTOFF)
+    assert deleted == ["b", "c", "e"]
+    assert updates == {
+        "a": start + timedelta(hours=12),
+        "d": start + timedelta(hours=24),
+    }
+
+
+def test_last_seen_at_extension():
+    """A run ends at the latest last_seen_at of its rows, never earlier than stored"""
+    start = NOW - timedelta(days=10)
+    # Already compacted row whose stored run outlasts the next sample
+    deleted, updates = plan_compaction([
+        _row("a", 100.0, start, last_seen_at=start + timedelta(hours=20)),
+        _row("b", 100.0, start + timedelta(hours=6)),
+    ], HORIZON, set(), CUTOFF)
+    assert deleted == ["b"]
+    assert updates == {}
+
+    # Merged row carrying its own, later, last_seen_at
+    deleted, updates = plan_compaction([
+        _row("a", 100.0, start, last_seen_at=start + timedelta(hours=2)),
+        _row("b", 100.0, start + timedelta(hours=6), last_seen_at=start + timedelta(hours=30)),
+        _row("c", 150.0, start + timedelta(hours=40)),
+    ], HORIZON, set(), CUTOFF)
+    assert deleted == ["b"]
+    assert updates == {"a": start + timedelta(hours=30)}
+
+    # Nothing to merge: nothing written
+    deleted, updates = plan_compaction([
+        _row("a", 100.0, start, last_seen_at=start + timedelta(hours=2)),
+        _row("b", 110.0, start + timedelta(hours=6)),
+    ], HORIZON, set(), CUTOFF)
+    assert deleted == [] and updates == {}
+
+
+def test_rollup_days_thinned_past_horizon():
+    """Old days summarized by a rollup keep their last change point only"""
+    old = datetime.combine(HORIZON.date() - timedelta(days=30), datetime.min.time())
+    day, next_day = old.date(), old.date() + timedelta(days=1)
+    rows = [
+        _row("a", 100.0, old + timedelta(hours=8)),
+        _row("b", 110.0, old + timedelta(hours=12)),
+        _row("c", 105.0, old + timedelta(hours=18)),
+        # Next day, not summarized: every change point stays
+        _row("d", 90.0, old + timedelta(hours=32)),
+        _row("e", 95.0, old + timedelta(hours=40)),
+    ]
+    deleted, updates = plan_compaction(rows, HORIZON, {day}, CUTOFF)
+    assert sorted(deleted) == ["a", "b"]
+    assert updates == {}
+
+    # Without a rollup the day is left as is
+    deleted, updates = plan_compaction(rows, HORIZON, set(), CUTOFF)
+    assert deleted == [] and updates == {}
+
+    # The surviving close merges into the previous run when it has the same price
+    deleted, updates = plan_compaction([
+        _row("a", 100.0, old - timedelta(hours=4)),
+        _row("b", 110.0, old + timedelta(hours=8)),
+        _row("c", 100.0, old + timedelta(hours=18)),
+    ], HORIZON, {day, next_day}, CUTOFF)
+    assert sorted(deleted) == ["b", "c"]
+    assert updates == {"a": old + timedelta(hours=18)}
+
+
+def test_recent_rows_untouched():
+    """Rows newer than the minimum age are neither deleted nor merged into"""
+    rows = [
+        _row("a", 100.0, CUTOFF - timedelta(hours=6)),
+        _row("b", 100.0, CUTOFF - timedelta(hours=1)),
+        _row("c", 100.0, CUTOFF),
+        _row("d", 100.0, CUTOFF + timedelta(hours=3)),
+        _row("e", 120.0, CUTOFF + timedelta(hours=4)),
+    ]
+    deleted, updates = plan_compaction(rows, HORIZON, set(), CUTOFF)
+    assert deleted == ["b"]
+    assert updates == {"a": CUTOFF - timedelta(hours=1)}
+
+    # Nothing old enough: nothing to do
+    deleted, updates = plan_compaction(rows[2:], HORIZON, set(), CUTOFF)
+    assert deleted == [] and updates == {}
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (
+        test_identical_runs_collapse,
+        test_last_seen_at_extension,
+        test_rollup_days_thinned_past_horizon,
+        test_recent_rows_untouched,
+    ):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
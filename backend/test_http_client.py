@@ -0,0 +1,52 @@
+"""
+Shared HTTP client test: the pooled transport offers HTTP/2 over ALPN
+Reads the ALPN protocols from the TLS ClientHello the pool's SSL context
+would send (in memory, no network).
+Run: python test_http_client.py
+"""
+import ssl
+import sys
+
+import httpx
+
+from app.core.http_client import _PooledTransport
+
+
+def _alpn_offered(http2: bool):
+    """ALPN protocol ids present in the ClientHello of the pool built with http2"""
+    transport = _PooledTransport(http2, httpx.Limits(), dns_ttl=60)
+    incoming, outgoing = ssl.MemoryBIO(), ssl.MemoryBIO()
+    tls = transport._pool._ssl_context.wrap_bio(incoming, outgoing, server_hostname="www.jumia.com.bj")
+    try:
+        tls.do_handshake()
+    except ssl.SSLWantReadError:
+        pass  # ClientHello written, waiting for the server
+    hello = outgoing.read()
+    return {name for name in ("h2", "http/1.1") if bytes([len(name)]) + name.encode() in hello}
+
+
+def test_alpn_offers_h2():
+    """With http2, the pool advertises h2 and http/1.1"""
+    assert _alpn_offered(True) == {"h2", "http/1.1"}
+
+
+def test_alpn_http1_only():
+    """Without http2, only http/1.1 is advertised"""
+    assert _alpn_offered(False) == {"http/1.1"}
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (test_alpn_offers_h2, test_alpn_http1_only):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Bulk scrape write path test: upserts keep (marketplace, external_id) unique
+Runs ingest_scraped_products on an in-memory SQLite database carrying the
+uq_products_marketplace_external index.
+Run: python test_ingestion.py
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database.base import Base
+from app.models.price import PriceHistory
+from app.models.product import Marketplace, Product
+from app.services.ingestion import ingest_scraped_products
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+JUMIA = Marketplace("jumia")
+
+
+def _run(scenario):
+    """Run a scenario against a fresh database"""
+    async def _main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(text(
+                    "CREATE UNIQUE INDEX uq_products_marketplace_external "
+                    "ON products (marketplace, external_id)"
+                ))
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                await scenario(db)
+        finally:
+            await engine.dispose()
+    asyncio.run(_main())
+
+
+async def _products(db: AsyncSession):
+    result = await db.execute(
+        select(Product.id, Product.external_id, Product.current_price).order_by(Product.name)
+    )
+    return result.all()
+
+
+async def _shared_empty_external_id(db: AsyncSession):
+    a = Product(name="a", url="https://jumia.ci/a", marketplace=JUMIA, current_price=100)
+    b = Product(name="b", url="https://jumia.ci/b", marketplace=JUMIA, current_price=200)
+    db.add_all([a, b])
+    await db.commit()
+
+    result = await ingest_scraped_products(db, [
+        {"product_id": a.id, "marketplace": "jumia", "external_id": "", "price": 90},
+        {"product_id": b.id, "marketplace": "jumia", "external_id": "", "price": 200},
+    ], NOW)
+    await db.commit()
+
+    assert [c.product_id for c in result.changes] == [a.id]
+    assert await _products(db) == [(a.id, None, 90.0), (b.id, None, 200.0)]
+
+
+async def _duplicate_external_id(db: AsyncSession):
+    a = Product(name="a", url="https://jumia.ci/a", marketplace=JUMIA, current_price=100)
+    b = Product(name="b", url="https://jumia.ci/b", marketplace=JUMIA, current_price=200)
+    db.add_all([a, b])
+    await db.commit()
+
+    # b reports the identifier already claimed by a earlier in the batch
+    await ingest_scraped_products(db, [
+        {"product_id": a.id, "marketplace": "jumia", "external_id": "SKU1", "price": 100},
+        {"product_id": b.id, "marketplace": "jumia", "external_id": "SKU1", "price": 210},
+    ], NOW)
+    await db.commit()
+    # and again in the next batch, against the stored owner
+    await ingest_scraped_products(db, [
+        {"product_id": b.id, "marketplace": "jumia", "external_id": "SKU1", "price": 220},
+    ], NOW)
+    await db.commit()
+
+    assert await _products(db) == [(a.id, "SKU1", 100.0), (b.id, None, 220.0)]
+    prices = await db.execute(select(func.count()).select_from(PriceHistory))
+    assert prices.scalar_one() == 2
+
+
+def test_shared_empty_external_id():
+    """Two products scraped with external_id="" both upsert"""
+    _run(_shared_empty_external_id)
+
+
+def test_duplicate_external_id():
+    """An identifier owned by another product is not written twice"""
+    _run(_duplicate_external_id)
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (test_shared_empty_external_id, test_duplicate_external_id):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
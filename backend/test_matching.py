@@ -0,0 +1,102 @@
+"""
+Equivalence test: batch matching (score_many / score_matrix) vs score_pair
+Run: python test_matching.py
+"""
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from app.services.embeddings import embeddings
+from app.services.matching import (
+    product_features,
+    score_many,
+    score_matrix,
+    score_pair,
+)
+
+WORDS = [
+    "samsung", "galaxy", "a54", "a14", "apple", "iphone", "13", "pro", "max",
+    "xiaomi", "redmi", "note", "12", "tecno", "spark", "10", "camon", "20",
+    "infinix", "hot", "30", "128gb", "256gb", "64gb", "1tb", "8gb", "ram",
+    "noir", "black", "blue", "bleu", "dual", "sim", "smartphone", "original",
+    "hp", "laptop", "core", "i5", "écran", "6.5", "pouces", "chargeur", "jbl",
+]
+
+
+def _random_products(n: int, seed: int):
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 7)))
+        if rng.random() < 0.1:
+            title = products[rng.randrange(len(products))]["title"] if products else title
+        price = rng.choice([None, 0.0, -5.0, round(rng.uniform(1000, 500000), 2)])
+        if products and rng.random() < 0.2:
+            price = products[rng.randrange(len(products))]["price"]
+        sku = rng.choice([None, None, None, "SKU-1", " sku-1 ", "SKU-2", "  "])
+        ean = rng.choice([None, None, None, "4006381333931", "4006381333931 "])
+        products.append({"id": f"p{i}", "title": title, "price": price, "sku": sku, "ean": ean})
+    return products
+
+
+def _reference(a, b):
+    return score_pair(
+        a["title"], a["price"], b["title"], b["price"],
+        sku_a=a["sku"], sku_b=b["sku"], ean_a=a["ean"], ean_b=b["ean"],
+        id_a=a["id"], id_b=b["id"],
+    )
+
+
+def _features(p):
+    return product_features(p["title"], p["price"], sku=p["sku"], ean=p["ean"], key=p["id"])
+
+
+def _check_all_pairs(products) -> int:
+    features = [_features(p) for p in products]
+    matrix = score_matrix(features)
+    mismatches = 0
+    for i, a in enumerate(products):
+        batch = score_many(features[i], features)
+        for j, b in enumerate(products):
+            expected = _reference(a, b)
+            if batch[j] != expected or matrix.result(i, j) != expected:
+                mismatches += 1
+                print(f"❌ ({i}, {j}) {a['title']!r} / {b['title']!r}")
+                print(f"   score_pair:   {expected}")
+                print(f"   score_many:   {batch[j]}")
+                print(f"   score_matrix: {matrix.result(i, j)}")
+    return mismatches
+
+
+def test_equivalence_without_model():
+    """No fitted TF-IDF model: fallback weights"""
+    embeddings._vectorizer = None
+    embeddings._checked_at = float("inf")  # don't pick up a model file
+    assert _check_all_pairs(_random_products(80, seed=1)) == 0
+
+
+def test_equivalence_with_model():
+    """TF-IDF model fitted on the titles: semantic weights"""
+    products = _random_products(80, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        embeddings.model_path = Path(tmp) / "tfidf.joblib"
+        embeddings.fit(p["title"] for p in products[:60])
+        assert _check_all_pairs(products) == 0
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (test_equivalence_without_model, test_equivalence_with_model):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
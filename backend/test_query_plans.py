@@ -0,0 +1,219 @@
+"""
+Query plan regression test for the hot price history / rollup / alert / tracking queries
+Builds the tables the hot queries read (+ the hot query index migration) in
+an in-memory SQLite database, with the queries built by the same functions
+the endpoints / services / tasks call, and fails if one scans a whole table.
+Run: python test_query_plans.py
+"""
+import importlib.util
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app.api.v1.endpoints.products import history_samples_query, price_drops_query
+from app.database.session import Base
+from app.models.alert import Alert
+from app.models.price import PriceHistory
+from app.models.price_rollup import PriceDailyRollup
+from app.models.product import Product
+from app.models.scrape_state import ProductScrapeState
+from app.models.tracked_product import TrackedProduct
+from app.models.user import User
+from app.services.alert_engine import triggered_alerts_query
+from app.services.rollups import (
+    daily_rollups_query,
+    first_rollup_day_query,
+    products_with_rollup_days_query,
+    rollup_day_count_query,
+)
+from app.services.scheduler import active_alerts_query, due_products_query, price_changes_query, trackers_query
+
+MIGRATION = Path(__file__).parent / "alembic" / "versions" / "20261017_1130_e1f4a7c3b8d6_add_hot_query_indexes.py"
+
+# Tables that must never be read with a full scan by the queries below
+HOT_TABLES = ("price_history", "price_daily_rollups", "alerts", "tracked_products")
+
+# Only the tables the hot queries read
+TABLES = [
+    model.__table__
+    for model in (User, Product, PriceHistory, PriceDailyRollup, Alert, TrackedProduct, ProductScrapeState)
+]
+
+PRODUCT_IDS = ["p1", "p2", "p3"]
+NOW = datetime(2026, 1, 1)
+SINCE = NOW - timedelta(days=30)
+
+# Production-like sizes for the planner (rows, rows per distinct key
+# prefix): ~1M price rows and ~365k daily rollups over 1000 products, so
+# it costs plans the way it would on the real catalog instead of on empty
+# tables
+INDEX_STATS = [
+    ("price_history", "idx_price_product_scraped", "1000000 1000 1"),
+    ("price_history", "idx_price_scraped", "1000000 1"),
+    ("price_daily_rollups", "sqlite_autoindex_price_daily_rollups_1", "365000 365 1"),
+    ("tracked_products", "idx_tracked_product", "5000 5"),
+    ("alerts", "idx_alert_active_product", "5000 2500 3"),
+    ("products", "idx_product_marketplace_external", "1000 334 1"),
+]
+
+
+class _StddevSamp:
+    """Stand-in for MySQL's STDDEV_SAMP, so SQLite can plan the queries using it"""
+
+    def step(self, value):
+        pass
+
+    def finalize(self):
+        return None
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda conn, _: conn.create_aggregate("stddev_samp", 1, _StddevSamp))
+    Base.metadata.create_all(engine, tables=TABLES)
+    spec = importlib.util.spec_from_file_location("hot_query_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+        conn.exec_driver_sql("ANALYZE")  # creates sqlite_stat1
+        for table, index, stat in INDEX_STATS:
+            conn.exec_driver_sql("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", (table, index, stat))
+        conn.exec_driver_sql("ANALYZE sqlite_schema")  # reload the statistics
+    return engine
+
+
+def _plan(engine, query):
+    sql = str(query.compile(
+        dialect=engine.dialect,
+        compile_kwargs={"literal_binds": True, "render_postcompile": True},
+    ))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _full_scans(plan):
+    """Plan steps reading a hot table entirely (index-only scans are fine)"""
+    return [
+        step for step in plan
+        if any(step.startswith(f"SCAN {table}") for table in HOT_TABLES)
+        and "COVERING INDEX" not in step
+    ]
+
+
+# Hot queries, built by the endpoints / services / tasks that issue them
+
+def _history_query():
+    """GET /products/{id}/history: raw samples of a recent window"""
+    return history_samples_query("p1", SINCE, NOW)
+
+
+def _history_rollups_query():
+    """GET /products/{id}/history: daily rollups of a long window"""
+    return daily_rollups_query("p1", since=date(2025, 1, 1), until=NOW.date())
+
+
+def _first_rollup_day_query():
+    """GET /products/{id}/history: first rollup day"""
+    return first_rollup_day_query("p1")
+
+
+def _price_drops_query():
+    """GET /products/price-drops"""
+    return price_drops_query(SINCE, min_drop_pct=10.0, min_z=-1.0)
+
+
+def _ml_count_query():
+    """train_model_for_product: days of prices"""
+    return rollup_day_count_query("p1")
+
+
+def _ml_series_query():
+    """train_model_for_product: daily training series"""
+    return daily_rollups_query("p1")
+
+
+def _ml_retrain_query():
+    """retrain_models_daily: products with 30+ days of prices"""
+    return products_with_rollup_days_query(30)
+
+
+def _scheduler_changes_query():
+    """load_priority_stats: price changes per product in the volatility window"""
+    return price_changes_query(PRODUCT_IDS, SINCE)
+
+
+def _scheduler_trackers_query():
+    """load_priority_stats: trackers per product"""
+    return trackers_query(PRODUCT_IDS)
+
+
+def _scheduler_alerts_query():
+    """load_priority_stats: active alerts per product"""
+    return active_alerts_query(PRODUCT_IDS)
+
+
+def _due_products_query():
+    """claim_due_products: due tracked products"""
+    return due_products_query(NOW, 500)
+
+
+def _triggered_alerts_query():
+    """Price write hook: alerts of the scraped products"""
+    return triggered_alerts_query(PRODUCT_IDS)
+
+
+def _all_triggered_alerts_query():
+    """check_price_alerts: every active alert"""
+    return triggered_alerts_query()
+
+
+HOT_QUERIES = [
+    _history_query,
+    _history_rollups_query,
+    _first_rollup_day_query,
+    _price_drops_query,
+    _ml_count_query,
+    _ml_series_query,
+    _ml_retrain_query,
+    _scheduler_changes_query,
+    _scheduler_trackers_query,
+    _scheduler_alerts_query,
+    _due_products_query,
+    _triggered_alerts_query,
+    _all_triggered_alerts_query,
+]
+
+
+def test_hot_queries_use_indexes():
+    """No hot query falls back to a full table scan"""
+    engine = _engine()
+    failed = 0
+    for build in HOT_QUERIES:
+        plan = _plan(engine, build())
+        scans = _full_scans(plan)
+        if scans:
+            failed += 1
+            print(f"❌ {build.__doc__}: {'; '.join(scans)}")
+            for step in plan:
+                print(f"   {step}")
+        else:
+            print(f"✅ {build.__doc__}")
+    assert failed == 0
+
+
+def main():
+    """Main test function"""
+    try:
+        test_hot_queries_use_indexes()
+    except AssertionError:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Structured data price test: JSON-LD / meta tag prices keep their decimals
+Runs the HTTP tier parsers of the scrapers on inline HTML (no network).
+Run: python test_structured_data.py
+"""
+import json
+import sys
+
+from app.services.scraper.amazon_scraper import AmazonScraper
+from app.services.scraper.jumia_scraper import JumiaScraper
+from app.services.scraper.structured_data import parse_structured_price
+
+# JSON-LD / meta values -> expected price
+PRICES = [(19.9, 19.9), (1299.0, 1299.0), ("1299.00", 1299.0), ("19.9", 19.9), (245000, 245000.0)]
+
+
+def _jsonld_page(price, currency):
+    node = {"@type": "Product", "name": "Casque Bluetooth", "offers": {"price": price, "priceCurrency": currency}}
+    return f'<html><script type="application/ld+json">{json.dumps(node)}</script></html>'
+
+
+def _meta_page(price, currency):
+    return (
+        '<html><meta property="og:title" content="Casque Bluetooth">'
+        f'<meta property="product:price:amount" content="{price}">'
+        f'<meta property="product:price:currency" content="{currency}"></html>'
+    )
+
+
+def test_parse_structured_price():
+    """Dot decimal prices are read as numbers"""
+    for value, expected in PRICES:
+        assert parse_structured_price(value) == expected, value
+    for value in (None, "", "N/A", True):
+        assert parse_structured_price(value) is None, value
+
+
+def test_jsonld_prices():
+    """JSON-LD offer prices are not rescaled by the display text heuristic"""
+    scraper = JumiaScraper()
+    for value, expected in PRICES:
+        data = scraper.parse_html(_jsonld_page(value, "XOF"), "https://www.jumia.com.bj/casque-123.html")
+        assert data["price"] == expected, (value, data["price"])
+
+
+def test_meta_prices():
+    """price:amount meta tags are read like JSON-LD prices"""
+    scraper = JumiaScraper()
+    for value, expected in PRICES:
+        data = scraper.parse_html(_meta_page(value, "XOF"), "https://www.jumia.com.bj/casque-123.html")
+        assert data["price"] == expected, (value, data["price"])
+
+
+def test_amazon_usd_prices():
+    """Amazon USD prices are converted to XOF from the exact amount"""
+    scraper = AmazonScraper()
+    for value, expected in PRICES:
+        data = scraper.parse_html(_jsonld_page(value, "USD"), "https://www.amazon.com/dp/B0TEST0001")
+        assert data["price_original_usd"] == expected, (value, data["price_original_usd"])
+        assert data["price"] == expected * scraper.USD_TO_XOF
+
+
+def main():
+    """Main test function"""
+    failed = 0
+    for test in (test_parse_structured_price, test_jsonld_prices, test_meta_prices, test_amazon_usd_prices):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()